@@ -1,10 +1,15 @@
 import json
+import queue
+import threading
+import time
 import traceback
+from collections import defaultdict
 from time import sleep
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from flask import Flask, request, jsonify, session
 from flask_cors import CORS, cross_origin
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
+from flask_migrate import Migrate, upgrade
 from flask_jwt_extended import create_access_token,get_jwt,get_jwt_identity, \
                                unset_jwt_cookies, jwt_required, verify_jwt_in_request, JWTManager
 from flask_jwt_extended.exceptions import NoAuthorizationError
@@ -17,14 +22,24 @@ import requests
 from sqids import Sqids
 from random import randint
 from flask_mail import Mail, Message
-from scraping import get_daily_stats, return_all_player_details, get_week_number, get_daily_games, get_week_start_end_date  # Ensure scraping.py is in the same directory or in the Python path
-import requests
-from sqlalchemy import and_
+from scraping import get_daily_stats, return_all_player_details, get_week_number, get_daily_games, get_daily_game_states, get_week_start_end_date  # Ensure scraping.py is in the same directory or in the Python path
+import http_client
+from proxy_cache import ProxyCache
+from player_search import PlayerSearch
+from draft import DraftRoom, DraftError
+from scoring import score_matrix, FOOTBALL_WEIGHTS, FOOTBALL_PA_EDGES, FOOTBALL_PA_KEYS, HOCKEY_WEIGHTS, BASKETBALL_WEIGHTS, BASEBALL_WEIGHTS
+from sqlalchemy import and_, or_, func, insert, select, update
+from sqlalchemy.orm import aliased, joinedload, selectinload
 from sqlalchemy import asc
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 
 sqids = Sqids(min_length=7)
 
+MAX_TEAMS_PER_LEAGUE = 12
+
 POSITION_LIMITS = {
     "football" : {
         "QB": 1,
@@ -56,6 +71,21 @@ POSITION_LIMITS = {
     }
 }
 
+# extra player positions a starting slot accepts besides its own
+FLEX_POSITIONS = {
+    "football": {"FLX": {"RB", "WR", "TE"}},
+    "hockey": {"F": {"RW", "LW", "F"}},
+    "basketball": {},
+    "baseball": {
+        "IF": {"1B", "2B", "SS", "3B", "IF"},
+        "OF": {"OF", "LF", "CF", "RF"},
+        "P": {"SP", "RP", "CP", "P"}
+    }
+}
+
+# roster size each team drafts; spots beyond the starting slots are bench
+DRAFT_ROUNDS = {"nfl": 21, "nba": 18, "mlb": 24, "nhl": 21}
+
 app = Flask(__name__)
 CORS(app, resources={r"/api/*": {"origins": "*"}})
 socketio = SocketIO(app, cors_allowed_origins="*", async_mode='eventlet')
@@ -88,402 +118,441 @@ mail = Mail(app)
 
 db = SQLAlchemy(app)   
 
-migrate = Migrate(app, db)  # Add Migrate
+# absolute, so startup finds the migrations whatever the working directory
+migrate = Migrate(app, db, directory=os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations"))  # Add Migrate
 
 jwt = JWTManager(app)
 
         
-def update_scores():
+def bulk_upsert(model, rows, index_elements, update_columns, increasing_columns=()):
+    """INSERT ... ON CONFLICT DO UPDATE for a list of row dicts, batched by the driver.
+
+    increasing_columns (a subset of update_columns) keep the larger of the stored
+    and the new value, so concurrent writers finishing out of order never move
+    them backwards.
+    """
+    if not rows:
+        return
+    if db.engine.dialect.name == "postgresql":
+        stmt = postgresql_insert(model.__table__)
+        greatest = func.greatest
+    else:
+        stmt = sqlite_insert(model.__table__)
+        # SQLite's two-argument max() is the scalar GREATEST
+        greatest = func.max
+    stmt = stmt.on_conflict_do_update(
+        index_elements=index_elements,
+        set_={
+            column: greatest(model.__table__.c[column], stmt.excluded[column]) if column in increasing_columns else stmt.excluded[column]
+            for column in update_columns
+        }
+    )
+    db.session.execute(stmt, rows)
+
+
+def score_daily_sport(league_sport, week_num, player_ids=None):
+    """Recompute rostered players' TeamPlayerPerformance for the week in one pass.
+
+    Rulesets, rosters, existing performances and the week's DailyStats* totals are
+    loaded with one query each; points are computed in memory (see scoring.py) and
+    written back with a single bulk upsert. When player_ids is given only those
+    players are rescored. Returns the ids of the teams whose players were scored.
+    """
+    stats_model, ruleset_model, ruleset_column = DAILY_SCORING[league_sport]
+    start_date, end_date = get_week_start_end_date()
+
+    leagues = League.query.filter(League.sport == league_sport).all()
+    if not leagues:
+        return set()
+    league_ids = [league.id for league in leagues]
+
+    ruleset_ids = {getattr(league, ruleset_column) for league in leagues} - {None}
+    rulesets = {
+        ruleset.id: {col.name: getattr(ruleset, col.name) for col in ruleset_model.__table__.columns}
+        for ruleset in ruleset_model.query.filter(ruleset_model.id.in_(ruleset_ids)).all()
+    }
+    league_ruleset_ids = {league.id: getattr(league, ruleset_column) for league in leagues}
+
+    roster_query = TeamPlayer.query.join(
+        Team, and_(Team.id == TeamPlayer.team_id, Team.league_id == TeamPlayer.league_id)
+    ).filter(TeamPlayer.league_id.in_(league_ids))
+    rostered_ids = db.session.query(TeamPlayer.player_id).filter(TeamPlayer.league_id.in_(league_ids))
+    if player_ids is not None:
+        roster_query = roster_query.filter(TeamPlayer.player_id.in_(player_ids))
+        rostered_ids = rostered_ids.filter(TeamPlayer.player_id.in_(player_ids))
+    roster = roster_query.all()
+    if not roster:
+        return set()
+
+    # stats are linear, so the week's daily rows are summed per player in SQL and
+    # every player is scored under every ruleset with one matrix product
+    weights = stats_model.FANTASY_WEIGHTS
+    weekly_stats = db.session.query(
+        stats_model.player_id,
+        *[func.coalesce(func.sum(getattr(stats_model, stat)), 0).label(stat) for stat in weights]
+    ).filter(
+        and_(
+            stats_model.player_id.in_(rostered_ids),
+            stats_model.date >= start_date,
+            stats_model.date < end_date
+        )
+    ).group_by(stats_model.player_id).all()
+
+    ruleset_order = list(rulesets)
+    points = score_matrix(weekly_stats, [rulesets[ruleset_id] for ruleset_id in ruleset_order], weights)
+    player_index = {row.player_id: i for i, row in enumerate(weekly_stats)}
+    ruleset_index = {ruleset_id: j for j, ruleset_id in enumerate(ruleset_order)}
+
+    # plain column rows, not entities: the upsert below bypasses the ORM and would
+    # leave loaded TeamPlayerPerformance objects stale for the matchup totals
+    existing = {
+        (performance.player_id, performance.league_id): performance
+        for performance in db.session.query(
+            TeamPlayerPerformance.player_id,
+            TeamPlayerPerformance.league_id,
+            TeamPlayerPerformance.starting_position,
+            TeamPlayerPerformance.fantasy_points
+        ).filter(
+            TeamPlayerPerformance.week_num == week_num,
+            TeamPlayerPerformance.league_id.in_(league_ids),
+            TeamPlayerPerformance.player_id.in_(rostered_ids)
+        ).all()
+    }
+
+    rows = []
+    team_ids = set()
+    for team_player in roster:
+        ruleset_id = league_ruleset_ids.get(team_player.league_id)
+        if ruleset_id not in ruleset_index:
+            continue
+
+        i = player_index.get(team_player.player_id)
+        total_points = float(points[i, ruleset_index[ruleset_id]]) if i is not None else 0.0
+
+        performance = existing.get((team_player.player_id, team_player.league_id))
+        starting_position = team_player.starting_position
+        if performance and performance.fantasy_points != 0:
+            # lineup is locked once the player has accrued points
+            starting_position = performance.starting_position
+
+        rows.append({
+            "week_num": week_num,
+            "player_id": team_player.player_id,
+            "league_id": team_player.league_id,
+            "starting_position": starting_position,
+            "fantasy_points": total_points
+        })
+        team_ids.add(team_player.team_id)
+
+    bulk_upsert(
+        TeamPlayerPerformance,
+        rows,
+        index_elements=["week_num", "player_id", "league_id"],
+        update_columns=["starting_position", "fantasy_points"]
+    )
+    return team_ids
+
+
+def update_matchup_scores(league_sport, week_num, team_ids=None):
+    """Recompute matchup totals for the week, optionally only for matchups involving team_ids.
+
+    Every team's non-bench total comes from one grouped aggregate and the changed
+    matchups are written with one bulk UPDATE. Returns a score update (see
+    publish_score_updates) for every matchup whose total moved.
+    """
+    league_ids = db.session.query(League.id).filter(League.sport == league_sport)
+    matchup_query = db.session.query(
+        Matchup.id, Matchup.league_id, Matchup.home_team_id, Matchup.away_team_id,
+        Matchup.home_team_score, Matchup.away_team_score
+    ).filter(Matchup.week_num == week_num, Matchup.league_id.in_(league_ids))
+    if team_ids is not None:
+        matchup_query = matchup_query.filter(
+            or_(Matchup.home_team_id.in_(team_ids), Matchup.away_team_id.in_(team_ids))
+        )
+    current_matchups = matchup_query.all()
+    print(f"{league_sport.upper()}: Current matchups: {len(current_matchups)}")
+    if not current_matchups:
+        return []
+
+    matchup_team_ids = {team_id for matchup in current_matchups for team_id in (matchup.home_team_id, matchup.away_team_id)}
+    team_totals = dict(
+        db.session.query(TeamPlayer.team_id, func.sum(TeamPlayerPerformance.fantasy_points)).join(
+            TeamPlayer,
+            and_(
+                TeamPlayerPerformance.player_id == TeamPlayer.player_id,
+                TeamPlayerPerformance.league_id == TeamPlayer.league_id
+            )
+        ).filter(
+            TeamPlayerPerformance.week_num == week_num,
+            TeamPlayerPerformance.starting_position != "BEN",
+            TeamPlayerPerformance.league_id.in_(league_ids),
+            TeamPlayer.team_id.in_(matchup_team_ids)
+        ).group_by(TeamPlayer.team_id).all()
+    )
+
+    updates = []
+    for matchup in current_matchups:
+        totals = (team_totals.get(matchup.home_team_id) or 0, team_totals.get(matchup.away_team_id) or 0)
+        previous = (matchup.home_team_score or 0, matchup.away_team_score or 0)
+        if totals != previous:
+            updates.append({
+                "matchup_id": matchup.id,
+                "league_id": matchup.league_id,
+                "week": week_num,
+                "home_team_id": matchup.home_team_id,
+                "away_team_id": matchup.away_team_id,
+                "home_score": totals[0],
+                "away_score": totals[1],
+                "home_delta": totals[0] - previous[0],
+                "away_delta": totals[1] - previous[1],
+            })
+
+    if updates:
+        db.session.execute(update(Matchup), [
+            {"id": u["matchup_id"], "home_team_score": u["home_score"], "away_team_score": u["away_score"]}
+            for u in updates
+        ])
+    return updates
+
+
+# Socket.IO runs on eventlet and nothing is monkey-patched, so emitting from the
+# scheduler's and the ingest pool's OS threads is unreliable. Those threads put
+# their events here, and a green thread on the server loop sends them.
+socket_outbox = queue.Queue()
+SOCKET_OUTBOX_POLL_SECONDS = 0.05
+
+
+def queue_socket_event(event, payload, room):
+    """Thread-safe socketio.emit(event, payload, room=room)."""
+    socket_outbox.put((event, payload, room))
+
+
+def flush_socket_events():
+    while True:
+        try:
+            event, payload, room = socket_outbox.get_nowait()
+        except queue.Empty:
+            return
+        socketio.emit(event, payload, room=room)
+
+
+def socket_outbox_loop():
+    while True:
+        flush_socket_events()
+        socketio.sleep(SOCKET_OUTBOX_POLL_SECONDS)
+
+
+def publish_score_updates(updates):
+    """Push committed matchup score changes to the league_{id} and matchup_{id} rooms.
+
+    A league room gets one batched event per scoring pass; a matchup room gets
+    only its own matchup, so open matchup pages update without polling.
+    """
+    by_league = {}
+    for update in updates:
+        update["matchup_code"] = sqids.encode([update["matchup_id"]])
+        by_league.setdefault(update["league_id"], []).append(update)
+
+    for league_id, league_updates in by_league.items():
+        queue_socket_event("league_scores", {"league_id": league_id, "matchups": league_updates}, f"league_{league_id}")
+        for update in league_updates:
+            queue_socket_event("matchup_score", update, f"matchup_{update['matchup_id']}")
+
+
+def update_scores(changed_players=None):
+    """Rescore the current week.
+
+    changed_players maps league sport -> player ids whose stats changed; only the
+    teams rostering those players (and their matchups) are recomputed. None
+    rescores everything.
+    """
     with app.app_context():
         print("Updating fantasy scores...")
         print(f"Task executed at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
 
-        # --- HOCKEY ---
-        hockey_teams = Team.query.join(League).filter(League.sport == "nhl").all()
-        week_num = get_week_number(datetime.now().year, "hockey", "nhl")
-        for team in hockey_teams:
-            league = League.query.get(team.league_id)
-            start_date, end_date = get_week_start_end_date()
-            players = TeamPlayer.query.filter_by(team_id=team.id, league_id=team.league_id).all()
-
-            for player in players:
-                stats = DailyStatsHockey.query.filter(
-                    and_(
-                        DailyStatsHockey.player_id == player.player_id,
-                        DailyStatsHockey.date >= start_date,
-                        DailyStatsHockey.date < end_date
-                    )
-                ).all()
-
-                ruleset = RulesetHockey.query.get(league.hockey_ruleset_id)
-                if not ruleset:
-                    continue
-
-                ruleset_dict = {col.name: getattr(ruleset, col.name) for col in RulesetHockey.__table__.columns}
-
-                total_points = 0
-                for stat in stats:
-                    total_points += stat.calculate_fantasy_points(ruleset_dict)
-
-                # Update or create TeamPlayerPerformance
-                performance = TeamPlayerPerformance.query.filter_by(
-                    week_num=week_num,
-                    player_id=player.player_id,
-                    league_id=team.league_id
-                ).first()
-
-                if performance:
-                    if performance.fantasy_points == 0: # if player has not already accrued points (has not played)
-                        performance.starting_position = player.starting_position
-                    performance.fantasy_points = total_points
-                else:
-                    performance = TeamPlayerPerformance(
-                        week_num=week_num,
-                        player_id=player.player_id,
-                        league_id=team.league_id,
-                        starting_position=player.starting_position,
-                        fantasy_points=total_points
-                    )
-                    db.session.add(performance)
-        # Now update Matchup scores
-        current_matchups = Matchup.query.filter_by(week_num=week_num).join(League).filter(League.sport == "nhl").all()
-        print(f"NHL: Current matchups: {len(current_matchups)}")
-
-        for matchup in current_matchups:
-            home_team_id = matchup.home_team_id
-            away_team_id = matchup.away_team_id
-
-            # Home team: sum fantasy points for all non-bench players
-            home_players = TeamPlayerPerformance.query.join(TeamPlayer, TeamPlayerPerformance.player_id == TeamPlayer.player_id).filter(
-                and_(
-                    TeamPlayer.team_id == home_team_id,
-                    TeamPlayerPerformance.week_num == week_num,
-                    TeamPlayerPerformance.starting_position != "BEN",
-                    TeamPlayerPerformance.league_id == matchup.league_id
-                )
-            ).all()
-
-            home_total_points = sum(player.fantasy_points for player in home_players)
-
-            # Away team: sum fantasy points for all non-bench players
-            away_players = TeamPlayerPerformance.query.join(TeamPlayer, TeamPlayerPerformance.player_id == TeamPlayer.player_id).filter(
-                and_(
-                    TeamPlayer.team_id == away_team_id,
-                    TeamPlayerPerformance.week_num == week_num,
-                    TeamPlayerPerformance.starting_position != "BEN",
-                    TeamPlayerPerformance.league_id == matchup.league_id
-                )
-            ).all()
-
-            away_total_points = sum(player.fantasy_points for player in away_players)
-
-            # Update matchup scores
-            matchup.home_team_score = home_total_points
-            matchup.away_team_score = away_total_points
-
-
-        # --- BASKETBALL ---
-        basketball_teams = Team.query.join(League).filter(League.sport == "nba").all()
-        week_num = get_week_number(datetime.now().year, "basketball", "nba")
-        for team in basketball_teams:
-            league = League.query.get(team.league_id)
-            start_date, end_date = get_week_start_end_date()
-            players = TeamPlayer.query.filter_by(team_id=team.id, league_id=team.league_id).all()
-
-            for player in players:
-                stats = DailyStatsBasketball.query.filter(
-                    and_(
-                        DailyStatsBasketball.player_id == player.player_id,
-                        DailyStatsBasketball.date >= start_date,
-                        DailyStatsBasketball.date < end_date
-                    )
-                ).all()
-
-                ruleset = RulesetBasketball.query.get(league.basketball_ruleset_id)
-                if not ruleset:
-                    continue
-
-                ruleset_dict = {col.name: getattr(ruleset, col.name) for col in RulesetBasketball.__table__.columns}
-
-                total_points = 0
-                for stat in stats:
-                    total_points += stat.calculate_fantasy_points(ruleset_dict)
-
-                performance = TeamPlayerPerformance.query.filter_by(
-                    week_num=week_num,
-                    player_id=player.player_id,
-                    league_id=team.league_id
-                ).first()
-
-                if performance:
-                    if performance.fantasy_points == 0: # if player has not already accrued points (has not played)
-                        performance.starting_position = player.starting_position
-                    performance.fantasy_points = total_points
-                else:
-                    performance = TeamPlayerPerformance(
-                        week_num=week_num,
-                        player_id=player.player_id,
-                        league_id=team.league_id,
-                        starting_position=player.starting_position,
-                        fantasy_points=total_points
-                    )
-                    db.session.add(performance)
-
-        # Now update Matchup scores
-        current_matchups = Matchup.query.filter_by(week_num=week_num).join(League).filter(League.sport == "nba").all()
-        print(f"NBA: Current matchups: {len(current_matchups)}")
-
-        for matchup in current_matchups:
-            home_team_id = matchup.home_team_id
-            away_team_id = matchup.away_team_id
-
-            # Home team: sum fantasy points for all non-bench players
-            home_players = TeamPlayerPerformance.query.join(TeamPlayer, TeamPlayerPerformance.player_id == TeamPlayer.player_id).filter(
-                and_(
-                    TeamPlayer.team_id == home_team_id,
-                    TeamPlayerPerformance.week_num == week_num,
-                    TeamPlayerPerformance.starting_position != "BEN"),
-                    TeamPlayerPerformance.league_id == matchup.league_id
-            ).all()
-
-            home_total_points = sum(player.fantasy_points for player in home_players)
-
-            # Away team: sum fantasy points for all non-bench players
-            away_players = TeamPlayerPerformance.query.join(TeamPlayer, TeamPlayerPerformance.player_id == TeamPlayer.player_id).filter(
-                and_(
-                    TeamPlayer.team_id == away_team_id,
-                    TeamPlayerPerformance.week_num == week_num,
-                    TeamPlayerPerformance.starting_position != "BEN"),
-                    TeamPlayerPerformance.league_id == matchup.league_id
-            ).all()
-
-            away_total_points = sum(player.fantasy_points for player in away_players)
-
-            # Update matchup scores
-            matchup.home_team_score = home_total_points
-            matchup.away_team_score = away_total_points
-
-
-        # --- BASEBALL ---
-        baseball_teams = Team.query.join(League).filter(League.sport == "mlb").all()
-        week_num = get_week_number(datetime.now().year, "baseball", "mlb")
-        for team in baseball_teams:
-            league = League.query.get(team.league_id)
-            start_date, end_date = get_week_start_end_date()
-            players = TeamPlayer.query.filter_by(team_id=team.id, league_id=team.league_id).all()
-
-            for player in players:
-                stats = DailyStatsBaseball.query.filter(
-                    and_(
-                        DailyStatsBaseball.player_id == player.player_id,
-                        DailyStatsBaseball.date >= start_date,
-                        DailyStatsBaseball.date < end_date
-                    )
-                ).all()
-
-                ruleset = RulesetBaseball.query.get(league.baseball_ruleset_id)
-                if not ruleset:
-                    continue
-
-                ruleset_dict = {col.name: getattr(ruleset, col.name) for col in RulesetBaseball.__table__.columns}
-
-                total_points = 0
-                for stat in stats:
-                    total_points += stat.calculate_fantasy_points(ruleset_dict)
-
-                performance = TeamPlayerPerformance.query.filter_by(
-                    week_num=week_num,
-                    player_id=player.player_id,
-                    league_id=team.league_id
-                ).first()
-
-                if performance:
-                    if performance.fantasy_points == 0: # if player has not already accrued points (has not played)
-                        performance.starting_position = player.starting_position
-                    performance.fantasy_points = total_points
-                else:
-                    performance = TeamPlayerPerformance(
-                        week_num=week_num,
-                        player_id=player.player_id,
-                        league_id=team.league_id,
-                        starting_position=player.starting_position,
-                        fantasy_points=total_points
-                    )
-                    db.session.add(performance)
-
-        current_matchups = Matchup.query.filter_by(week_num=week_num).join(League).filter(League.sport == "mlb").all()
-        print(f"MLB: Current matchups: {len(current_matchups)}")
-        for matchup in current_matchups:
-            home_team_id = matchup.home_team_id
-            away_team_id = matchup.away_team_id
-
-            # Home team: sum fantasy points for all non-bench players
-            home_players = TeamPlayerPerformance.query.join(TeamPlayer, TeamPlayerPerformance.player_id == TeamPlayer.player_id).filter(
-                and_(
-                    TeamPlayer.team_id == home_team_id,
-                    TeamPlayerPerformance.week_num == week_num,
-                    TeamPlayerPerformance.starting_position != "BEN",
-                    TeamPlayerPerformance.league_id == matchup.league_id
-                )
-            ).all()
-
-            home_total_points = sum(player.fantasy_points for player in home_players)
-
-            # Away team: sum fantasy points for all non-bench players
-            away_players = TeamPlayerPerformance.query.join(TeamPlayer, TeamPlayerPerformance.player_id == TeamPlayer.player_id).filter(
-                and_(
-                    TeamPlayer.team_id == away_team_id,
-                    TeamPlayerPerformance.week_num == week_num,
-                    TeamPlayerPerformance.starting_position != "BEN",
-                    TeamPlayerPerformance.league_id == matchup.league_id
-                )
-            ).all()
-
-            away_total_points = sum(player.fantasy_points for player in away_players)
-
-            # Update matchup scores
-            matchup.home_team_score = home_total_points
-            matchup.away_team_score = away_total_points
-
+        score_updates = []
+
+        for league_sport in DAILY_SCORING:
+            player_ids = None if changed_players is None else changed_players.get(league_sport, set())
+            if player_ids is not None and not player_ids:
+                print(f"{league_sport.upper()}: no stat changes, skipping")
+                continue
+            week_num = get_week_number(datetime.now().year, SPORTS[league_sport], league_sport)
+            if week_num is None:
+                print(f"{league_sport.upper()}: season is over, skipping")
+                continue
+            team_ids = score_daily_sport(league_sport, week_num, player_ids)
+            print(f"{league_sport.upper()}: Rescored {len(team_ids)} teams")
+            score_updates.extend(update_matchup_scores(league_sport, week_num, team_ids))
 
         db.session.commit()
-        print("Finished updating fantasy scores.")
+        # only after the commit, so a client refetching on an event never reads older totals
+        publish_score_updates(score_updates)
+        print(f"Finished updating fantasy scores, {len(score_updates)} matchups changed.")
 
 
-def update_player_stats():
+def ingest_stat_lines(league_sport, stats_model, stat_lines, **key):
+    """Write one sport's stat lines in a single transaction; returns the ids that changed.
+
+    Player ids are validated with one set query, the current rows are loaded with
+    another, and only new or changed lines are written with one
+    INSERT ... ON CONFLICT DO UPDATE.
+    """
+    stat_lines = {str(player_id): stats for player_id, stats in stat_lines.items()}
+    key_columns = list(key) + ["player_id"]
+    stat_columns = [column for column in stats_model.__table__.columns if column.name not in key_columns]
+
+    known_ids = {player_id for (player_id,) in db.session.query(Player.id).filter(Player.id.in_(list(stat_lines)))}
+    missing_ids = set(stat_lines) - known_ids
+    # ids that already triggered a refresh and are still missing are not in the
+    # active-athletes catalog at all; another scrape would not find them either
+    with catalog_refresh_lock:
+        new_missing_ids = missing_ids - unresolved_player_ids[league_sport]
+        unresolved_player_ids[league_sport] -= known_ids
+        unresolved_player_ids[league_sport] |= missing_ids
+    if new_missing_ids:
+        # refresh_player_catalog writes their lines once the catalog refresh lands
+        print(f"{league_sport.upper()}: {len(new_missing_ids)} players not found in the database, queueing a catalog refresh")
+        request_catalog_refresh(league_sport)
+
+    existing = {
+        row.player_id: row
+        for row in db.session.query(
+            stats_model.player_id, *[getattr(stats_model, column.name) for column in stat_columns]
+        ).filter_by(**key).filter(stats_model.player_id.in_(list(known_ids)))
+    }
+
+    rows = []
+    for player_id in known_ids:
+        current = existing.get(player_id)
+        # every row carries every column so the whole batch is one executemany
+        row = dict(key, player_id=player_id)
+        for column in stat_columns:
+            if column.name in stat_lines[player_id]:
+                row[column.name] = stat_lines[player_id][column.name]
+            elif current is not None:
+                row[column.name] = getattr(current, column.name)
+            else:
+                row[column.name] = column.default.arg if column.default is not None else None
+        if current is None or any(getattr(current, column.name) != row[column.name] for column in stat_columns):
+            rows.append(row)
+
+    bulk_upsert(stats_model, rows, index_elements=key_columns, update_columns=[column.name for column in stat_columns])
+    db.session.commit()
+    return {row["player_id"] for row in rows}
+
+
+def ingest_sport(league_sport, game_ids=None, revalidate=False, force=False):
+    """Fetch, parse, ingest and score one sport, optionally only the given games.
+
+    Runs in its own app context, and therefore its own database session, so the
+    sports can be processed side by side. When none of the games changed since
+    the last pass nothing is written or rescored, unless force is set.
+    """
     with app.app_context():
-        print("Updating player stats...")
-        print(f"Task executed at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        hockey_stats = get_daily_stats("hockey", "nhl")
-        basketball_stats = get_daily_stats("basketball", "nba")
-        football_stats = get_daily_stats("football", "nfl")
-        baseball_stats = get_daily_stats("baseball", "mlb")  
-        hockey_populated = False
-        basketball_populated = False
-        football_populated = False
-        baseball_populated = False
-
-        # Hockey handler
-        count = 0
-        if hockey_stats is not None:
-            for player_id, stats in hockey_stats["stats"].items():
-                player = Player.query.filter_by(id=player_id).first()
-                if player:
-                    daily_stats = DailyStatsHockey.query.filter_by(player_id=player_id, date=datetime.now().date()).first()
-                    if not daily_stats:
-                        daily_stats = DailyStatsHockey(player_id=player_id, date=datetime.now().date(), **stats)
-                        db.session.add(daily_stats)
-                    for key, value in stats.items():
-                        setattr(daily_stats, key, value)
-                    db.session.commit()
-                else:
-                    count += 1
-                    print(f"Player with ID {player_id} not found in the database: count: {count}")
-                    
-                    if not hockey_populated:
-                        populate_player_table("nhl")
-
-                    hockey_populated = True
-                    player = Player.query.filter_by(id=player_id).first()
-                    # redo insertion
-                    if player:
-                        daily_stats = DailyStatsHockey.query.filter_by(player_id=player_id, date=datetime.now().date()).first()
-                        if not daily_stats:
-                            daily_stats = DailyStatsHockey(player_id=player_id, date=(datetime.now() - timedelta(days=1)).date(), **stats)
-                            db.session.add(daily_stats)
-                        for key, value in stats.items():
-                            setattr(daily_stats, key, value)
-                        db.session.commit()
-        if basketball_stats is not None:
-            for player_id, stats in basketball_stats["stats"].items():
-                print(player_id)
-                player = Player.query.filter_by(id=player_id).first()
-                if player:
-                    daily_stats = DailyStatsBasketball.query.filter_by(player_id=player_id, date=datetime.now().date()).first()
-                    if not daily_stats:
-                        daily_stats = DailyStatsBasketball(player_id=player_id, date=(datetime.now()).date(), **stats)
-                        db.session.add(daily_stats)
-                    for key, value in stats.items():
-                        setattr(daily_stats, key, value)
-                    db.session.commit()
-                else:
-                    count += 1
-                    print(f"Player with ID {player_id} not found in the database: count: {count}")
-                    if not basketball_populated:
-                        populate_player_table("nba")
-                    
-                    basketball_populated = True
-                    player = Player.query.filter_by(id=player_id).first()
-                    # redo insertion
-                    if player:
-                        daily_stats = DailyStatsBasketball.query.filter_by(player_id=player_id, date=(datetime.now()).date()).first()
-                        if not daily_stats:
-                            daily_stats = DailyStatsBasketball(player_id=player_id, date=datetime.now().date(), **stats)
-                            db.session.add(daily_stats)
-                        for key, value in stats.items():
-                            setattr(daily_stats, key, value)
-                        db.session.commit()
-        if football_stats is not None:
-            for player_id, stats in football_stats["stats"].items():
-                player = Player.query.filter_by(id=player_id).first()
-                if player:
-                    weekly_stats = WeeklyStatsFootball.query.filter_by(player_id=player_id, week_num=get_week_number(2025, "football", "nfl")).first()
-                    if not weekly_stats:
-                        weekly_stats = WeeklyStatsFootball(player_id=player_id, week_num=get_week_number(2025, "football", "nfl"), **stats)
-                        db.session.add(weekly_stats)
-                    for key, value in stats.items():
-                        setattr(weekly_stats, key, value)
-                    db.session.commit()
-                else:
-                    count += 1
-                    print(f"Player with ID {player_id} not found in the database: count: {count}")
-                    if not football_populated:
-                        populate_player_table("nfl")
-                    
-                    football_populated = True
-                    player = Player.query.filter_by(id=player_id).first()
-                    # redo insertion
-                    if player:
-                        weekly_stats = WeeklyStatsFootball.query.filter_by(player_id=player_id, week_num=get_week_number()).first()
-                        if not weekly_stats:
-                            weekly_stats = WeeklyStatsFootball(player_id=player_id, week_num=get_week_number(), **stats)
-                            db.session.add(weekly_stats)
-                        for key, value in stats.items():
-                            setattr(weekly_stats, key, value)
-                        db.session.commit()
-        if baseball_stats is not None:
-            for player_id, stats in baseball_stats["stats"].items():
-                player = Player.query.filter_by(id=player_id).first()
-                if player:
-                    daily_stats = DailyStatsBaseball.query.filter_by(player_id=player_id, date=datetime.now().date()).first()
-                    if not daily_stats:
-                        daily_stats = DailyStatsBaseball(player_id=player_id, date=datetime.now().date(), **stats)
-                        db.session.add(daily_stats)
-                    for key, value in stats.items():
-                        setattr(daily_stats, key, value)
-                    db.session.commit()
-                else:
-                    count += 1
-                    print(f"Player with ID {player_id} not found in the database: count: {count}")
-                    if not baseball_populated:
-                        populate_player_table("mlb")
-                    
-                    baseball_populated = True
-                    player = Player.query.filter_by(id=player_id).first()
-                    # redo insertion
-                    if player:
-                        daily_stats = DailyStatsBaseball.query.filter_by(player_id=player_id, date=datetime.now().date()).first()
-                        if not daily_stats:
-                            daily_stats = DailyStatsBaseball(player_id=player_id, date=datetime.now().date(), **stats)
-                            db.session.add(daily_stats)
-                        for key, value in stats.items():
-                            setattr(daily_stats, key, value)
-                        db.session.commit()
-    
-    print(f"Count of players not found in the database: {count}")
+        sport_stats = get_daily_stats(SPORTS[league_sport], league_sport, game_ids=game_ids, revalidate=revalidate)
+        changed_players = set()
+        if sport_stats is not None and (force or sport_stats["changed_games"]):
+            if league_sport == "nfl":
+                key = {"week_num": get_week_number(2025, "football", "nfl")}
+            else:
+                key = {"date": datetime.now().date()}
+            changed_players = ingest_stat_lines(league_sport, STAT_MODELS[league_sport], sport_stats["stats"], **key)
+        print(f"{league_sport.upper()}: {len(changed_players)} stat lines changed")
+
+        update_scores({league_sport: changed_players})
+
+
+def update_player_stats():
+    print("Updating player stats...")
+    print(f"Task executed at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+    # one worker per sport: a slow or failing feed only delays its own sport
+    with ThreadPoolExecutor(max_workers=len(SPORTS), thread_name_prefix="ingest") as pool:
+        futures = {pool.submit(ingest_sport, league_sport, revalidate=True): league_sport for league_sport in SPORTS}
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                print(f"{futures[future].upper()}: stat update failed: {e}")
+                traceback.print_exc()
+
+    print(f"Finished updating player stats at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+
+# Game-state driven polling: each sport's job reads the scoreboard, ingests only
+# the games that are live (or just went final) and reschedules itself -- every
+# LIVE_POLL_SECONDS while anything is live, otherwise not before the next start.
+LIVE_POLL_SECONDS = int(os.getenv("LIVE_POLL_SECONDS", "60"))
+IDLE_POLL_SECONDS = int(os.getenv("IDLE_POLL_SECONDS", "1800"))
+POLL_ERROR_SECONDS = int(os.getenv("POLL_ERROR_SECONDS", "300"))
+
+# league sport -> {game id: last seen state}
+game_states = {}
+
+
+def games_to_poll(games, previous_states):
+    """Ids of live games and of games that went final since the last poll.
+
+    A final game sharing a team with one of those (a doubleheader) is included
+    too, because a player's daily line is the sum over all of the day's games.
+    """
+    poll_ids = {
+        game["id"] for game in games
+        if game["state"] == "in" or (game["state"] == "post" and previous_states.get(game["id"]) != "post")
+    }
+    poll_teams = {team for game in games if game["id"] in poll_ids for team in game["teams"]}
+    poll_ids |= {game["id"] for game in games if game["state"] == "post" and poll_teams & set(game["teams"])}
+    return poll_ids
+
+
+def next_poll_delay(games):
+    if any(game["state"] == "in" for game in games):
+        return LIVE_POLL_SECONDS
+    now = datetime.now(timezone.utc)
+    starts = [game["start"] for game in games if game["state"] == "pre" and game["start"]]
+    if not starts:
+        return IDLE_POLL_SECONDS
+    until_start = (min(starts) - now).total_seconds()
+    return int(min(IDLE_POLL_SECONDS, max(LIVE_POLL_SECONDS, until_start)))
+
+
+def track_live_games(league_sport):
+    """One polling step for a sport; returns the number of seconds until the next."""
+    games = get_daily_game_states(SPORTS[league_sport], league_sport)
+    poll_ids = games_to_poll(games, game_states.get(league_sport, {}))
+    if poll_ids:
+        print(f"{league_sport.upper()}: polling {len(poll_ids)} of {len(games)} games")
+        ingest_sport(league_sport, sorted(poll_ids))
+    # only remember the new states once the games were ingested, so a failed
+    # pass retries a game that went final instead of dropping its last update
+    game_states[league_sport] = {game["id"]: game["state"] for game in games}
+    return next_poll_delay(games)
+
+
+def poll_sport(league_sport):
+    delay = POLL_ERROR_SECONDS
+    try:
+        delay = track_live_games(league_sport)
+    except Exception as e:
+        print(f"{league_sport.upper()}: live poll failed: {e}")
+        traceback.print_exc()
+    finally:
+        schedule_sport_poll(league_sport, delay)
+
+
+def schedule_sport_poll(league_sport, delay):
+    scheduler.add_job(
+        func=poll_sport,
+        args=[league_sport],
+        trigger="date",
+        run_date=datetime.now() + timedelta(seconds=delay),
+        id=f"poll_{league_sport}",
+        replace_existing=True,
+        misfire_grace_time=None
+    )
+
 
-    update_scores()
-        
 def clean_up_daily_data():
     with app.app_context():
         print("Cleaning up daily data...")
@@ -494,8 +563,64 @@ def clean_up_daily_data():
         DailyStatsBaseball.query.filter(DailyStatsBaseball.date < week_ago).delete()
         db.session.commit()
 
+def refresh_player_catalog(league):
+    with app.app_context():
+        populate_player_table(league)
+    with catalog_refresh_lock:
+        backfill = bool(unresolved_player_ids[league])
+    if backfill:
+        # lines skipped for players the catalog lacked now only live in the game
+        # cache, and those games never come back as changed; write them from there
+        ingest_sport(league, force=True)
+
+
+def refresh_all_player_catalogs():
+    for league in SPORTS:
+        try:
+            refresh_player_catalog(league)
+        except Exception as e:
+            print(f"Failed to refresh {league} player catalog: {e}")
+
+
+CATALOG_REFRESH_COOLDOWN = int(os.getenv("CATALOG_REFRESH_COOLDOWN", "3600"))
+# league -> monotonic time the last one-off refresh was queued
+last_catalog_refresh = {}
+# league -> stat-feed player ids that were missing when a refresh was queued
+unresolved_player_ids = defaultdict(set)
+catalog_refresh_lock = threading.Lock()
+
+
+def request_catalog_refresh(league):
+    """Queue a one-off catalog refresh, at most once per CATALOG_REFRESH_COOLDOWN.
+
+    A full scrape is ~20k requests, so callers that notice a gap on every
+    poll must not trigger one each time; repeated requests inside the cooldown
+    are dropped, and those while a job is pending collapse into it.
+    """
+    now = time.monotonic()
+    with catalog_refresh_lock:
+        last = last_catalog_refresh.get(league)
+        if last is not None and now - last < CATALOG_REFRESH_COOLDOWN:
+            return False
+        last_catalog_refresh[league] = now
+    scheduler.add_job(
+        func=refresh_player_catalog,
+        args=[league],
+        id=f"catalog_refresh_{league}",
+        replace_existing=True,
+        misfire_grace_time=None
+    )
+    return True
+
+
 scheduler = BackgroundScheduler()
-scheduler.add_job(func=update_player_stats, trigger="interval", minutes=20)
+for league_sport in SPORTS:
+    schedule_sport_poll(league_sport, 0)
+# nightly full sweep picks up stat corrections ESPN makes after a game went final
+scheduler.add_job(func=update_player_stats, trigger="cron", hour=5)
+scheduler.add_job(func=refresh_all_player_catalogs, trigger="cron", hour=4)
+# full rescore to pick up roster and lineup changes that no stat change triggers
+scheduler.add_job(func=update_scores, trigger="interval", hours=6)
 scheduler.add_job(func=clean_up_daily_data, trigger="interval", days=1)
 
 @app.before_request
@@ -506,6 +631,8 @@ def start_scheduler():
         print("Scheduler started")
         first_request = False
         scheduler.start()
+        # runs on the server loop, so it can emit what the scheduler threads queue
+        socketio.start_background_task(socket_outbox_loop)
     
 
 # 👤 User Model
@@ -530,8 +657,22 @@ class League(db.Model):
     draft_time = db.Column(db.DateTime, nullable=True)  # Draft time for the league
     membership_locked = db.Column(db.Boolean, default=False)
 
+    __table_args__ = (
+        # name-prefix search in the league directory; text_pattern_ops lets
+        # Postgres use it for LIKE 'prefix%' under any collation
+        db.Index('ix_leagues_name_lower_id', func.lower(name).label('name_lower'), id,
+                 postgresql_ops={'name_lower': 'text_pattern_ops'}),
+    )
+
+    commissioner = db.relationship("User")
+    teams = db.relationship("Team", back_populates="league", order_by="Team.rank")
+
 class Team(db.Model):
     __tablename__ = 'teams'
+    __table_args__ = (
+        db.Index('ix_teams_owner_id', 'owner_id'),
+        db.Index('ix_teams_league_id', 'league_id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     owner_id = db.Column(db.Integer, nullable=False)
     name = db.Column(db.String(80), nullable=False)
@@ -540,15 +681,30 @@ class Team(db.Model):
     losses = db.Column(db.Integer, default=0)
     rank = db.Column(db.Integer, default=1)
 
+    # owner_id has no foreign key constraint, so the join is spelled out
+    owner = db.relationship("User", primaryjoin="foreign(Team.owner_id) == User.id", viewonly=True)
+    league = db.relationship("League", back_populates="teams")
+    roster = db.relationship("TeamPlayer", back_populates="team")
+
 class TeamPlayer(db.Model):
     __tablename__ = 'team_players'
+    __table_args__ = (db.Index('ix_team_players_team_id', 'team_id'),)
     player_id = db.Column(db.String(20), db.ForeignKey("players.id"), primary_key=True)
     league_id = db.Column(db.Integer, db.ForeignKey("leagues.id"), primary_key=True)
     team_id = db.Column(db.Integer, db.ForeignKey("teams.id"))
     starting_position = db.Column(db.String(3), default="BEN")  # bench default
+    draft_pick = db.Column(db.Integer, nullable=True)  # overall pick number; null for free-agent adds
+
+    player = db.relationship("Player")
+    team = db.relationship("Team", back_populates="roster")
 
 class Matchup(db.Model):
     __tablename__ = 'matchups'
+    __table_args__ = (
+        db.Index('ix_matchups_league_id_week_num', 'league_id', 'week_num'),
+        db.Index('ix_matchups_home_team_id', 'home_team_id'),
+        db.Index('ix_matchups_away_team_id', 'away_team_id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     league_id = db.Column(db.Integer, db.ForeignKey("leagues.id"))
     week_num = db.Column(db.Integer, default=1)
@@ -557,6 +713,10 @@ class Matchup(db.Model):
     home_team_id = db.Column(db.Integer, db.ForeignKey("teams.id"))
     home_team_score = db.Column(db.Float, default=0)
 
+    league = db.relationship("League")
+    home_team = db.relationship("Team", foreign_keys=[home_team_id])
+    away_team = db.relationship("Team", foreign_keys=[away_team_id])
+
 class RulesetFootball(db.Model):
     __tablename__ = 'rulesets_football'
     id = db.Column(db.Integer, primary_key=True)
@@ -680,56 +840,22 @@ class WeeklyStatsFootball(db.Model):
     receiving_2pt = db.Column(db.Integer, default=0)
     passing_2pt = db.Column(db.Integer, default=0)
 
+    FANTASY_WEIGHTS = FOOTBALL_WEIGHTS
+
     def calculate_fantasy_points(self, ruleset: dict):
         points_allowed = self.points_allowed or 0
-        if points_allowed == 0:
-            pa_score = ruleset.get('points_shutout', 0)
-        elif 1 <= points_allowed <= 6:
-            pa_score = ruleset.get('points_1_6_pa', 0)
-        elif 7 <= points_allowed <= 13:
-            pa_score = ruleset.get('points_7_13_pa', 0)
-        elif 14 <= points_allowed <= 20:
-            pa_score = ruleset.get('points_14_20_pa', 0)
-        elif 21 <= points_allowed <= 27:
-            pa_score = ruleset.get('points_21_27_pa', 0)
-        elif 28 <= points_allowed <= 34:
-            pa_score = ruleset.get('points_28_34_pa', 0)
-        else:
-            pa_score = ruleset.get('points_35plus_pa', 0)
-
-        return (
-            self.passing_tds * ruleset.get('points_passtd', 0) +
-            self.passing_yds * ruleset.get('points_passyd', 0) +
-            self.interceptions * ruleset.get('points_int', 0) +
-            self.rushing_tds * ruleset.get('points_rushtd', 0) +
-            self.rushing_yds * ruleset.get('points_rushyd', 0) +
-            self.receiving_tds * ruleset.get('points_rectd', 0) +
-            self.receiving_yds * ruleset.get('points_recyd', 0) +
-            self.receptions * ruleset.get('points_reception', 0) +
-            self.fumbles_lost * ruleset.get('points_fumble', 0) +
-            self.sacks * ruleset.get('points_sack', 0) +
-            self.interceptions_def * ruleset.get('points_int_def', 0) +
-            self.fumbles_recovered * ruleset.get('points_fumble_def', 0) +
-            self.safeties * ruleset.get('points_safety', 0) +
-            self.defensive_tds * ruleset.get('points_def_td', 0) +
-            self.blocked_kicks * ruleset.get('points_block_kick', 0) +
-            pa_score +
-            self.kick_return_tds * ruleset.get('points_kick_return_td', 0) +
-            self.punt_return_tds * ruleset.get('points_punt_return_td', 0) +
-            self.fg_made_0_39 * ruleset.get('points_fg_0_39', 0) +
-            self.fg_made_40_49 * ruleset.get('points_fg_40_49', 0) +
-            self.fg_made_50plus * ruleset.get('points_fg_50plus', 0) +
-            self.fg_missed * ruleset.get('points_fg_miss', 0) +
-            self.xp_made * ruleset.get('points_xp', 0) +
-            self.xp_missed * ruleset.get('points_xp_miss', 0) + 
-            self.rushing_2pt * ruleset.get('points_2pt_rushtd', 0) +
-            self.receiving_2pt * ruleset.get('points_2pt_rectd', 0) +
-            self.passing_2pt * ruleset.get('points_2pt_passtd', 0)
+        bracket = sum(1 for edge in FOOTBALL_PA_EDGES if points_allowed >= edge)
+        pa_score = ruleset.get(FOOTBALL_PA_KEYS[bracket], 0)
+
+        return pa_score + sum(
+            (getattr(self, stat) or 0) * ruleset.get(key, 0) for stat, key in self.FANTASY_WEIGHTS.items()
         )
 
 
 class DailyStatsHockey(db.Model):
     __tablename__ = 'daily_stats_hockey'
+    # the primary key leads with date; scoring looks rows up by player over a date range
+    __table_args__ = (db.Index('ix_daily_stats_hockey_player_id_date', 'player_id', 'date'),)
     date = db.Column(db.Date, nullable=False, primary_key=True)
     player_id = db.Column(db.String(20), db.ForeignKey("players.id"), nullable=False, primary_key=True)
 
@@ -745,23 +871,18 @@ class DailyStatsHockey(db.Model):
     shutouts = db.Column(db.Integer, default=0)
     wins = db.Column(db.Integer, default=0)
 
+    FANTASY_WEIGHTS = HOCKEY_WEIGHTS
+
     def calculate_fantasy_points(self, ruleset: dict):
-        return (
-            self.goals * ruleset.get('points_goal', 0) +
-            self.assists * ruleset.get('points_assist', 0) +
-            self.shots_on_goal * ruleset.get('points_sog', 0) +
-            self.blocks * ruleset.get('points_block', 0) +
-            self.hits * ruleset.get('points_hit', 0) +
-            self.power_play_points * ruleset.get('points_ppp', 0) +
-            self.short_handed_points * ruleset.get('points_shp', 0) +
-            self.saves * ruleset.get('points_save', 0) +
-            self.goals_against * ruleset.get('points_goal_against', 0) +
-            self.shutouts * ruleset.get('points_shutout', 0)
+        return sum(
+            (getattr(self, stat) or 0) * ruleset.get(key, 0) for stat, key in self.FANTASY_WEIGHTS.items()
         )
 
 
 class DailyStatsBasketball(db.Model):
     __tablename__ = 'daily_stats_basketball'
+    # the primary key leads with date; scoring looks rows up by player over a date range
+    __table_args__ = (db.Index('ix_daily_stats_basketball_player_id_date', 'player_id', 'date'),)
     date = db.Column(db.Date, nullable=False, primary_key=True)
     player_id = db.Column(db.String(20), db.ForeignKey("players.id"), nullable=False, primary_key=True)
 
@@ -775,22 +896,18 @@ class DailyStatsBasketball(db.Model):
     double_doubles = db.Column(db.Integer, default=0)
     triple_doubles = db.Column(db.Integer, default=0)
 
+    FANTASY_WEIGHTS = BASKETBALL_WEIGHTS
+
     def calculate_fantasy_points(self, ruleset: dict):
-        return (
-            self.points * ruleset.get('points_point', 0) +
-            self.rebounds * ruleset.get('points_rebound', 0) +
-            self.assists * ruleset.get('points_assist', 0) +
-            self.steals * ruleset.get('points_steal', 0) +
-            self.blocks * ruleset.get('points_block', 0) +
-            self.turnovers * ruleset.get('points_turnover', 0) +
-            self.three_pointers_made * ruleset.get('points_three_pm', 0) +
-            self.double_doubles * ruleset.get('points_double_double', 0) +
-            self.triple_doubles * ruleset.get('points_triple_double', 0)
+        return sum(
+            (getattr(self, stat) or 0) * ruleset.get(key, 0) for stat, key in self.FANTASY_WEIGHTS.items()
         )
 
 
 class DailyStatsBaseball(db.Model):
     __tablename__ = 'daily_stats_baseball'
+    # the primary key leads with date; scoring looks rows up by player over a date range
+    __table_args__ = (db.Index('ix_daily_stats_baseball_player_id_date', 'player_id', 'date'),)
     date = db.Column(db.Date, nullable=False, primary_key=True)
     player_id = db.Column(db.String(20), db.ForeignKey("players.id"), nullable=False, primary_key=True)
 
@@ -809,22 +926,11 @@ class DailyStatsBaseball(db.Model):
     earned_runs = db.Column(db.Integer, default=0)
     pitching_strikeouts = db.Column(db.Integer, default=0)
 
+    FANTASY_WEIGHTS = BASEBALL_WEIGHTS
+
     def calculate_fantasy_points(self, ruleset: dict):
-        return (
-            self.runs * ruleset.get('points_run', 0) +
-            self.hits * ruleset.get('points_hit', 0) +
-            self.home_runs * ruleset.get('points_home_run', 0) +
-            self.rbis * ruleset.get('points_rbi', 0) +
-            self.walks * ruleset.get('points_walk', 0) +
-            self.strikeouts * ruleset.get('points_strikeout', 0) +
-            self.stolen_bases * ruleset.get('points_sb', 0) +
-            self.caught_stealing * ruleset.get('points_cs', 0) +
-            self.wins * ruleset.get('points_win', 0) +
-            self.quality_starts * ruleset.get('points_quality_start', 0) +
-            self.saves * ruleset.get('points_save', 0) +
-            self.innings_pitched * ruleset.get('points_inning_pitched', 0) +
-            self.earned_runs * ruleset.get('points_earned_run', 0) +
-            self.pitching_strikeouts * ruleset.get('points_pitching_strikeout', 0)
+        return sum(
+            (getattr(self, stat) or 0) * ruleset.get(key, 0) for stat, key in self.FANTASY_WEIGHTS.items()
         )
 
 
@@ -837,6 +943,21 @@ class TeamPlayerPerformance(db.Model):
     starting_position = db.Column(db.String(3), default="BEN")
     fantasy_points = db.Column(db.Float, default=0)
 
+# Sports scored from DailyStats* rows: league sport -> (stats model, ruleset model, League ruleset column)
+DAILY_SCORING = {
+    "nhl": (DailyStatsHockey, RulesetHockey, "hockey_ruleset_id"),
+    "nba": (DailyStatsBasketball, RulesetBasketball, "basketball_ruleset_id"),
+    "mlb": (DailyStatsBaseball, RulesetBaseball, "baseball_ruleset_id"),
+}
+
+# Stat tables written by ingestion, per league sport
+STAT_MODELS = {
+    "nhl": DailyStatsHockey,
+    "nba": DailyStatsBasketball,
+    "nfl": WeeklyStatsFootball,
+    "mlb": DailyStatsBaseball,
+}
+
 class PasswordResetCode(db.Model):
     __tablename__ = 'password_reset_codes'
     id = db.Column(db.Integer, primary_key=True)
@@ -847,12 +968,14 @@ class PasswordResetCode(db.Model):
 # Messaging models
 class LeagueChat(db.Model):
     __tablename__ = 'league_chats'
+    __table_args__ = (db.Index('ix_league_chats_league_id', 'league_id'),)
     id = db.Column(db.Integer, primary_key=True)
     league_id = db.Column(db.Integer, db.ForeignKey('leagues.id'), nullable=False)
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
 
 class LeagueChatParticipant(db.Model):
     __tablename__ = 'league_chat_participants'
+    __table_args__ = (db.Index('ix_league_chat_participants_chat_id_user_id', 'chat_id', 'user_id'),)
     id = db.Column(db.Integer, primary_key=True)
     chat_id = db.Column(db.Integer, db.ForeignKey('league_chats.id'), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -860,21 +983,32 @@ class LeagueChatParticipant(db.Model):
 
 class LeagueMessage(db.Model):
     __tablename__ = 'league_messages'
+    __table_args__ = (
+        db.Index('ix_league_messages_chat_id_timestamp', 'chat_id', 'timestamp'),
+        # keyset pagination walks a chat by id
+        db.Index('ix_league_messages_chat_id_id', 'chat_id', 'id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     chat_id = db.Column(db.Integer, db.ForeignKey("league_chats.id"), nullable=False)
     sender_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
     content = db.Column(db.Text, nullable=False)
     timestamp = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
 
-class LeagueMessageRead(db.Model):
-    __tablename__ = 'league_message_reads'
-    id = db.Column(db.Integer, primary_key=True)
-    message_id = db.Column(db.Integer, db.ForeignKey('league_messages.id'), nullable=False)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    read_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+# Read state is a per-(chat, user) watermark: every message with an id up to
+# last_read_message_id has been read.
+class LeagueChatReadState(db.Model):
+    __tablename__ = 'league_chat_read_states'
+    chat_id = db.Column(db.Integer, db.ForeignKey('league_chats.id'), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    last_read_message_id = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
 
 class DirectMessage(db.Model):
     __tablename__ = 'direct_messages'
+    # one index serves both directions of a conversation (two equality probes)
+    __table_args__ = (
+        db.Index('ix_direct_messages_sender_id_receiver_id_timestamp', 'sender_id', 'receiver_id', 'timestamp'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     sender_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     receiver_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -933,6 +1067,10 @@ def refresh_expiring_jwts(response):
         exp_timestamp = get_jwt()["exp"]
         now = datetime.now(timezone.utc)
         target_timestamp = datetime.timestamp(now + timedelta(minutes=30))
+        # 304s and compressed bodies have no JSON to add the token to, and a body
+        # with an ETag must stay byte-for-byte what the ETag describes
+        if response.status_code == 304 or response.content_encoding or response.get_etag()[0]:
+            return response
         if target_timestamp > exp_timestamp:
             access_token = create_access_token(identity=get_jwt_identity())
             data = response.get_json()
@@ -1008,6 +1146,51 @@ def get_current_user():
         "email": user.email
     }), 200
 
+# TTLs (seconds) for the cached ESPN passthroughs: live data turns over quickly,
+# finished games and news barely change
+LIVE_TTL = 15
+SCHEDULED_TTL = 60
+FINAL_TTL = 3600
+NEWS_TTL = 300
+
+# the server runs on eventlet without monkey-patching, so callers waiting on a
+# shared fetch park on a green event and refreshes run as green threads
+espn_cache = ProxyCache(event_factory=socketio.server.eio.create_event, spawn=socketio.start_background_task)
+
+
+def fetch_espn_json(url):
+    resp = http_client.get(url)
+    resp.raise_for_status()
+    return resp.json()
+
+
+def game_state_ttl(states):
+    if "in" in states:
+        return LIVE_TTL
+    if states and all(state == "post" for state in states):
+        return FINAL_TTL
+    return SCHEDULED_TTL
+
+
+def scoreboard_ttl(data):
+    return game_state_ttl([event.get("status", {}).get("type", {}).get("state") for event in data.get("events", [])])
+
+
+def summary_ttl(data):
+    competitions = data.get("header", {}).get("competitions", [])
+    return game_state_ttl([competition.get("status", {}).get("type", {}).get("state") for competition in competitions])
+
+
+def cached_response(entry):
+    """Serve a cached ESPN body with validators so browsers can revalidate with a 304."""
+    response = app.response_class(entry.body, mimetype="application/json")
+    response.set_etag(entry.etag)
+    response.last_modified = entry.last_modified
+    response.cache_control.public = True
+    response.cache_control.max_age = entry.max_age()
+    return response.make_conditional(request)
+
+
 @app.route("/api/scoreboard")
 def get_scoreboard():
     sport_key = request.args.get("sport")
@@ -1022,9 +1205,8 @@ def get_scoreboard():
 
     url = f"https://site.api.espn.com/apis/site/v2/sports/{sport_path}/scoreboard?dates={dates}"
     try:
-        resp = requests.get(url)
-        resp.raise_for_status()
-        return jsonify(resp.json())
+        entry = espn_cache.get(f"scoreboard:{sport_key}:{dates}", lambda: fetch_espn_json(url), scoreboard_ttl)
+        return cached_response(entry)
     except Exception as e:
         print(f"Error fetching scoreboard: {e}")
         return jsonify({"error": f"Failed to fetch scoreboard for {sport_key} on {dates}: {str(e)}"}), 502
@@ -1039,9 +1221,8 @@ def get_news():
 
     url = f"https://site.api.espn.com/apis/site/v2/sports/{sport_path}/news"
     try:
-        resp = requests.get(url)
-        resp.raise_for_status()
-        return jsonify(resp.json())
+        entry = espn_cache.get(f"news:{sport_key}", lambda: fetch_espn_json(url), NEWS_TTL)
+        return cached_response(entry)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
     
@@ -1059,9 +1240,8 @@ def get_game_summary():
 
     url = f"https://site.api.espn.com/apis/site/v2/sports/{sport_path}/summary?event={game_id}"
     try:
-        resp = requests.get(url)
-        resp.raise_for_status()
-        return jsonify(resp.json())
+        entry = espn_cache.get(f"summary:{sport_key}:{game_id}", lambda: fetch_espn_json(url), summary_ttl)
+        return cached_response(entry)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -1486,29 +1666,108 @@ def league_create():
 
     return jsonify({'message' : "League successfully created."}), 201
 
+def parse_flag(value):
+    """None, a JSON boolean or "true"/"false"/"1"/"0"; anything else is a ValueError."""
+    if value is None or isinstance(value, bool):
+        return value
+    flags = {"true": True, "1": True, "false": False, "0": False}
+    if str(value).strip().lower() not in flags:
+        raise ValueError(f"Not a boolean: {value!r}")
+    return flags[str(value).strip().lower()]
+
+LEAGUE_PAGE_SIZE = 24
+MAX_LEAGUE_PAGE_SIZE = 100
+
+def joinable_league_page(user_id, sport=None, name_prefix=None, open_slots=0, membership_locked=None, after_id=None, limit=None):
+    """One page of the league directory for user_id, ordered by name.
+
+    Leagues the user already has a team in are left out. Team counts come from
+    the database, and paging is keyed on (lower(name), id) so a page costs the
+    same at the end of the directory as at the start; after_id is the last
+    league of the previous page. Returns (rows, has_more), where each row is
+    (league, commissioner username, team count).
+    """
+    limit = max(1, min(int(limit or LEAGUE_PAGE_SIZE), MAX_LEAGUE_PAGE_SIZE))
+    name_key = func.lower(League.name)
+    team_count = (
+        select(func.count(Team.id))
+        .where(Team.league_id == League.id)
+        .correlate(League)
+        .scalar_subquery()
+    )
+    user_league_ids = select(Team.league_id).where(Team.owner_id == user_id)
+
+    query = (
+        db.session.query(League, User.username, team_count)
+        .join(User, User.id == League.commissioner_id)
+        .filter(~League.id.in_(user_league_ids))
+    )
+    if sport:
+        query = query.filter(League.sport == sport)
+    if membership_locked:
+        query = query.filter(League.membership_locked.is_(True))
+    elif membership_locked is not None:
+        # the column predates its default, so NULL means unlocked
+        query = query.filter(or_(League.membership_locked.is_(False), League.membership_locked.is_(None)))
+    if open_slots:
+        query = query.filter(team_count <= MAX_TEAMS_PER_LEAGUE - int(open_slots))
+    if name_prefix:
+        prefix = name_prefix.lower()
+        escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        # the range is what an index on lower(name) can seek on; LIKE keeps the match exact
+        query = query.filter(
+            name_key >= prefix,
+            name_key < prefix[:-1] + chr(ord(prefix[-1]) + 1),
+            name_key.like(escaped + "%", escape="\\"),
+        )
+    if after_id is not None:
+        after_name = db.session.query(name_key).filter(League.id == int(after_id)).scalar()
+        if after_name is None:
+            # the cursor's league is gone; restarting at page one would repeat rows
+            raise ValueError(f"Unknown cursor {after_id}")
+        query = query.filter(or_(name_key > after_name, and_(name_key == after_name, League.id > int(after_id))))
+
+    rows = query.order_by(name_key, League.id).limit(limit + 1).all()
+    return rows[:limit], len(rows) > limit
+
 @app.route("/api/league/joinable", methods=["POST"])
 @cross_origin(origin="*")
 @jwt_required()
 def get_joinable_leagues():
     user_id = get_jwt_identity()
+    data = request.get_json(silent=True) or {}
 
-    # Leagues the user already joined
-    user_team_league_ids = db.session.query(Team.league_id).filter_by(owner_id=user_id).subquery()
-
-    # Leagues user is not already in
-    joinable_leagues = League.query.filter(~League.id.in_(user_team_league_ids)).all()
+    try:
+        rows, has_more = joinable_league_page(
+            user_id,
+            sport=data.get("sport"),
+            name_prefix=(data.get("name") or "").strip(),
+            open_slots=int(data.get("open_slots") or 0),
+            membership_locked=parse_flag(data.get("membership_locked")),
+            after_id=data.get("after_id"),
+            limit=data.get("limit"),
+        )
+    except (TypeError, ValueError):
+        return jsonify({"error": "Invalid directory parameters"}), 400
 
     response = [
         {
             "id": league.id,
             "name": league.name,
             "sport": league.sport,
-            "commissioner": User.query.get(league.commissioner_id).username
+            "commissioner": commissioner,
+            "num_teams": num_teams,
+            "open_slots": max(0, MAX_TEAMS_PER_LEAGUE - num_teams),
+            "membership_locked": bool(league.membership_locked)
         }
-        for league in joinable_leagues
+        for league, commissioner, num_teams in rows
     ]
 
-    return jsonify({"leagues": response}), 200
+    return jsonify({
+        "leagues": response,
+        "has_more": has_more,
+        "next_after_id": response[-1]["id"] if has_more else None
+    }), 200
 
 
 @app.route("/api/league/join", methods=["POST"])
@@ -1524,14 +1783,24 @@ def league_join():
         return jsonify({"error" : "Invite code expired."}), 403
     name = data.get("name")
 
-    # Assume maximum 12 teams
-    if Team.query.filter_by(league_id=league_id).count() >= 12:
+    if Team.query.filter_by(league_id=league_id).count() >= MAX_TEAMS_PER_LEAGUE:
         return jsonify({"error" : "This league is full."}), 403
-    
-    owner_id = get_jwt_identity()
-    team = Team(owner_id = owner_id, league_id = league_id, name=name)
-    db.session.add(team)
-    db.session.commit()
+    try:
+        room = draft_room(league_id)
+    except DraftError as e:
+        return jsonify({"error": str(e)}), 404
+
+    # held so the draft cannot open between the check and the new team landing
+    with room.lock:
+        # the snake order is derived from the team list, so it is frozen once picks open
+        if room.started:
+            return jsonify({"error": "The draft has already started."}), 403
+        owner_id = get_jwt_identity()
+        team = Team(owner_id = owner_id, league_id = league_id, name=name)
+        db.session.add(team)
+        db.session.commit()
+        # the draft order is fixed when the room is built; rebuild it with the new team
+        draft_rooms.pop(league_id, None)
     return jsonify({"message" : "League successfully joined."}), 201
 
 @app.route("/api/league/geturl", methods=["POST"])
@@ -1582,19 +1851,25 @@ def get_team():
         return jsonify({"error": "No data provided."}), 400
     
     id = sqids.decode(data.get("code"))[0]
-    roster = TeamPlayer.query.filter_by(team_id=id).all()
+    # team + league in one query, the roster with its players in a second
+    team = Team.query.options(
+        joinedload(Team.league),
+        selectinload(Team.roster).joinedload(TeamPlayer.player)
+    ).filter_by(id=id).first()
+    if team is None:
+        return jsonify({"error": "Team not found."}), 404
+
     roster_list = []
-    for player in roster:
-        player_object = Player.query.filter_by(id=player.player_id).first()
+    for player in team.roster:
+        player_object = player.player
         roster_list.append({"player_id" : player.player_id, 
                             "position" : player.starting_position, 
                             "default_position" : player_object.position, 
                             "team" : player_object.team_name, 
                             "first_name" : player_object.first_name, 
                             "last_name" : player_object.last_name})
-    
-    team = Team.query.filter_by(id=id).first()
-    sport = League.query.filter_by(id=team.league_id).first().sport
+
+    sport = team.league.sport
     return jsonify({"message" : "Team successfully found.", "roster" : roster_list, "team_name" : team.name, "team_wins" : team.wins, "team_losses" : team.losses, "league_id" : team.league_id, "team_id": id, "sport": sport})
 
 
@@ -1627,11 +1902,12 @@ def get_league():
 
     id = sqids.decode(data.get("code"))[0]
     print(data.get("code"), id)
-    team_data = [{"id": team.id, "name": team.name, "league_id": team.league_id, "league_rank" : team.rank, "owner_id": User.query.get(team.owner_id).username, "wins" : team.wins, "losses" : team.losses} for team in Team.query.filter_by(league_id=id).order_by(Team.rank).all()]
-    if League.query.filter_by(id=id).count() == 0:
+    # league, then its teams (by rank) with their owners
+    league = League.query.options(selectinload(League.teams).joinedload(Team.owner)).filter_by(id=id).first()
+    if league is None:
         return jsonify({"error": "League with that id does not exist."}), 400
-    league = League.query.filter_by(id=id).one()
-    league_data = {"id": id, "name" : league.name, "sport" : league.sport, "num_teams" : Team.query.filter_by(league_id=id).count(), "commissioner" : league.commissioner_id}
+    team_data = [{"id": team.id, "name": team.name, "league_id": team.league_id, "league_rank" : team.rank, "owner_id": team.owner.username, "wins" : team.wins, "losses" : team.losses} for team in league.teams]
+    league_data = {"id": id, "name" : league.name, "sport" : league.sport, "num_teams" : len(league.teams), "commissioner" : league.commissioner_id}
     return jsonify({"teams" : team_data, "league": league_data}), 200
 
 @app.route("/api/league/verify_commissioner", methods=["POST"])
@@ -1654,6 +1930,25 @@ def verify_commissioner():
 
     return jsonify({"message": "Authorized"}), 200
 
+PLAYER_PAGE_SIZE = 25
+MAX_PLAYER_PAGE_SIZE = 100
+
+def load_player_catalog(sport):
+    return [
+        {"id": row.id, "first_name": row.first_name, "last_name": row.last_name, "position": row.position, "team_name": row.team_name}
+        for row in db.session.query(Player.id, Player.first_name, Player.last_name, Player.position, Player.team_name).filter(Player.sport == sport)
+    ]
+
+# rebuilt by populate_player_table whenever the catalog changes
+player_search = PlayerSearch(load_player_catalog)
+
+def catalog_index(sport):
+    index = player_search.get(sport)
+    if not index.players:
+        # the catalog may have been filled since the index was built
+        index = player_search.rebuild(sport)
+    return index
+
 @app.route("/api/players/<league>", methods=["GET"])
 @cross_origin(origin="*")
 @jwt_required()
@@ -1661,24 +1956,122 @@ def get_players_by_league(league):
     if league not in ["nfl", "nba", "mlb", "nhl"]:
         return jsonify({"error": "Invalid league"}), 400
     
-    # Make sure players are populated for this league
+    # An empty catalog is filled by the scheduler, never inside the request
     sport = SPORTS.get(league)
-    if Player.query.filter_by(sport=sport).count() == 0:
-        populate_player_table(league)
-    
-    # Get all players for the sport
-    players = Player.query.filter_by(sport=sport).all()
-    
-    player_list = [{
-        "id": player.id,
-        "first_name": player.first_name,
-        "last_name": player.last_name,
-        "position": player.position,
-        "team_name": player.team_name
-    } for player in players]
-    
-    return jsonify({"players": player_list}), 200
+    index = catalog_index(sport)
+    if not index.players:
+        request_catalog_refresh(league)
+        return jsonify({"players": [], "message": "Player catalog is being refreshed. Try again shortly."}), 202
+
+    # prebuilt bytes, rebuilt only when populate_player_table changes the catalog
+    snapshot = index.snapshot
+    gzipped = request.accept_encodings.quality("gzip") > 0
+    response = app.response_class(snapshot.gzip_body if gzipped else snapshot.body, mimetype="application/json")
+    if gzipped:
+        response.headers["Content-Encoding"] = "gzip"
+    response.vary.add("Accept-Encoding")
+    # each encoding is its own representation, so it gets its own validator
+    response.set_etag(f"{snapshot.version}-gzip" if gzipped else snapshot.version)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
+@app.route("/api/players/<league>/search", methods=["GET"])
+@cross_origin(origin="*")
+@jwt_required()
+def search_players(league):
+    sport = SPORTS.get(league)
+    if not sport:
+        return jsonify({"error": "Invalid league"}), 400
 
+    try:
+        limit = max(1, min(int(request.args.get("limit") or PLAYER_PAGE_SIZE), MAX_PLAYER_PAGE_SIZE))
+        offset = max(0, int(request.args.get("offset") or 0))
+    except ValueError:
+        return jsonify({"error": "Invalid pagination parameters"}), 400
+
+    index = catalog_index(sport)
+    if not index.players:
+        request_catalog_refresh(league)
+        return jsonify({"players": [], "total": 0, "has_more": False, "message": "Player catalog is being refreshed. Try again shortly."}), 202
+
+    players, total = index.search(
+        request.args.get("q", ""),
+        position=request.args.get("position") or None,
+        team=request.args.get("team") or None,
+        offset=offset,
+        limit=limit
+    )
+    return jsonify({"players": players, "total": total, "has_more": offset + len(players) < total}), 200
+
+
+draft_rooms = {}
+draft_rooms_lock = threading.Lock()
+
+def draft_room(league_id):
+    """The league's in-memory DraftRoom, rebuilt from its persisted picks if needed."""
+    room = draft_rooms.get(league_id)
+    if room is not None:
+        return room
+    with draft_rooms_lock:
+        room = draft_rooms.get(league_id)
+        if room is None:
+            league = League.query.options(selectinload(League.teams)).filter_by(id=league_id).first()
+            if league is None:
+                raise DraftError("League not found.")
+            sport = SPORTS[league.sport]
+            teams = sorted(league.teams, key=lambda team: (team.rank or 0, team.id))
+            # replayed in the order they were made; rows without a pick number go last
+            picks = db.session.query(TeamPlayer.team_id, TeamPlayer.player_id, TeamPlayer.starting_position).filter(
+                TeamPlayer.league_id == league_id
+            ).order_by(TeamPlayer.draft_pick.is_(None), TeamPlayer.draft_pick, TeamPlayer.player_id).all()
+            # the schedule is built exactly when a draft ends, so its existence is the
+            # persisted "draft over" flag; roster counts alone drift with adds and drops
+            finished = db.session.query(Matchup.id).filter_by(league_id=league_id).first() is not None
+            room = draft_rooms[league_id] = DraftRoom(
+                league_id, league.sport, [team.id for team in teams], POSITION_LIMITS[sport], FLEX_POSITIONS[sport],
+                DRAFT_ROUNDS[league.sport], picks,
+                owners={team.id: team.owner_id for team in teams}, commissioner_id=league.commissioner_id,
+                start_time=league.draft_time, finished=finished
+            )
+    return room
+
+def make_draft_pick(league_id, user_id, player_id):
+    """Validate and persist one pick; returns (pick, room). Raises DraftError."""
+    room = draft_room(league_id)
+    with room.lock:
+        team_id = room.on_clock()
+        if room.started and not room.complete and not room.can_pick(user_id):
+            raise DraftError("It is not your turn to pick.")
+        player = catalog_index(SPORTS[room.sport]).by_id.get(player_id)
+        if player is None:
+            raise DraftError("Unknown player.")
+        slot = room.validate(team_id, player_id, player["position"])
+
+        try:
+            db.session.add(TeamPlayer(player_id=player_id, league_id=league_id, team_id=team_id, starting_position=slot, draft_pick=room.pick_number))
+            db.session.commit()
+        except Exception:
+            # nothing was recorded in the room, so it still matches the database
+            db.session.rollback()
+            raise
+        pick = room.record(team_id, player_id, slot)
+    return dict(pick, player=player), room
+
+def schedule_league_matchups(league_id):
+    """Create the league's season schedule once its rosters are set; a no-op if it exists."""
+    if Matchup.query.filter_by(league_id=league_id).first() is not None:
+        return
+    league = League.query.options(selectinload(League.teams)).filter_by(id=league_id).one()
+    team_ids = [team.id for team in league.teams]
+    matchups = create_matchups({"teams": team_ids, "sport": league.sport})
+    db.session.execute(insert(Matchup), [
+        {"league_id": league_id, "week_num": week_num, "away_team_id": matchup.get("away"), "home_team_id": matchup.get("home")}
+        for week_num, weekly_matchups in matchups.items()
+        for matchup in weekly_matchups
+    ])
+    db.session.commit()
 
 @app.route("/api/draft/finalize", methods=["POST"])
 @cross_origin(origin="*")
@@ -1689,45 +2082,20 @@ def finalize_draft():
         return jsonify({"error": "No data provided"}), 400
     
     league_id = data.get("leagueId")
-    teams = data.get("teams")
-    
-    if not league_id or not teams:
+    if not league_id:
         return jsonify({"error": "Missing required fields"}), 400
-    
-    try:
-        # Clear any existing team players for this league
-        TeamPlayer.query.filter_by(league_id=league_id).delete()
-        
-        # Add new player assignments from the draft
-        for team_data in teams:
-            team_id = team_data.get("teamId")
-            players = team_data.get("players")
-            
-            for player in players:
-                player_id = player.get("id")
-                
-                # Create a new team player record
-                team_player = TeamPlayer(
-                    player_id=player_id,
-                    league_id=league_id,
-                    team_id=team_id,
-                    starting_position="BEN"  # Default all to bench
-                )
-                db.session.add(team_player)
-        
-        db.session.commit()
 
-        team_ids = [team_data.get("teamId") for team_data in teams]
-        sport = data.get("sport")
-        matchups = create_matchups({"teams": team_ids, "sport": sport})
-
-        # adding matchups to database
-        for week_num, weekly_matchups in matchups.items():
-            for matchup in weekly_matchups:
-                matchup_item = Matchup(league_id = league_id, week_num=week_num, away_team_id = matchup.get("away"), home_team_id = matchup.get("home"))
-                db.session.add(matchup_item)
-        db.session.commit()
+    league = League.query.filter_by(id=league_id).first()
+    if league is None:
+        return jsonify({"error": "League not found"}), 404
+    if str(league.commissioner_id) != str(get_jwt_identity()):
+        return jsonify({"error": "Only the commissioner can end the draft"}), 403
 
+    try:
+        # rosters were written pick by pick; ending the draft only builds the schedule
+        schedule_league_matchups(league_id)
+        draft_rooms.pop(league_id, None)
+        socketio.emit("draft_complete", {"league_id": league_id}, room=f"draft_{league_id}")
         return jsonify({"message": "Draft finalized successfully"}), 200
     
     except Exception as e:
@@ -1749,12 +2117,14 @@ def get_league_matchups():
         return jsonify({"error": "League ID is required"}), 400
     
     try:
-        matchups = Matchup.query.filter_by(league_id = league_id).all()
+        matchups = Matchup.query.options(
+            joinedload(Matchup.home_team), joinedload(Matchup.away_team)
+        ).filter_by(league_id = league_id).all()
         formatted_matchups = [{"id": matchup.id, 
                                "week": matchup.week_num, 
-                               "away_team" : Team.query.filter_by(id=matchup.away_team_id).first().name, 
+                               "away_team" : matchup.away_team.name, 
                                "away_team_score": matchup.away_team_score,
-                               "home_team" : Team.query.filter_by(id=matchup.home_team_id).first().name,
+                               "home_team" : matchup.home_team.name,
                                "home_team_score": matchup.home_team_score} for matchup in matchups]
 
         return jsonify({"matchups": formatted_matchups}), 200
@@ -2055,6 +2425,122 @@ def handle_join_chat(data):
         emit("error", {"message": "Unauthorized"})
         disconnect()
 
+@socketio.on("join_matchup")
+def handle_join_matchup(data):
+    try:
+        verify_jwt_in_request(locations=["query_string"])
+
+        decoded = sqids.decode(data.get("matchup_code") or "")
+        if not decoded:
+            emit("error", {"message": "Invalid matchup_code"})
+            return
+
+        join_room(f"matchup_{decoded[0]}")
+        emit("success", {"message": f"Joined matchup {data.get('matchup_code')}"})
+    except NoAuthorizationError:
+        emit("error", {"message": "Unauthorized"})
+        disconnect()
+
+@socketio.on("leave_matchup")
+def handle_leave_matchup(data):
+    decoded = sqids.decode(data.get("matchup_code") or "")
+    if decoded:
+        leave_room(f"matchup_{decoded[0]}")
+
+@socketio.on("join_draft")
+def handle_join_draft(data):
+    try:
+        verify_jwt_in_request(locations=["query_string"])
+        user_id = get_jwt_identity()
+
+        league_id = data.get("league_id")
+        league = League.query.filter_by(id=league_id).first() if league_id else None
+        if league is None:
+            emit("error", {"message": "Invalid league_id"})
+            return
+        is_member = Team.query.filter_by(league_id=league_id, owner_id=user_id).first() is not None
+        if not is_member and str(league.commissioner_id) != str(user_id):
+            emit("error", {"message": "Not a member of this league"})
+            return
+
+        join_room(f"draft_{league_id}")
+        emit("draft_state", draft_room(league_id).state())
+    except NoAuthorizationError:
+        emit("error", {"message": "Unauthorized"})
+        disconnect()
+
+@socketio.on("leave_draft")
+def handle_leave_draft(data):
+    if data.get("league_id"):
+        leave_room(f"draft_{data.get('league_id')}")
+
+@socketio.on("start_draft")
+def handle_start_draft(data):
+    try:
+        verify_jwt_in_request(locations=["query_string"])
+        user_id = get_jwt_identity()
+
+        league_id = data.get("league_id")
+        league = League.query.filter_by(id=league_id).first() if league_id else None
+        if league is None:
+            emit("error", {"message": "Invalid league_id"})
+            return
+        if str(league.commissioner_id) != str(user_id):
+            emit("draft_error", {"message": "Only the commissioner can start the draft."})
+            return
+
+        room = draft_room(league_id)
+        with room.lock:
+            scheduled, now = room.start_time, datetime.now()
+            room.start(now)
+            league.draft_time = now
+            try:
+                db.session.commit()
+            except Exception:
+                room.start_time = scheduled
+                raise
+        emit("draft_state", room.state(), room=f"draft_{league_id}")
+    except DraftError as e:
+        emit("draft_error", {"message": str(e)})
+    except NoAuthorizationError:
+        emit("error", {"message": "Unauthorized"})
+        disconnect()
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error starting draft: {e}")
+        emit("draft_error", {"message": "Failed to start the draft. Try again."})
+
+@socketio.on("draft_pick")
+def handle_draft_pick(data):
+    try:
+        verify_jwt_in_request(locations=["query_string"])
+        user_id = get_jwt_identity()
+
+        league_id = data.get("league_id")
+        player_id = data.get("player_id")
+        if not league_id or not player_id:
+            emit("error", {"message": "Invalid pick data"})
+            return
+
+        pick, room = make_draft_pick(league_id, user_id, player_id)
+        emit("draft_pick", dict(pick, league_id=room.league_id, pick_number=room.pick_number, on_clock=room.on_clock()), room=f"draft_{league_id}")
+        if room.complete:
+            schedule_league_matchups(league_id)
+            draft_rooms.pop(league_id, None)
+            emit("draft_complete", {"league_id": league_id}, room=f"draft_{league_id}")
+    except DraftError as e:
+        emit("draft_error", {"message": str(e)})
+    except IntegrityError:
+        # a pick for the same player persisted by another server process
+        emit("draft_error", {"message": "That player has already been drafted."})
+    except NoAuthorizationError:
+        emit("error", {"message": "Unauthorized"})
+        disconnect()
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error saving draft pick: {e}")
+        emit("draft_error", {"message": "Failed to save the pick. Try again."})
+
 @socketio.on("send_message")
 def handle_send_message(data):
     try:
@@ -2143,6 +2629,35 @@ def on_connect():
         print("Socket connect failed:", e)
         disconnect()
 
+CHAT_PAGE_SIZE = 50
+MAX_CHAT_PAGE_SIZE = 200
+
+
+def league_read_watermark(chat_id, user_id):
+    """Id of the newest message user_id has read in the chat (0 if none)."""
+    return db.session.query(LeagueChatReadState.last_read_message_id).filter_by(
+        chat_id=chat_id, user_id=user_id
+    ).scalar() or 0
+
+
+def league_message_page(chat_id, before_id=None, after_id=None, limit=None):
+    """One page of a league chat in chronological order, keyed on message id.
+
+    Without a cursor this is the latest page; before_id pages back through
+    history and after_id forward (e.g. to catch up after a reconnect). Returns
+    (messages, has_more), where has_more says whether the page was cut short.
+    """
+    limit = max(1, min(int(limit or CHAT_PAGE_SIZE), MAX_CHAT_PAGE_SIZE))
+    query = LeagueMessage.query.filter(LeagueMessage.chat_id == chat_id)
+    if after_id is not None:
+        messages = query.filter(LeagueMessage.id > int(after_id)).order_by(LeagueMessage.id.asc()).limit(limit + 1).all()
+        return messages[:limit], len(messages) > limit
+
+    if before_id is not None:
+        query = query.filter(LeagueMessage.id < int(before_id))
+    messages = query.order_by(LeagueMessage.id.desc()).limit(limit + 1).all()
+    return messages[:limit][::-1], len(messages) > limit
+
 @app.route("/api/chat/league/init", methods=["POST"])
 @cross_origin(origin='*')
 @jwt_required()
@@ -2192,10 +2707,11 @@ def fetch_league_messages():
     if not chat_id:
         return jsonify({"error": "Chat ID required"}), 400
 
-    messages = LeagueMessage.query.filter_by(chat_id=chat_id).order_by(LeagueMessage.timestamp).all()
-    read_ids = set(
-        r.message_id for r in LeagueMessageRead.query.filter_by(user_id=user_id).filter(LeagueMessageRead.message_id.in_([m.id for m in messages])).all()
-    )
+    try:
+        messages, _ = league_message_page(chat_id, data.get("before_id"), data.get("after_id"), data.get("limit"))
+    except (TypeError, ValueError):
+        return jsonify({"error": "Invalid pagination parameters"}), 400
+    watermark = league_read_watermark(chat_id, user_id)
 
     return jsonify([
         {
@@ -2203,7 +2719,7 @@ def fetch_league_messages():
             "sender_id": msg.sender_id,
             "content": msg.content,
             "timestamp": msg.timestamp.astimezone(timezone.utc).isoformat(),
-            "read": msg.id in read_ids
+            "read": msg.id <= watermark
         } for msg in messages
     ]), 200
 
@@ -2217,59 +2733,62 @@ def mark_league_messages_read():
     if not chat_id:
         return jsonify({"error": "Chat ID required"}), 400
 
-    # Get all unread messages for this chat
-    messages = LeagueMessage.query.filter_by(chat_id=chat_id).all()
-    message_ids = [msg.id for msg in messages]
-
-    # Find which messages are already marked as read
-    already_read = set(
-        r.message_id for r in LeagueMessageRead.query.filter_by(user_id=user_id).filter(LeagueMessageRead.message_id.in_(message_ids)).all()
-    )
-
-    # Insert read records for unread messages
-    for msg_id in message_ids:
-        if msg_id not in already_read:
-            db.session.add(LeagueMessageRead(message_id=msg_id, user_id=user_id))
-    db.session.commit()
+    # Move the watermark up to the newest message in the chat
+    latest_id = db.session.query(func.max(LeagueMessage.id)).filter(LeagueMessage.chat_id == chat_id).scalar()
+    if latest_id is not None:
+        bulk_upsert(
+            LeagueChatReadState,
+            [{"chat_id": chat_id, "user_id": user_id, "last_read_message_id": latest_id, "updated_at": datetime.now(timezone.utc)}],
+            index_elements=["chat_id", "user_id"],
+            update_columns=["last_read_message_id", "updated_at"],
+            increasing_columns=["last_read_message_id"]
+        )
+        db.session.commit()
     return jsonify({"message": "Messages marked as read"}), 200
 
 @app.route("/api/chat/league/summary", methods=["GET"])
 @cross_origin(origin='*')
 @jwt_required()
 def league_chat_summary():
+    """Latest message and unread count for every league chat the user is in, in one query."""
     user_id = get_jwt_identity()
-    teams = Team.query.filter_by(owner_id=user_id).all()
-    league_ids = [team.league_id for team in teams]
-    result = []
-    for league_id in league_ids:
-        league = League.query.get(league_id)
-        chat = LeagueChat.query.filter_by(league_id=league_id).first()
-        if not chat:
-            continue
-        messages = LeagueMessage.query.filter_by(chat_id=chat.id).order_by(LeagueMessage.timestamp.asc()).all()
-        if not messages:
-            continue
-        last_msg = messages[-1]
-        # Unread count: messages not in LeagueMessageRead for this user
-        unread_count = LeagueMessage.query.filter(
-            LeagueMessage.chat_id == chat.id,
-            ~LeagueMessage.id.in_(
-                db.session.query(LeagueMessageRead.message_id).filter_by(user_id=user_id)
-            ),
-            LeagueMessage.sender_id != user_id  # Don't count your own messages as unread
-        ).count()
-        result.append({
-            "league_id": league_id,
-            "league_name": league.name,
-            "chat_id": chat.id, 
-            "latestMessage": last_msg.content,
-            "latestMeta": {
-                "sender_id": last_msg.sender_id,
-                "timestamp": last_msg.timestamp.astimezone(timezone.utc).isoformat()
-            },
-            "unreadCount": unread_count
-        })
-    return jsonify(result)
+
+    latest_message = aliased(LeagueMessage)
+    unread_message = aliased(LeagueMessage)
+    # a league's chat is its first one, as everywhere else
+    chat_id = select(func.min(LeagueChat.id)).where(LeagueChat.league_id == League.id).correlate(League).scalar_subquery()
+    latest_id = select(func.max(LeagueMessage.id)).where(LeagueMessage.chat_id == LeagueChat.id).correlate(LeagueChat).scalar_subquery()
+    unread_count = select(func.count(unread_message.id)).where(
+        unread_message.chat_id == LeagueChat.id,
+        unread_message.id > func.coalesce(LeagueChatReadState.last_read_message_id, 0),
+        unread_message.sender_id != user_id  # Don't count your own messages as unread
+    ).correlate(LeagueChat, LeagueChatReadState).scalar_subquery()
+
+    rows = db.session.query(
+        League.id, League.name, LeagueChat.id.label("chat_id"),
+        latest_message.content, latest_message.sender_id, latest_message.timestamp,
+        unread_count.label("unread_count")
+    ).select_from(Team).join(
+        League, League.id == Team.league_id
+    ).join(
+        LeagueChat, LeagueChat.id == chat_id
+    ).join(
+        latest_message, latest_message.id == latest_id
+    ).outerjoin(
+        LeagueChatReadState, and_(LeagueChatReadState.chat_id == LeagueChat.id, LeagueChatReadState.user_id == user_id)
+    ).filter(Team.owner_id == user_id).order_by(Team.id).all()
+
+    return jsonify([{
+        "league_id": row.id,
+        "league_name": row.name,
+        "chat_id": row.chat_id,
+        "latestMessage": row.content,
+        "latestMeta": {
+            "sender_id": row.sender_id,
+            "timestamp": row.timestamp.astimezone(timezone.utc).isoformat()
+        },
+        "unreadCount": row.unread_count
+    } for row in rows])
 
 @app.route("/api/league/<int:league_id>/messages", methods=["GET"])
 @jwt_required()
@@ -2282,18 +2801,22 @@ def get_league_messages(league_id):
         db.session.add(league_chat)
         db.session.commit()
 
-    # Now fetch messages using the chat_id
-    messages = LeagueMessage.query.filter_by(
-        chat_id=league_chat.id
-    ).order_by(LeagueMessage.timestamp.asc()).all()  
-    
+    # Now fetch one page of messages using the chat_id
+    try:
+        messages, has_more = league_message_page(
+            league_chat.id, request.args.get("before_id"), request.args.get("after_id"), request.args.get("limit")
+        )
+    except (TypeError, ValueError):
+        return jsonify({"error": "Invalid pagination parameters"}), 400
+
     return jsonify({
         "messages": [{
             "id": msg.id,
             "sender_id": msg.sender_id,
             "content": msg.content,
             "timestamp": msg.timestamp.astimezone(timezone.utc).isoformat()
-        } for msg in messages]
+        } for msg in messages],
+        "has_more": has_more
     })
 
 @app.route("/api/chat/direct/send", methods=["POST"])
@@ -2363,32 +2886,65 @@ def mark_direct_messages_read():
     return jsonify({"message": "Messages marked as read"}), 200
 
 # Should populate the player table with all eligible players.
+# Diffs the ESPN roster against the existing rows in memory, then writes one bulk
+# insert for new players and one bulk update for changed ones.
 def populate_player_table(league : str):
     sport = SPORTS.get(league)
     if not sport:
         raise Exception("Invalid league specified.")
 
     player_data = return_all_player_details(sport, league)
-    print(player_data)
+    catalog = {}
     for player in player_data:
-        if Player.query.filter_by(id=player.get('id')).count() == 0:
-            new_player = Player(id=player.get('id'), position=player.get('position'), team_name=player.get('team'), last_name=player.get('last_name'), first_name=player.get('first_name'), sport=sport)
-            db.session.add(new_player)
-        else:
-            existing_player = Player.query.filter_by(id=player.get('id')).first()
-            new_player = Player(id=player.get('id'), position=player.get('position'), team_name=player.get('team'), last_name=player.get('last_name'), first_name=player.get('first_name'), sport=sport)
-            existing_player.position = new_player.position
-            existing_player.team_name = new_player.team_name
-            existing_player.last_name = new_player.last_name
-            existing_player.first_name = new_player.first_name
-            existing_player.sport = new_player.sport
-        
+        catalog[player.get('id')] = {
+            "id": player.get('id'),
+            "sport": sport,
+            "position": player.get('position'),
+            "team_name": player.get('team'),
+            "last_name": player.get('last_name'),
+            "first_name": player.get('first_name')
+        }
+
+    fields = ["sport", "position", "team_name", "last_name", "first_name"]
+    existing = {
+        row.id: row
+        for row in db.session.query(Player.id, *[getattr(Player, field) for field in fields]).filter(Player.sport == sport)
+    }
+
+    added, changed = [], []
+    for player_id, player in catalog.items():
+        current = existing.get(player_id)
+        if current is None:
+            added.append(player)
+        elif any(getattr(current, field) != player[field] for field in fields):
+            changed.append(player)
+
+    if added:
+        db.session.execute(insert(Player), added)
+    if changed:
+        db.session.execute(update(Player), changed)
     db.session.commit()
+    if added or changed:
+        player_search.rebuild(sport)
+
+    counts = {"added": len(added), "changed": len(changed), "unchanged": len(catalog) - len(added) - len(changed)}
+    print(f"{league.upper()} player sync: {counts['added']} added, {counts['changed']} changed, {counts['unchanged']} unchanged")
+    return counts
+
+def upgrade_database():
+    """Bring the database up to the current schema.
+
+    create_all only creates missing tables, so columns and indexes added to
+    existing ones come from the migrations. Those are guarded to skip what is
+    already there, which lets a database create_all has just built pass through.
+    """
+    db.create_all()
+    upgrade()
+
 
 if __name__ == '__main__':
-    # create_all does not update tables if they are already in the database, so this should be here for first run
+    # deploys only run `python app.py`, so migrations are applied here on every start
     sleep(2)
     with app.app_context():
-                
-        db.create_all()
+        upgrade_database()
     socketio.run(app, host='0.0.0.0', port=5000)
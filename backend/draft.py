@@ -0,0 +1,145 @@
+import math
+import threading
+from collections import defaultdict
+from datetime import datetime
+
+# Server-side draft engine. A DraftRoom holds one league's draft in memory:
+# the pick order, which players are gone and how many of each roster slot
+# every team has filled, so validating a pick is a handful of dict lookups.
+# Persisting picks and broadcasting them is left to the caller.
+
+BENCH = "BEN"
+
+
+class DraftError(Exception):
+    pass
+
+
+class DraftRoom:
+    def __init__(self, league_id, sport, team_ids, slot_limits, flex_positions, rounds, picks=(), owners=None, commissioner_id=None, start_time=None, finished=False):
+        """
+        team_ids is the first-round order; later rounds snake. slot_limits maps
+        starting slot -> count (POSITION_LIMITS[sport]) and flex_positions maps a
+        slot to the extra positions it accepts. Whatever of `rounds` roster spots
+        the starting slots don't use is bench. picks are (team_id, player_id, slot)
+        already persisted, for rebuilding a room after a restart. owners maps
+        team_id -> user id; the commissioner may pick for any team. Picks open at
+        start_time (the league's draft_time), or once the commissioner calls
+        start(). finished marks a draft that was ended for good, whatever the
+        rosters look like now (they change with every add and drop once the
+        season starts).
+        """
+        self.league_id = league_id
+        self.sport = sport
+        self.order = list(team_ids)
+        self.rounds = rounds
+        self.limits = dict(slot_limits, **{BENCH: max(0, rounds - sum(slot_limits.values()))})
+        self.flex_positions = flex_positions
+        self.owners = owners or {}
+        self.commissioner_id = commissioner_id
+        self.start_time = start_time
+        self.finished = finished
+        self.lock = threading.Lock()
+
+        self.taken = {}
+        self.filled = {team_id: defaultdict(int) for team_id in self.order}
+        self.picks = []
+        self._slot_options = {}
+        for team_id, player_id, slot in picks:
+            # rows left behind by a team that is no longer in the league
+            if team_id not in self.filled:
+                continue
+            self.record(team_id, player_id, slot if slot in self.limits else BENCH)
+
+    @property
+    def pick_number(self):
+        return len(self.picks) + 1
+
+    @property
+    def started(self):
+        # a league without teams has nobody to pick yet; once a pick is made the
+        # draft counts as started whatever start_time says, so the order is frozen
+        if not self.order:
+            return False
+        return bool(self.picks) or (self.start_time is not None and self.start_time <= datetime.now())
+
+    def start(self, when):
+        """Open the draft at `when` (normally now); raises DraftError if it is already open."""
+        if self.started:
+            raise DraftError("The draft has already started.")
+        if not self.order:
+            raise DraftError("The league has no teams yet.")
+        self.start_time = when
+
+    @property
+    def complete(self):
+        return self.finished or (self.started and len(self.picks) >= self.rounds * len(self.order))
+
+    def on_clock(self):
+        """Team id making the next pick, or None once the draft is over."""
+        if self.complete or not self.started:
+            return None
+        draft_round, index = divmod(len(self.picks), len(self.order))
+        return self.order[-1 - index] if draft_round % 2 else self.order[index]
+
+    def can_pick(self, user_id):
+        """Whether user_id may make the current pick (ids compared as strings, as JWT identities vary)."""
+        team_id = self.on_clock()
+        return team_id is not None and str(user_id) in (str(self.owners.get(team_id)), str(self.commissioner_id))
+
+    def slot_options(self, position):
+        # exact slot first, then flex slots, then the bench
+        if position not in self._slot_options:
+            slots = [position] if position in self.limits and position != BENCH else []
+            slots += [slot for slot, positions in self.flex_positions.items() if position in positions and slot != position]
+            self._slot_options[position] = slots + [BENCH]
+        return self._slot_options[position]
+
+    def open_slot(self, team_id, position):
+        filled = self.filled[team_id]
+        for slot in self.slot_options(position):
+            if filled[slot] < self.limits.get(slot, 0):
+                return slot
+        return None
+
+    def validate(self, team_id, player_id, position):
+        """Return the roster slot the pick would fill, or raise DraftError."""
+        if self.complete:
+            raise DraftError("The draft is over.")
+        if not self.started:
+            raise DraftError("The draft has not started.")
+        if team_id != self.on_clock():
+            raise DraftError("It is not this team's turn to pick.")
+        if player_id in self.taken:
+            raise DraftError("That player has already been drafted.")
+        slot = self.open_slot(team_id, position)
+        if slot is None:
+            raise DraftError(f"No open roster spot for a {position}.")
+        return slot
+
+    def record(self, team_id, player_id, slot):
+        pick = {
+            "pick": self.pick_number,
+            "round": (len(self.picks) // len(self.order)) + 1,
+            "team_id": team_id,
+            "player_id": player_id,
+            "slot": slot,
+        }
+        self.taken[player_id] = team_id
+        self.filled[team_id][slot] += 1
+        self.picks.append(pick)
+        return pick
+
+    def state(self):
+        return {
+            "league_id": self.league_id,
+            "order": self.order,
+            "rounds": self.rounds,
+            "pick_number": self.pick_number,
+            "on_clock": self.on_clock(),
+            "started": self.started,
+            # seconds until a scheduled start, so clients can ask again when it opens
+            "starts_in": math.ceil((self.start_time - datetime.now()).total_seconds()) if self.start_time and not self.started else None,
+            "complete": self.complete,
+            "picks": self.picks,
+        }
@@ -0,0 +1,124 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+
+# Shared HTTP client for every ESPN call. One pooled requests.Session keeps
+# connections (and TLS sessions) alive between fetches, every request has a
+# connect and read timeout, and transient failures are retried with jittered
+# backoff out of a retry budget shared by the whole process.
+
+CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3.05"))
+READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "15"))
+MAX_CONNECTIONS_PER_HOST = int(os.getenv("HTTP_MAX_CONNECTIONS_PER_HOST", "20"))
+MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+BACKOFF_BASE = 0.25
+BACKOFF_CAP = 5.0
+
+
+class RetryBudget:
+    """Token bucket limiting retries to a fraction of overall traffic.
+
+    Every first attempt deposits `ratio` tokens and every retry spends one, so when
+    ESPN is down the process stops multiplying its own load instead of retrying
+    each request MAX_RETRIES times.
+    """
+
+    def __init__(self, ratio=0.2, initial=10, max_tokens=100):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self._tokens = initial
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        with self._lock:
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def withdraw(self):
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+retry_budget = RetryBudget()
+
+session = requests.Session()
+adapter = HTTPAdapter(pool_connections=16, pool_maxsize=MAX_CONNECTIONS_PER_HOST, max_retries=0)
+session.mount("https://", adapter)
+session.mount("http://", adapter)
+
+host_slots = {}
+host_slots_lock = threading.Lock()
+
+
+def host_slot(url):
+    host = urlsplit(url).netloc
+    with host_slots_lock:
+        if host not in host_slots:
+            host_slots[host] = threading.BoundedSemaphore(MAX_CONNECTIONS_PER_HOST)
+        return host_slots[host]
+
+
+def backoff_delay(attempt):
+    # "full jitter": spreads retries from many callers instead of synchronizing them
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+
+def get(url, headers=None, timeout=None, **kwargs):
+    """requests.get() replacement; returns the final requests.Response."""
+    retry_budget.deposit()
+    attempt = 0
+    while True:
+        try:
+            with host_slot(url):
+                response = session.get(url, headers=headers, timeout=timeout or (CONNECT_TIMEOUT, READ_TIMEOUT), **kwargs)
+            if response.status_code not in RETRY_STATUSES:
+                return response
+            error = None
+        except (requests.ConnectionError, requests.Timeout) as e:
+            error = e
+
+        attempt += 1
+        if attempt > MAX_RETRIES or not retry_budget.withdraw():
+            if error is not None:
+                raise error
+            return response
+        time.sleep(backoff_delay(attempt))
+
+
+def async_session(limit):
+    """aiohttp session with the same timeouts and per-host cap; open it inside a running loop."""
+    connector = aiohttp.TCPConnector(limit=limit, limit_per_host=min(limit, MAX_CONNECTIONS_PER_HOST))
+    timeout = aiohttp.ClientTimeout(sock_connect=CONNECT_TIMEOUT, sock_read=READ_TIMEOUT)
+    return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+
+async def async_get(client, url, headers=None):
+    """GET on an aiohttp session under the shared retry policy; returns (status, text, headers)."""
+    retry_budget.deposit()
+    attempt = 0
+    while True:
+        try:
+            async with client.get(url, headers=headers) as response:
+                status, text, resp_headers = response.status, await response.text(), response.headers
+            if status not in RETRY_STATUSES:
+                return status, text, resp_headers
+            error = None
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+            error = e
+
+        attempt += 1
+        if attempt > MAX_RETRIES or not retry_budget.withdraw():
+            if error is not None:
+                raise error
+            return status, text, resp_headers
+        await asyncio.sleep(backoff_delay(attempt))
@@ -0,0 +1,49 @@
+"""add indexes for scoring and chat hot paths
+
+Revision ID: 3f9a1c2b7d41
+Revises:
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9a1c2b7d41'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+# (index name, table, columns) -- mirrors the __table_args__ in app.py
+INDEXES = [
+    ('ix_teams_owner_id', 'teams', ['owner_id']),
+    ('ix_teams_league_id', 'teams', ['league_id']),
+    ('ix_team_players_team_id', 'team_players', ['team_id']),
+    ('ix_matchups_league_id_week_num', 'matchups', ['league_id', 'week_num']),
+    ('ix_matchups_home_team_id', 'matchups', ['home_team_id']),
+    ('ix_matchups_away_team_id', 'matchups', ['away_team_id']),
+    ('ix_daily_stats_hockey_player_id_date', 'daily_stats_hockey', ['player_id', 'date']),
+    ('ix_daily_stats_basketball_player_id_date', 'daily_stats_basketball', ['player_id', 'date']),
+    ('ix_daily_stats_baseball_player_id_date', 'daily_stats_baseball', ['player_id', 'date']),
+    ('ix_league_chats_league_id', 'league_chats', ['league_id']),
+    ('ix_league_chat_participants_chat_id_user_id', 'league_chat_participants', ['chat_id', 'user_id']),
+    ('ix_league_messages_chat_id_timestamp', 'league_messages', ['chat_id', 'timestamp']),
+    ('ix_league_message_reads_user_id_message_id', 'league_message_reads', ['user_id', 'message_id']),
+    ('ix_direct_messages_sender_id_receiver_id_timestamp', 'direct_messages', ['sender_id', 'receiver_id', 'timestamp']),
+]
+
+
+def upgrade():
+    # the tables themselves are created by db.create_all() on first start, and a
+    # database created after this revision already has the indexes
+    tables = set(sa.inspect(op.get_bind()).get_table_names())
+    for name, table, columns in INDEXES:
+        if table in tables:
+            op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade():
+    for name, table, columns in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
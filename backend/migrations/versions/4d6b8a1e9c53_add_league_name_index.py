@@ -0,0 +1,29 @@
+"""add lower(name) index for the league directory
+
+Revision ID: 4d6b8a1e9c53
+Revises: b71d3e9f20c6
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4d6b8a1e9c53'
+down_revision = 'b71d3e9f20c6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    if 'leagues' not in sa.inspect(bind).get_table_names():
+        return
+    # text_pattern_ops so Postgres can answer LIKE 'prefix%' from the index
+    name = 'lower(name) text_pattern_ops' if bind.dialect.name == 'postgresql' else 'lower(name)'
+    op.create_index('ix_leagues_name_lower_id', 'leagues', [sa.text(name), 'id'], if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_leagues_name_lower_id', table_name='leagues', if_exists=True)
@@ -0,0 +1,25 @@
+"""add (chat_id, id) index for league chat pagination
+
+Revision ID: 8c2e5d0a4b17
+Revises: 3f9a1c2b7d41
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c2e5d0a4b17'
+down_revision = '3f9a1c2b7d41'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if 'league_messages' in sa.inspect(op.get_bind()).get_table_names():
+        op.create_index('ix_league_messages_chat_id_id', 'league_messages', ['chat_id', 'id'], if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_league_messages_chat_id_id', table_name='league_messages', if_exists=True)
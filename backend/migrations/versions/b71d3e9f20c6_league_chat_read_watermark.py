@@ -0,0 +1,59 @@
+"""replace per-message league read receipts with a per-chat watermark
+
+Revision ID: b71d3e9f20c6
+Revises: 8c2e5d0a4b17
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b71d3e9f20c6'
+down_revision = '8c2e5d0a4b17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    tables = set(sa.inspect(op.get_bind()).get_table_names())
+    if 'league_chat_read_states' not in tables:
+        op.create_table(
+            'league_chat_read_states',
+            sa.Column('chat_id', sa.Integer(), sa.ForeignKey('league_chats.id'), primary_key=True),
+            sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), primary_key=True),
+            sa.Column('last_read_message_id', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+        )
+    if 'league_message_reads' not in tables:
+        return
+
+    # the newest message a user has read in a chat becomes their watermark
+    op.execute(
+        "INSERT INTO league_chat_read_states (chat_id, user_id, last_read_message_id, updated_at) "
+        "SELECT m.chat_id, r.user_id, MAX(r.message_id), MAX(r.read_at) "
+        "FROM league_message_reads r JOIN league_messages m ON m.id = r.message_id "
+        "GROUP BY m.chat_id, r.user_id"
+    )
+    op.drop_index('ix_league_message_reads_user_id_message_id', table_name='league_message_reads', if_exists=True)
+    op.drop_table('league_message_reads')
+
+
+def downgrade():
+    op.create_table(
+        'league_message_reads',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('message_id', sa.Integer(), sa.ForeignKey('league_messages.id'), nullable=False),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('read_at', sa.DateTime(), nullable=True),
+    )
+    op.create_index('ix_league_message_reads_user_id_message_id', 'league_message_reads', ['user_id', 'message_id'])
+    # one read row for every message at or below the watermark
+    op.execute(
+        "INSERT INTO league_message_reads (message_id, user_id, read_at) "
+        "SELECT m.id, s.user_id, s.updated_at "
+        "FROM league_chat_read_states s JOIN league_messages m "
+        "ON m.chat_id = s.chat_id AND m.id <= s.last_read_message_id"
+    )
+    op.drop_table('league_chat_read_states')
@@ -0,0 +1,32 @@
+"""add team_players.draft_pick
+
+Revision ID: e2a7c4f19b38
+Revises: 4d6b8a1e9c53
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2a7c4f19b38'
+down_revision = '4d6b8a1e9c53'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if 'team_players' not in inspector.get_table_names():
+        return
+    if 'draft_pick' not in {column['name'] for column in inspector.get_columns('team_players')}:
+        op.add_column('team_players', sa.Column('draft_pick', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    if 'team_players' in inspector.get_table_names() and \
+            'draft_pick' in {column['name'] for column in inspector.get_columns('team_players')}:
+        with op.batch_alter_table('team_players') as batch_op:
+            batch_op.drop_column('draft_pick')
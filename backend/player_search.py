@@ -0,0 +1,137 @@
+import bisect
+import gzip
+import hashlib
+import json
+import threading
+import unicodedata
+from collections import defaultdict
+
+# In-memory player search, one index per sport. Names are normalized once at
+# build time; prefix lookups are a binary search over the sorted name keys and
+# typo-tolerant lookups only score players sharing a trigram with the query,
+# so a search never touches the database. Each index also carries the sport's
+# full catalog serialized once, for clients that need every player.
+
+MIN_FUZZY_SIMILARITY = 0.3
+
+
+def normalize(text):
+    """Lowercase, strip accents and drop punctuation: "D'Angelo Russell" -> "dangelo russell"."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    return " ".join("".join(c for c in word if c.isalnum()) for word in text.split()).strip()
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class CatalogSnapshot:
+    """The catalog as prebuilt JSON bytes, plain and gzipped, with a content hash as version."""
+
+    def __init__(self, players):
+        self.version = hashlib.sha1(json.dumps(players, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+        self.body = json.dumps({"players": players, "version": self.version}).encode("utf-8")
+        self.gzip_body = gzip.compress(self.body, compresslevel=6, mtime=0)
+
+
+class PlayerIndex:
+    def __init__(self, players):
+        """players: dicts with id, first_name, last_name, position and team_name."""
+        self.players = sorted(players, key=lambda p: (normalize(p["last_name"]), normalize(p["first_name"]), p["id"]))
+        self.by_id = {player["id"]: player for player in self.players}
+        # (key, position in self.players) for "first last", "last first" and each name word
+        keys = set()
+        self.grams = defaultdict(set)
+        self.gram_counts = []
+        for i, player in enumerate(self.players):
+            first, last = normalize(player["first_name"]), normalize(player["last_name"])
+            full = f"{first} {last}".strip()
+            for key in {full, f"{last} {first}".strip(), *full.split()}:
+                keys.add((key, i))
+            grams = trigrams(full)
+            self.gram_counts.append(len(grams))
+            for gram in grams:
+                self.grams[gram].add(i)
+        self.keys = sorted(keys)
+        # built here rather than on first request so a draft-start rush never serializes
+        self.snapshot = CatalogSnapshot(self.players)
+
+    def prefix_matches(self, prefix):
+        """Positions of players with a name, or name word, starting with prefix, best first."""
+        start = bisect.bisect_left(self.keys, (prefix,))
+        ranked = {}
+        for key, i in self.keys[start:]:
+            if not key.startswith(prefix):
+                break
+            # exact key, then shorter keys (closer to the whole name), then catalog order
+            rank = (key != prefix, len(key), i)
+            if i not in ranked or rank < ranked[i]:
+                ranked[i] = rank
+        return sorted(ranked, key=ranked.get)
+
+    def fuzzy_matches(self, query):
+        grams = trigrams(query)
+        shared = defaultdict(int)
+        for gram in grams:
+            for i in self.grams.get(gram, ()):
+                shared[i] += 1
+        scored = []
+        for i, count in shared.items():
+            similarity = count / (len(grams) + self.gram_counts[i] - count)
+            if similarity >= MIN_FUZZY_SIMILARITY:
+                scored.append((-similarity, i))
+        return [i for _, i in sorted(scored)]
+
+    def search(self, query="", position=None, team=None, offset=0, limit=25):
+        """Return (players, total) for one page of matches.
+
+        Name prefixes rank first, then close misspellings; an empty query lists
+        the catalog by last name. position and team are exact filters.
+        """
+        query = normalize(query)
+        if query:
+            matches = self.prefix_matches(query)
+            # one or two letters share too few trigrams to say anything useful
+            if len(query) >= 3:
+                seen = set(matches)
+                matches += [i for i in self.fuzzy_matches(query) if i not in seen]
+        else:
+            matches = range(len(self.players))
+
+        position = position.upper() if position else None
+        results = [
+            self.players[i] for i in matches
+            if (position is None or self.players[i]["position"] == position)
+            and (team is None or self.players[i]["team_name"] == team)
+        ]
+        return results[offset:offset + limit], len(results)
+
+
+class PlayerSearch:
+    """Per-sport PlayerIndex registry; load(sport) returns the player dicts from the database."""
+
+    def __init__(self, load):
+        self.load = load
+        self._indexes = {}
+        self._lock = threading.Lock()
+
+    def get(self, sport):
+        index = self._indexes.get(sport)
+        if index is None:
+            with self._lock:
+                index = self._indexes.get(sport)
+                if index is None:
+                    index = self._indexes[sport] = PlayerIndex(self.load(sport))
+        return index
+
+    def rebuild(self, sport):
+        index = PlayerIndex(self.load(sport))
+        with self._lock:
+            self._indexes[sport] = index
+        return index
+
+    def clear(self):
+        with self._lock:
+            self._indexes.clear()
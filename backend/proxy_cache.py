@@ -0,0 +1,112 @@
+import hashlib
+import json
+import threading
+import time
+from datetime import datetime, timezone
+
+# In-process cache for the ESPN passthrough routes. Entries are stored as the
+# serialized JSON body plus an ETag, so a hit costs no upstream call and no
+# re-serialization. Concurrent misses for the same key share one upstream fetch,
+# and its result or its error, and recently expired entries are served while a
+# background refresh runs.
+
+
+class CachedResponse:
+    def __init__(self, data, ttl):
+        self.body = json.dumps(data).encode("utf-8")
+        self.etag = hashlib.sha1(self.body).hexdigest()
+        self.last_modified = datetime.now(timezone.utc)
+        self.fetched_at = time.monotonic()
+        self.expires_at = self.fetched_at + ttl
+
+    def max_age(self):
+        return max(0, int(self.expires_at - time.monotonic()))
+
+
+class Flight:
+    """One upstream fetch in progress: waiters block on done and re-raise error."""
+
+    def __init__(self, done):
+        self.done = done
+        self.error = None
+
+
+class ProxyCache:
+    def __init__(self, stale_grace=300, max_entries=1024, wait_timeout=30, event_factory=threading.Event, spawn=None):
+        # how long past expiry an entry may still be served while it is refreshed
+        self.stale_grace = stale_grace
+        self.max_entries = max_entries
+        self.wait_timeout = wait_timeout
+        # waiting and background refreshes must use the server's own primitives:
+        # a threading.Event parks the whole eventlet hub unless it is monkey-patched
+        self.event_factory = event_factory
+        self.spawn = spawn or (lambda target, *args: threading.Thread(target=target, args=args, daemon=True).start())
+        self._entries = {}
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, fetch, ttl):
+        """Return the CachedResponse for key.
+
+        fetch() returns the decoded upstream JSON; ttl is a number of seconds or a
+        callable taking that JSON, so live and final data can expire differently.
+        When the shared fetch fails, every caller waiting on it gets its error.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and now < entry.expires_at:
+                return entry
+            if entry and now < entry.expires_at + self.stale_grace:
+                if key not in self._inflight:
+                    self._inflight[key] = Flight(self.event_factory())
+                    self.spawn(self._refresh, key, fetch, ttl)
+                return entry
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = Flight(self.event_factory())
+
+        if leader:
+            return self._refresh(key, fetch, ttl)
+
+        flight.done.wait(self.wait_timeout)
+        if flight.error is not None:
+            raise flight.error
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            # still running: piling more requests onto a slow upstream would not help
+            raise TimeoutError(f"Timed out waiting for the upstream fetch of {key}")
+        return entry
+
+    def _refresh(self, key, fetch, ttl):
+        with self._lock:
+            flight = self._inflight.get(key)
+        try:
+            return self._store(key, fetch(), ttl)
+        except Exception as e:
+            with self._lock:
+                stale = self._entries.get(key)
+            if stale is None:
+                flight.error = e
+                raise
+            print(f"Upstream refresh failed for {key}, serving stale copy")
+            return stale
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.done.set()
+
+    def _store(self, key, data, ttl):
+        entry = CachedResponse(data, ttl(data) if callable(ttl) else ttl)
+        with self._lock:
+            self._entries[key] = entry
+            if len(self._entries) > self.max_entries:
+                oldest = min(self._entries, key=lambda k: self._entries[k].fetched_at)
+                del self._entries[oldest]
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,141 @@
+"""EXPLAIN report for the scoring and chat hot-path queries.
+
+Prints the plan of every query in hot_queries() against the database in
+DATABASE_URL and exits non-zero if any of them reads its table without an
+index, so it can be rerun after schema changes.
+
+    python query_plan_report.py            # plans against the data as it is
+    python query_plan_report.py --seed 1   # Postgres: load production-sized
+                                           # synthetic data first (x scale)
+
+Postgres only picks an index once a table is big enough for it to pay off,
+so plans taken on an empty development database are meaningless. --seed
+fills the tables with generate_series() inside a transaction, ANALYZEs them,
+takes the plans and rolls everything back.
+"""
+import argparse
+import sys
+from datetime import date, timedelta
+
+from sqlalchemy import and_, func, or_, select, text
+
+from app import app, db, League, Team, TeamPlayer, Matchup, DailyStatsHockey, DailyStatsBasketball, DailyStatsBaseball, \
+                LeagueChat, LeagueChatParticipant, LeagueMessage, LeagueChatReadState, DirectMessage
+
+
+# Approximate production table sizes; --seed SCALE loads SCALE times these.
+PRODUCTION_ROWS = {
+    "users": 50000,
+    "leagues": 5000,
+    "teams": 60000,
+    "players": 12000,
+    "team_players": 900000,
+    "matchups": 500000,
+    "daily_stats": 300000,
+    "league_messages": 2000000,
+    "direct_messages": 500000,
+}
+
+
+def explain(query, dialect):
+    # literal SQL, so the plan rows are not run through the query's result types
+    sql = str(query.compile(dialect=db.engine.dialect, compile_kwargs={"literal_binds": True}))
+    prefix = "EXPLAIN QUERY PLAN " if dialect == "sqlite" else "EXPLAIN "
+    return [row[-1] for row in db.session.execute(text(prefix + sql))]
+
+
+def hot_queries():
+    week_start = date.today() - timedelta(days=7)
+    queries = {
+        "roster by team": (TeamPlayer, select(TeamPlayer).where(TeamPlayer.team_id == 42)),
+        "teams by owner": (Team, select(Team).where(Team.owner_id == 42)),
+        "matchups by league and week": (Matchup, select(Matchup).where(Matchup.league_id == 42, Matchup.week_num == 3)),
+        "league chat by league": (LeagueChat, select(LeagueChat).where(LeagueChat.league_id == 42)),
+        "chat participant": (LeagueChatParticipant, select(LeagueChatParticipant).where(
+            LeagueChatParticipant.chat_id == 42, LeagueChatParticipant.user_id == 42)),
+        "league message page": (LeagueMessage, select(LeagueMessage).where(
+            LeagueMessage.chat_id == 42, LeagueMessage.id < 100000).order_by(LeagueMessage.id.desc()).limit(51)),
+        "read watermark": (LeagueChatReadState, select(LeagueChatReadState.last_read_message_id).where(
+            LeagueChatReadState.chat_id == 42, LeagueChatReadState.user_id == 42)),
+        "unread count": (LeagueMessage, select(func.count()).select_from(LeagueMessage).where(
+            LeagueMessage.chat_id == 42, LeagueMessage.id > 100000, LeagueMessage.sender_id != 42)),
+        "league directory by name prefix": (League, select(League).where(
+            func.lower(League.name) >= "ab", func.lower(League.name) < "ac", func.lower(League.name).like("ab%")
+        ).order_by(func.lower(League.name), League.id).limit(25)),
+        "direct message conversation": (DirectMessage, select(DirectMessage).where(or_(
+            and_(DirectMessage.sender_id == 42, DirectMessage.receiver_id == 43),
+            and_(DirectMessage.sender_id == 43, DirectMessage.receiver_id == 42)
+        )).order_by(DirectMessage.timestamp)),
+    }
+    for model in (DailyStatsHockey, DailyStatsBasketball, DailyStatsBaseball):
+        queries[f"{model.__tablename__} by player and week"] = (model, select(model).where(
+            model.player_id.in_(["nhl1", "nba1", "mlb1"]), model.date >= week_start, model.date < date.today()))
+    return queries
+
+
+def uses_index(plan, table, dialect):
+    if dialect == "sqlite":
+        # "SCAN t" is a full scan; "SEARCH t USING INDEX ..." / "SCAN t USING COVERING INDEX ..." are not
+        return not any(line.startswith(f"SCAN {table}") and "INDEX" not in line for line in plan)
+    return not any(f"Seq Scan on {table}" in line for line in plan)
+
+
+def seed(scale):
+    """Bulk-load synthetic rows in the current transaction (Postgres only)."""
+    rows = {name: max(1, int(count * scale)) for name, count in PRODUCTION_ROWS.items()}
+    statements = [
+        "INSERT INTO users (id, username, email, password) SELECT g + 1000000, 'seed' || g, 'seed' || g || '@example.com', 'x' FROM generate_series(1, :users) g",
+        "INSERT INTO leagues (id, name, commissioner_id, sport) SELECT g + 1000000, 'League ' || g, 1000000 + 1 + g % :users, (ARRAY['nfl','nba','nhl','mlb'])[1 + g % 4] FROM generate_series(1, :leagues) g",
+        "INSERT INTO teams (id, owner_id, name, league_id) SELECT g + 1000000, 1000000 + 1 + g % :users, 'Team ' || g, 1000000 + 1 + g % :leagues FROM generate_series(1, :teams) g",
+        "INSERT INTO players (id, sport, position, last_name, first_name) SELECT 'seed' || g, 'basketball', 'G', 'Last', 'First' FROM generate_series(1, :players) g",
+        "INSERT INTO team_players (player_id, league_id, team_id, starting_position) SELECT 'seed' || (1 + (g * 31) % :players), 1000000 + 1 + (1 + g % :teams) % :leagues, 1000000 + 1 + g % :teams, 'BEN' FROM generate_series(1, :team_players) g ON CONFLICT DO NOTHING",
+        "INSERT INTO matchups (league_id, week_num, home_team_id, away_team_id) SELECT 1000000 + 1 + g % :leagues, 1 + g % 20, 1000000 + 1 + g % :teams, 1000000 + 1 + (g + 1) % :teams FROM generate_series(1, :matchups) g",
+        "INSERT INTO league_chats (id, league_id) SELECT g + 1000000, 1000000 + g FROM generate_series(1, :leagues) g",
+        "INSERT INTO league_chat_participants (chat_id, user_id) SELECT 1000000 + 1 + g % :leagues, 1000000 + 1 + g % :users FROM generate_series(1, :teams) g",
+        "INSERT INTO league_messages (id, chat_id, sender_id, content, timestamp) SELECT g + 10000000, 1000000 + 1 + g % :leagues, 1000000 + 1 + g % :users, 'hi', now() - g * interval '1 second' FROM generate_series(1, :league_messages) g",
+        "INSERT INTO league_chat_read_states (chat_id, user_id, last_read_message_id) SELECT 1000000 + 1 + g % :leagues, 1000000 + 1 + g % :users, 10000000 + g FROM generate_series(1, :teams) g ON CONFLICT DO NOTHING",
+        "INSERT INTO direct_messages (sender_id, receiver_id, content, timestamp, read) SELECT 1000000 + 1 + g % :users, 1000000 + 1 + (g * 7) % :users, 'hi', now() - g * interval '1 second', false FROM generate_series(1, :direct_messages) g",
+    ]
+    for table in ("daily_stats_hockey", "daily_stats_basketball", "daily_stats_baseball"):
+        statements.append(
+            f"INSERT INTO {table} (date, player_id) SELECT current_date - (g / :players), 'seed' || (1 + g % :players) "
+            f"FROM generate_series(1, :daily_stats) g ON CONFLICT DO NOTHING"
+        )
+    for statement in statements:
+        db.session.execute(text(statement), rows)
+    db.session.execute(text("ANALYZE"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seed", type=float, metavar="SCALE", help="load SCALE x production row counts first (Postgres)")
+    args = parser.parse_args()
+
+    with app.app_context():
+        dialect = db.engine.dialect.name
+        if args.seed:
+            if dialect != "postgresql":
+                sys.exit("--seed needs Postgres")
+            seed(args.seed)
+
+        failures = []
+        try:
+            for name, (model, query) in hot_queries().items():
+                plan = explain(query, dialect)
+                ok = uses_index(plan, model.__tablename__, dialect)
+                print(f"{'OK  ' if ok else 'SCAN'} {name}")
+                for line in plan:
+                    print(f"       {line}")
+                if not ok:
+                    failures.append(name)
+        finally:
+            db.session.rollback()
+
+    if failures:
+        print(f"\n{len(failures)} hot queries read their table without an index: {', '.join(failures)}")
+        sys.exit(1)
+    print("\nAll hot queries use an index.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+import numpy as np
+
+# Batch fantasy scoring. A sport's stat lines become a player-by-stat matrix and
+# every ruleset becomes one column of a stat-by-ruleset weight matrix, so a single
+# matrix product scores every player under every league's ruleset at once.
+
+# stat column -> ruleset column, per sport
+FOOTBALL_WEIGHTS = {
+    "passing_tds": "points_passtd",
+    "passing_yds": "points_passyd",
+    "interceptions": "points_int",
+    "rushing_tds": "points_rushtd",
+    "rushing_yds": "points_rushyd",
+    "receiving_tds": "points_rectd",
+    "receiving_yds": "points_recyd",
+    "receptions": "points_reception",
+    "fumbles_lost": "points_fumble",
+    "sacks": "points_sack",
+    "interceptions_def": "points_int_def",
+    "fumbles_recovered": "points_fumble_def",
+    "safeties": "points_safety",
+    "defensive_tds": "points_def_td",
+    "blocked_kicks": "points_block_kick",
+    "kick_return_tds": "points_kick_return_td",
+    "punt_return_tds": "points_punt_return_td",
+    "fg_made_0_39": "points_fg_0_39",
+    "fg_made_40_49": "points_fg_40_49",
+    "fg_made_50plus": "points_fg_50plus",
+    "fg_missed": "points_fg_miss",
+    "xp_made": "points_xp",
+    "xp_missed": "points_xp_miss",
+    "rushing_2pt": "points_2pt_rushtd",
+    "receiving_2pt": "points_2pt_rectd",
+    "passing_2pt": "points_2pt_passtd",
+}
+
+# Points allowed is scored by bracket rather than per unit: a value is placed in
+# bucket i where FOOTBALL_PA_EDGES[i-1] <= value < FOOTBALL_PA_EDGES[i].
+FOOTBALL_PA_EDGES = [1, 7, 14, 21, 28, 35]
+FOOTBALL_PA_KEYS = [
+    "points_shutout",
+    "points_1_6_pa",
+    "points_7_13_pa",
+    "points_14_20_pa",
+    "points_21_27_pa",
+    "points_28_34_pa",
+    "points_35plus_pa",
+]
+
+HOCKEY_WEIGHTS = {
+    "goals": "points_goal",
+    "assists": "points_assist",
+    "shots_on_goal": "points_sog",
+    "blocks": "points_block",
+    "hits": "points_hit",
+    "power_play_points": "points_ppp",
+    "short_handed_points": "points_shp",
+    "saves": "points_save",
+    "goals_against": "points_goal_against",
+    "shutouts": "points_shutout",
+}
+
+BASKETBALL_WEIGHTS = {
+    "points": "points_point",
+    "rebounds": "points_rebound",
+    "assists": "points_assist",
+    "steals": "points_steal",
+    "blocks": "points_block",
+    "turnovers": "points_turnover",
+    "three_pointers_made": "points_three_pm",
+    "double_doubles": "points_double_double",
+    "triple_doubles": "points_triple_double",
+}
+
+BASEBALL_WEIGHTS = {
+    "runs": "points_run",
+    "hits": "points_hit",
+    "home_runs": "points_home_run",
+    "rbis": "points_rbi",
+    "walks": "points_walk",
+    "strikeouts": "points_strikeout",
+    "stolen_bases": "points_sb",
+    "caught_stealing": "points_cs",
+    "wins": "points_win",
+    "quality_starts": "points_quality_start",
+    "saves": "points_save",
+    "innings_pitched": "points_inning_pitched",
+    "earned_runs": "points_earned_run",
+    "pitching_strikeouts": "points_pitching_strikeout",
+}
+
+
+def stat_matrix(rows, weights):
+    """Players x stats matrix. Rows are ORM objects or query rows with one attribute per stat."""
+    return np.array(
+        [[getattr(row, stat) or 0 for stat in weights] for row in rows],
+        dtype=float
+    ).reshape(len(rows), len(weights))
+
+
+def weight_matrix(rulesets, weights):
+    """Stats x rulesets matrix. Rulesets are dicts of ruleset column -> points."""
+    return np.array(
+        [[ruleset.get(key, 0) or 0 for ruleset in rulesets] for key in weights.values()],
+        dtype=float
+    ).reshape(len(weights), len(rulesets))
+
+
+def points_allowed_matrix(points_allowed, rulesets):
+    """Players x rulesets matrix of points-allowed bracket scores."""
+    buckets = np.digitize(np.asarray(points_allowed, dtype=float), FOOTBALL_PA_EDGES)
+    table = np.array(
+        [[ruleset.get(key, 0) or 0 for ruleset in rulesets] for key in FOOTBALL_PA_KEYS],
+        dtype=float
+    ).reshape(len(FOOTBALL_PA_KEYS), len(rulesets))
+    return table[buckets]
+
+
+def score_matrix(rows, rulesets, weights, points_allowed_column=None):
+    """Score every row under every ruleset; returns a len(rows) x len(rulesets) matrix.
+
+    Pass points_allowed_column (football's "points_allowed") to add the bracket
+    score for that column on top of the per-unit stats.
+    """
+    points = stat_matrix(rows, weights) @ weight_matrix(rulesets, weights)
+    if points_allowed_column is not None:
+        points += points_allowed_matrix([getattr(row, points_allowed_column) or 0 for row in rows], rulesets)
+    return points
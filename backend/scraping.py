@@ -1,14 +1,19 @@
 import asyncio
-import aiohttp
-import requests
 import datetime
+import hashlib
 import json
+import os
+import re
+import threading
+
+import http_client
+
 BASE_URL = "https://sports.core.api.espn.com/v3/sports"
 
 
 def get_players_stats(sport, league):
     url = f"{BASE_URL}/{sport}/{league}/athletes?limit=20000&active=true"
-    response = requests.get(url)
+    response = http_client.get(url)
     if response.status_code != 200:
         raise Exception(f"Failed to fetch data: {response.status_code} - {response.text}")
     
@@ -34,16 +39,16 @@ async def fetch_player_detail(session, sport, league, player):
         return None
     player_id = player.get("id")[3:]
     url = f"https://site.web.api.espn.com/apis/common/v3/sports/{sport}/{league}/athletes/{player_id}"
-    async with session.get(url) as response:
-        if response.status != 200:
-            print(f"Failed for player {player_id}")
-            return None
-        return await response.json()
+    status, text, _ = await http_client.async_get(session, url)
+    if status != 200:
+        print(f"Failed for player {player_id}")
+        return None
+    return json.loads(text)
 
 def get_defense_details():
     details = []
     url = "https://site.api.espn.com/apis/site/v2/sports/football/nfl/teams"
-    response = requests.get(url)
+    response = http_client.get(url)
     if response.status_code != 200:
         raise Exception(f"Failed to fetch data: {response.status_code} - {response.text}")
     teams = response.json().get("sports")[0].get("leagues")[0].get("teams")
@@ -65,6 +70,23 @@ def get_defense_details():
         details.append(player)
     return details
 
+# Team $ref URL -> ESPN team id, shared by every parse in the process.
+TEAM_REF_CACHE = {}
+TEAM_REF_PATTERN = re.compile(r"/teams/(-?\d+)")
+
+# Core API team refs look like .../seasons/2024/teams/12?lang=en, so the id is read
+# straight from the URL; anything else is fetched once and remembered.
+def resolve_team_id(ref):
+    team_id = TEAM_REF_CACHE.get(ref)
+    if team_id is None:
+        match = TEAM_REF_PATTERN.search(ref)
+        if match:
+            team_id = int(match.group(1))
+        else:
+            team_id = int(http_client.get(ref).json().get("id"))
+        TEAM_REF_CACHE[ref] = team_id
+    return team_id
+
 # Gets player details, inc. D/ST.
 async def batch_fetch_player_details(sport, league, players, batch_size=50):
     if sport == "football":
@@ -74,8 +96,7 @@ async def batch_fetch_player_details(sport, league, players, batch_size=50):
         details = []
 
 
-    connector = aiohttp.TCPConnector(limit=batch_size)
-    async with aiohttp.ClientSession(connector=connector) as session:
+    async with http_client.async_session(batch_size) as session:
         tasks = [fetch_player_detail(session, sport, league, player) for player in players if player.get("active")]
         results = await asyncio.gather(*tasks, return_exceptions=True)
         for result in results:
@@ -103,15 +124,55 @@ def return_all_player_details(sport, league):
     all_details = get_all_player_details(sport, league, players)
     return all_details
 
-def get_season_start_end_date(year, sport, league):
+# Season windows barely change, so each (league, year) is fetched once and kept in
+# memory and on disk; week-number lookups then never touch the network.
+SEASON_CACHE_PATH = os.getenv("SEASON_CACHE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".season_cache.json"))
+SEASON_CACHE_TTL = datetime.timedelta(hours=float(os.getenv("SEASON_CACHE_TTL_HOURS", "24")))
+season_cache = None
+season_cache_lock = threading.Lock()
+
+def load_season_cache():
+    global season_cache
+    if season_cache is None:
+        try:
+            with open(SEASON_CACHE_PATH) as f:
+                season_cache = json.load(f)
+        except (OSError, ValueError):
+            season_cache = {}
+    return season_cache
+
+def save_season_cache():
+    try:
+        tmp_path = SEASON_CACHE_PATH + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(season_cache, f)
+        os.replace(tmp_path, SEASON_CACHE_PATH)
+    except OSError as e:
+        print(f"Could not persist season cache: {e}")
+
+def fetch_season_start_end_date(year, sport, league):
     url = f"https://sports.core.api.espn.com/v2/sports/{sport}/leagues/{league}/seasons/{year}"
-    response = requests.get(url)
+    response = http_client.get(url)
     if response.status_code != 200:
         raise Exception(f"Failed to fetch data: {response.status_code} - {response.text}")
     data = response.json()
 
     return {"start_date" : data.get("type").get("startDate"), "end_date" : data.get("type").get("endDate")}
 
+def get_season_start_end_date(year, sport, league):
+    key = f"{league}:{year}"
+    now = datetime.datetime.now()
+    with season_cache_lock:
+        entry = load_season_cache().get(key)
+    if entry and now - datetime.datetime.fromisoformat(entry["fetched_at"]) < SEASON_CACHE_TTL:
+        return {"start_date": entry["start_date"], "end_date": entry["end_date"]}
+
+    season = fetch_season_start_end_date(year, sport, league)
+    with season_cache_lock:
+        load_season_cache()[key] = {**season, "fetched_at": now.isoformat()}
+        save_season_cache()
+    return season
+
 def get_week_start_end_date():
     today = datetime.datetime.now().date()
 
@@ -141,26 +202,140 @@ def get_week_number(year, sport, league):
     else:
         return None
 
-def get_daily_games(sport : str, league : str, day=datetime.datetime.now()):
+def get_daily_game_states(sport : str, league : str, day=None):
+    """The day's games from the scoreboard: id, state ("pre", "in" or "post"), start time and team ids."""
+    if day is None:
+        day = datetime.datetime.now()
     BASE_URL = "https://site.api.espn.com/apis/site/v2/sports/"
     url = BASE_URL + f"{sport}/{league}/scoreboard?dates={(day-datetime.timedelta(hours=12)).strftime('%Y%m%d')}-{(day-datetime.timedelta(hours=12)).strftime('%Y%m%d')}"
-    response = requests.get(url)
+    response = http_client.get(url)
 
     if response.status_code != 200:
         raise Exception(f"Failed to fetch data: {response.status_code} - {response.text}")
-    ids = []
+    games = []
     for item in response.json().get('events'):
-        ids.append(item.get('id'))
-    return ids
+        start = item.get("date")
+        competitors = (item.get("competitions") or [{}])[0].get("competitors", [])
+        games.append({
+            "id": item.get("id"),
+            "state": item.get("status", {}).get("type", {}).get("state"),
+            "start": datetime.datetime.fromisoformat(start.replace("Z", "+00:00")) if start else None,
+            "teams": [competitor.get("id") for competitor in competitors],
+        })
+    return games
+
+def get_daily_games(sport : str, league : str, day=None):
+    return [game["id"] for game in get_daily_game_states(sport, league, day)]
+
+BOXSCORE_HEADERS = {
+    "User-Agent": "Mozilla/5.0",
+    "Accept": "application/json",
+}
+
+# Every ESPN document get_daily_stats needs for one game, keyed by name.
+def get_game_urls(sport, league, game_id):
+    if sport == "hockey":
+        urls = {"boxscore": f"https://site.web.api.espn.com/apis/site/v2/sports/{sport}/{league}/summary?event={game_id}",
+                "plays": f"https://sports.core.api.espn.com/v2/sports/hockey/leagues/nhl/events/{game_id}/competitions/{game_id}/plays?limit=500"}
+    else:
+        urls = {"boxscore": f"https://cdn.espn.com/core/{league}/boxscore?xhr=1&gameId={game_id}"}
+    if league == "nfl":
+        urls["plays"] = f"https://sports.core.api.espn.com/v2/sports/football/leagues/nfl/events/{game_id}/competitions/{game_id}/plays?limit=500"
+        urls["summary"] = f"https://site.web.api.espn.com/apis/site/v2/sports/football/{league}/summary?event={game_id}"
+    return urls
+
+# Returns (document, etag, digest). When the server confirms `etag` is still
+# current (304) the document is not downloaded and (None, etag, None) is returned.
+async def fetch_game_document(session, url, etag=None):
+    headers = dict(BOXSCORE_HEADERS, **{"If-None-Match": etag}) if etag else BOXSCORE_HEADERS
+    status, text, response_headers = await http_client.async_get(session, url, headers=headers)
+    if status == 304:
+        return None, etag, None
+    if status != 200:
+        raise Exception(f"Failed to fetch data: {status} - {text}")
+    # cdn.espn.com does not always label its JSON as application/json
+    return json.loads(text), response_headers.get("ETag"), hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+# Downloads every boxscore, play feed and summary for the day's games in parallel,
+# over one connection pool capped at `concurrency` open connections. etags maps
+# url -> ETag from an earlier download, sent as If-None-Match.
+async def batch_fetch_game_data(sport, league, game_ids, concurrency=10, etags=None):
+    etags = etags or {}
+    requests_to_make = [(game_id, name, url) for game_id in game_ids for name, url in get_game_urls(sport, league, game_id).items()]
+
+    async with http_client.async_session(concurrency) as session:
+        tasks = [fetch_game_document(session, url, etags.get(url)) for _, _, url in requests_to_make]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
 
-def get_daily_stats(sport : str, league : str, day=None):
+    games = {game_id: {} for game_id in game_ids}
+    for (game_id, name, _), result in zip(requests_to_make, results):
+        if isinstance(result, Exception):
+            raise result
+        games[game_id][name] = result
+    return games
+
+def get_all_game_data(sport, league, game_ids, concurrency=10, etags=None):
+    return asyncio.run(batch_fetch_game_data(sport, league, game_ids, concurrency=concurrency, etags=etags))
+
+# Per-game parse cache: game id -> {"day", "final", "etags", "digests", "stats"}.
+# A game whose documents are unchanged (304 or same content hash) reuses its
+# parsed stats, and a game that is final is not downloaded again at all.
+GAME_CACHE = {}
+GAME_CACHE_LOCK = threading.Lock()
+
+def game_is_final(boxscore):
+    header = (boxscore.get("gamepackageJSON") or boxscore).get("header") or {}
+    competition = (header.get("competitions") or [{}])[0]
+    return bool(competition.get("status", {}).get("type", {}).get("completed"))
+
+def prune_game_cache(today):
+    cutoff = (datetime.datetime.strptime(today, "%Y%m%d") - datetime.timedelta(days=1)).strftime("%Y%m%d")
+    with GAME_CACHE_LOCK:
+        for game_id in [game_id for game_id, entry in GAME_CACHE.items() if entry["day"] < cutoff]:
+            del GAME_CACHE[game_id]
+
+# Downloads the documents of the games that may have changed. Returns
+# ({game_id: {name: document}} for games that did change, {game_id: cached stats}
+# for games that did not, {game_id: (etags, digests)} for the downloads).
+def fetch_changed_games(sport, league, game_ids, revalidate=False):
+    with GAME_CACHE_LOCK:
+        cached = {game_id: GAME_CACHE.get(game_id) for game_id in game_ids}
+    reused = {game_id: entry["stats"] for game_id, entry in cached.items() if entry and entry["final"] and not revalidate}
+    to_fetch = [game_id for game_id in game_ids if game_id not in reused]
+    etags = {url: etag for game_id in to_fetch if cached[game_id] for url, etag in cached[game_id]["etags"].items()}
+
+    game_data = get_all_game_data(sport, league, to_fetch, etags=etags) if to_fetch else {}
+    changed, validators = {}, {}
+    for game_id in to_fetch:
+        documents = game_data[game_id]
+        entry = cached[game_id]
+        if entry and all(digest is None or digest == entry["digests"].get(name) for name, (_, _, digest) in documents.items()):
+            reused[game_id] = entry["stats"]
+            continue
+        if any(document is None for document, _, _ in documents.values()):
+            # some documents changed and others were 304: fetch the whole game again
+            documents = get_all_game_data(sport, league, [game_id])[game_id]
+
+        urls = get_game_urls(sport, league, game_id)
+        changed[game_id] = {name: document for name, (document, _, _) in documents.items()}
+        validators[game_id] = (
+            {urls[name]: etag for name, (_, etag, _) in documents.items() if etag},
+            {name: digest for name, (_, _, digest) in documents.items()}
+        )
+    return changed, reused, validators
+
+# game_ids restricts parsing to those games (e.g. the ones currently live); by
+# default every game on the day's scoreboard is fetched.
+def get_daily_stats(sport : str, league : str, day=None, game_ids=None, revalidate=False):
 
     def index(lst, value, default=-1):
         try:
             return lst.index(value)
         except ValueError:
             return default
-    if day is None:
+    if game_ids is not None:
+        daily_ids = list(game_ids)
+    elif day is None:
         daily_ids = get_daily_games(sport, league)
     else:
         print("called")
@@ -169,32 +344,27 @@ def get_daily_stats(sport : str, league : str, day=None):
     print(daily_ids)
     if not daily_ids:
         return
-    
+
+    # Should run between midnight and 7 am CST (5 am and noon UTC)
+    today = (datetime.datetime.now() - datetime.timedelta(hours=12)).strftime('%Y%m%d')
+    prune_game_cache(today)
+    # final games are skipped unless revalidate is set (the nightly sweep does, to
+    # catch stat corrections); unchanged ones are not reparsed either way
+    game_data, reused_stats, validators = fetch_changed_games(sport, league, daily_ids, revalidate)
+
     all_stats = []
     for game_id in daily_ids:
-        if sport == "hockey":
-            url = f"https://site.web.api.espn.com/apis/site/v2/sports/{sport}/{league}/summary?event={game_id}"
-        else:
-            url = f"https://cdn.espn.com/core/{league}/boxscore?xhr=1&gameId={game_id}"
-        headers = {
-            "User-Agent": "Mozilla/5.0",
-            "Accept": "application/json",
-        }
-        response = requests.get(url, headers=headers)
-        
-        if response.status_code != 200:
-            raise Exception(f"Failed to fetch data: {response.status_code} - {response.text}")
-        
+        if game_id in reused_stats:
+            all_stats.append(reused_stats[game_id])
+            continue
 
-        data = response.json()
+        data = game_data[game_id]["boxscore"]
         if not data:
             raise Exception("No data found in response.")
         
         
         
         
-        # Should run between midnight and 7 am CST (5 am and noon UTC)
-        today = (datetime.datetime.now() - datetime.timedelta(hours=12)).strftime('%Y%m%d')
         total_stats = {"date": today, "sport": sport, "stats": {}, "game_id": game_id}
         # implementation finished
         if sport == "baseball":
@@ -299,7 +469,6 @@ def get_daily_stats(sport : str, league : str, day=None):
         elif sport == "hockey":
 
             print(f"Processing game ID: {game_id}")
-            print(f"Response status: {response.status_code}")
             print(f"Response data structure: {type(data)}")
             print(f"Keys in response: {data.keys()}")
 
@@ -330,8 +499,7 @@ def get_daily_stats(sport : str, league : str, day=None):
                 # power play points calculated via events
                 power_play_points = {}
                 short_handed_points = {}
-                events = requests.get(f"https://sports.core.api.espn.com/v2/sports/hockey/leagues/nhl/events/{game_id}/competitions/{game_id}/plays?limit=500")
-                events = events.json().get("items")
+                events = game_data[game_id]["plays"].get("items")
                 for event in events:
                     if event.get("scoringPlay") and event.get("strength",{}).get("abbreviation","") == "power-play":
                         participants = [p.get("playerId") for p in event.get("participants")]
@@ -481,10 +649,7 @@ def get_daily_stats(sport : str, league : str, day=None):
             kr_td_index = items[0].get("statistics")[6].get("keys").index("kickReturnTouchdowns")
             punt_td_index = items[0].get("statistics")[7].get("keys").index("puntReturnTouchdowns")
             # wow this sucks
-            url = f"https://sports.core.api.espn.com/v2/sports/football/leagues/nfl/events/{game_id}/competitions/{game_id}/plays?limit=500"
-            
-            events = requests.get(url)
-            events = events.json().get("items")
+            events = game_data[game_id]["plays"].get("items")
             for event in events:
                 # defensive blocked kicks (touchdowns should**** be covered by team stats)
                 if "Field Goal Good" in event.get("type").get("text"):
@@ -502,33 +667,29 @@ def get_daily_stats(sport : str, league : str, day=None):
                             else:
                                 total_stats["stats"][player_id]["fg_made_50plus"] = total_stats["stats"][player_id].get("fg_made_50plus", 0) + 1
                 if "Blocked" in event.get("type").get("text"):
-                    ref = event.get("team").get("$ref")
-                    data = requests.get(ref).json()
-                    player_id = "nfl" + str(-int(data.get("id")))
+                    player_id = "nfl" + str(-resolve_team_id(event.get("team").get("$ref")))
                     total_stats["stats"][player_id] = total_stats["stats"].get(player_id, {})
                     total_stats["stats"][player_id]["blocked_kicks"] = total_stats["stats"][player_id].get("blocked_kicks", 0) + 1
                 
                 if "Safety" in event.get("type").get("text"):
-                    ref = event.get("team").get("$ref")
-                    data = requests.get(ref).json()
-                    player_id = "nfl" + str(-int(data.get("id")))
+                    player_id = "nfl" + str(-resolve_team_id(event.get("team").get("$ref")))
                     total_stats["stats"][player_id] = total_stats["stats"].get(player_id, {})
                     total_stats["stats"][player_id]["safeties"] = total_stats["stats"][player_id].get("safeties", 0) + 1
 
                 if event.get("pointAfterAttempt") and event.get("pointAfterAttempt").get("text") == "Two Point Pass" and event.get("pointAfterAttempt").get("value") == 2:
                     for player in event.get("participants"):
                         if player.get("type") == "patPasser":
-                            player_id = player.get("athlete").get("id")
+                            player_id = "nfl" + player.get("athlete").get("$ref").split("/")[-1].split("?")[0]
                             total_stats["stats"][player_id] = total_stats["stats"].get(player_id, {})
                             total_stats["stats"][player_id]["passing_2pt"] = total_stats["stats"][player_id].get("passing_2pt", 0) + 1
                         elif player.get("type") == "patScorer":
-                            player_id = player.get("athlete").get("id")
+                            player_id = "nfl" + player.get("athlete").get("$ref").split("/")[-1].split("?")[0]
                             total_stats["stats"][player_id] = total_stats["stats"].get(player_id, {})
-                            total_stats["stats"][player_id]["reveiving_2pt"] = total_stats["stats"][player_id].get("receiving_2pt", 0) + 1
+                            total_stats["stats"][player_id]["receiving_2pt"] = total_stats["stats"][player_id].get("receiving_2pt", 0) + 1
                 elif event.get("pointAfterAttempt") and event.get("pointAfterAttempt").get("text") == "Two Point Rush" and event.get("pointAfterAttempt").get("value") == 2:
                     for player in event.get("participants"):
                         if player.get("type") == "patRusher":
-                            player_id = player.get("athlete").get("id")
+                            player_id = "nfl" + player.get("athlete").get("$ref").split("/")[-1].split("?")[0]
                             total_stats["stats"][player_id] = total_stats["stats"].get(player_id, {})
                             total_stats["stats"][player_id]["rushing_2pt"] = total_stats["stats"][player_id].get("rushing_2pt", 0) + 1
             
@@ -611,7 +772,8 @@ def get_daily_stats(sport : str, league : str, day=None):
 
             # each team
             for item in items:
-                team_id = -int(item.get("team").get("id"))
+                # D/ST rows use the same ids as get_defense_details()
+                team_id = "nfl" + str(-int(item.get("team").get("id")))
                 totals = item.get("statistics")[4].get("totals")
                 total_stats["stats"][team_id] = total_stats["stats"].get(team_id, {})
                 total_stats["stats"][team_id]["sacks"] = int(totals[sacks_index])
@@ -635,12 +797,8 @@ def get_daily_stats(sport : str, league : str, day=None):
             
 
             # summary data for points allowed
-            url = f"https://site.web.api.espn.com/apis/site/v2/sports/football/{league}/summary?event={game_id}"
-            response = requests.get(url, headers=headers)
-            if response.status_code != 200:
-                raise Exception(f"Failed to fetch data: {response.status_code} - {response.text}")
-            summary_data = response.json()
-            home_team_id, away_team_id = -int(summary_data.get("boxscore").get("teams")[1].get("team").get("id")), -int(summary_data.get("boxscore").get("teams")[0].get("team").get("id"))
+            summary_data = game_data[game_id]["summary"]
+            home_team_id, away_team_id = ["nfl" + str(-int(summary_data.get("boxscore").get("teams")[i].get("team").get("id"))) for i in (1, 0)]
 
             home_score, away_score = summary_data.get("scoringPlays")[-1].get("homeScore"), summary_data.get("scoringPlays")[-1].get("awayScore")
             total_stats["stats"][home_team_id] = total_stats["stats"].get(home_team_id, {})
@@ -655,7 +813,11 @@ def get_daily_stats(sport : str, league : str, day=None):
             raise Exception("Invalid sport specified.")
         
         all_stats.append(total_stats)
-    cleaned_stats = {"sport": sport, "league": league, "today": today, "stats": {}}
+        etags, digests = validators[game_id]
+        with GAME_CACHE_LOCK:
+            GAME_CACHE[game_id] = {"day": today, "final": game_is_final(data), "etags": etags, "digests": digests, "stats": total_stats}
+    # changed_games is empty when every game was served from the cache
+    cleaned_stats = {"sport": sport, "league": league, "today": today, "stats": {}, "changed_games": list(game_data)}
     #cleaning, to handle doubleheaders
     for item in all_stats:
         # for all player ids
@@ -668,7 +830,8 @@ def get_daily_stats(sport : str, league : str, day=None):
                     else:
                         cleaned_stats["stats"][key][stat_key] = item["stats"][key][stat_key]
             else:
-                cleaned_stats["stats"][key] = item["stats"][key]
+                # copied: the per-game dicts live on in GAME_CACHE
+                cleaned_stats["stats"][key] = dict(item["stats"][key])
     return cleaned_stats
 
 
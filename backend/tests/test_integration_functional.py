@@ -4,9 +4,12 @@ import sys
 import os
 import json
 from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from sqlalchemy import event
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from app import app, db
+from app import app, db, player_search, draft_rooms
 from app import User, Team, League, TeamPlayer, TeamPlayerPerformance
 
 @pytest.fixture
@@ -18,6 +21,9 @@ def client():
         yield app.test_client()
         db.session.remove()
         db.drop_all()
+    # player indexes and draft rooms outlive the database they were built from
+    player_search.clear()
+    draft_rooms.clear()
 
 @pytest.fixture
 def user_token(client):
@@ -32,6 +38,18 @@ def user_token(client):
     })
     return login.get_json()["access_token"]
 
+@contextmanager
+def count_statements():
+    """Collect the SQL statements executed inside the block."""
+    statements = []
+    with app.app_context():
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(db.engine, "before_cursor_execute", listener)
+        try:
+            yield statements
+        finally:
+            event.remove(db.engine, "before_cursor_execute", listener)
+
 def test_team_enrollment(client, user_token):
     league_res = client.post("/api/league/create", headers={"Authorization": f"Bearer {user_token}"}, json={
         "league_name": "Enroll League",
@@ -127,4 +145,555 @@ def test_matchup_scoring_details(client, user_token):
     assert res.status_code == 200
     data = res.get_json()
     assert "matchup" in data
-    assert data["matchup"]["home_score"] == 120.5
\ No newline at end of file
+    assert data["matchup"]["home_score"] == 120.5
+
+def test_score_daily_sport_bulk_upsert(client):
+    from datetime import datetime
+    from app import RulesetHockey, DailyStatsHockey, Matchup, Player, score_daily_sport, update_matchup_scores
+
+    with app.app_context():
+        owner = User(username="scorer", email="scorer@example.com", password="x")
+        ruleset = RulesetHockey()
+        db.session.add_all([owner, ruleset])
+        db.session.commit()
+
+        league = League(name="Scoring League", commissioner_id=owner.id, sport="nhl", hockey_ruleset_id=ruleset.id)
+        db.session.add(league)
+        db.session.commit()
+
+        home = Team(owner_id=owner.id, name="Home", league_id=league.id)
+        away = Team(owner_id=owner.id, name="Away", league_id=league.id)
+        db.session.add_all([home, away])
+        db.session.commit()
+
+        db.session.add_all([
+            Player(id="nhl1", sport="hockey", position="C", last_name="One", first_name="Player"),
+            Player(id="nhl2", sport="hockey", position="D", last_name="Two", first_name="Player"),
+        ])
+        db.session.add_all([
+            TeamPlayer(player_id="nhl1", league_id=league.id, team_id=home.id, starting_position="C"),
+            TeamPlayer(player_id="nhl2", league_id=league.id, team_id=away.id, starting_position="BEN"),
+            DailyStatsHockey(player_id="nhl1", date=datetime.now().date(), goals=2, assists=1),
+            DailyStatsHockey(player_id="nhl2", date=datetime.now().date(), goals=1),
+            Matchup(league_id=league.id, week_num=3, home_team_id=home.id, away_team_id=away.id),
+        ])
+        db.session.commit()
+
+        assert score_daily_sport("nhl", 3) == {home.id, away.id}
+        update_matchup_scores("nhl", 3)
+        db.session.commit()
+
+        performance = TeamPlayerPerformance.query.filter_by(week_num=3, player_id="nhl1", league_id=league.id).one()
+        assert performance.fantasy_points == 2 * 3.0 + 1 * 2.0
+        assert performance.starting_position == "C"
+
+        matchup = Matchup.query.filter_by(league_id=league.id, week_num=3).one()
+        assert matchup.home_team_score == 8.0
+        # benched players do not count towards the matchup
+        assert matchup.away_team_score == 0
+
+        # a delta pass only rescores the teams rostering the changed players
+        DailyStatsHockey.query.filter_by(player_id="nhl1").one().goals = 3
+        assert score_daily_sport("nhl", 3, {"nhl1"}) == {home.id}
+        updates = update_matchup_scores("nhl", 3, {home.id})
+        db.session.commit()
+        assert matchup.home_team_score == 11.0
+        assert [(u["matchup_id"], u["home_delta"], u["away_delta"]) for u in updates] == [(matchup.id, 3.0, 0)]
+        assert TeamPlayerPerformance.query.filter_by(week_num=3).count() == 2
+
+
+def test_ingest_stat_lines_only_writes_changes(client):
+    from datetime import date
+    from app import Player, DailyStatsBasketball, ingest_stat_lines
+
+    with app.app_context():
+        db.session.add_all([
+            Player(id="nba1", sport="basketball", position="PG", last_name="One", first_name="Player"),
+            Player(id="nba2", sport="basketball", position="C", last_name="Two", first_name="Player"),
+        ])
+        db.session.commit()
+
+        day = date(2025, 1, 7)
+        lines = {"nba1": {"points": 20, "assists": 5}, "nba2": {"points": 8, "rebounds": 11}}
+        assert ingest_stat_lines("nba", DailyStatsBasketball, lines, date=day) == {"nba1", "nba2"}
+        assert ingest_stat_lines("nba", DailyStatsBasketball, lines, date=day) == set()
+
+        lines["nba2"] = {"points": 12, "rebounds": 11}
+        assert ingest_stat_lines("nba", DailyStatsBasketball, lines, date=day) == {"nba2"}
+
+        row = DailyStatsBasketball.query.filter_by(player_id="nba2", date=day).one()
+        assert (row.points, row.rebounds, row.assists) == (12, 11, 0)
+
+
+def test_populate_player_table_diffs_catalog(client, monkeypatch):
+    import app as app_module
+    from app import Player, populate_player_table
+
+    catalog = [
+        {"id": "nhl1", "position": "C", "team": "Boston Bruins", "last_name": "One", "first_name": "Player"},
+        {"id": "nhl2", "position": "G", "team": "Dallas Stars", "last_name": "Two", "first_name": "Player"},
+    ]
+    monkeypatch.setattr(app_module, "return_all_player_details", lambda sport, league: catalog)
+
+    with app.app_context():
+        assert populate_player_table("nhl") == {"added": 2, "changed": 0, "unchanged": 0}
+
+        catalog[1] = dict(catalog[1], team="Chicago Blackhawks")
+        catalog.append({"id": "nhl3", "position": "D", "team": "FA", "last_name": "Three", "first_name": "Player"})
+        assert populate_player_table("nhl") == {"added": 1, "changed": 1, "unchanged": 1}
+        assert db.session.get(Player, "nhl2").team_name == "Chicago Blackhawks"
+
+
+def test_empty_player_catalog_is_refreshed_in_background(client, user_token, monkeypatch):
+    import app as app_module
+
+    queued = []
+    monkeypatch.setattr(app_module, "request_catalog_refresh", queued.append)
+
+    res = client.get("/api/players/nba", headers={"Authorization": f"Bearer {user_token}"})
+    assert res.status_code == 202
+    assert res.get_json()["players"] == []
+    assert queued == ["nba"]
+
+
+def test_missing_players_queue_one_catalog_refresh(client, monkeypatch):
+    from datetime import date
+    import app as app_module
+    from app import DailyStatsBasketball, ingest_stat_lines
+
+    queued = []
+    monkeypatch.setattr(app_module.scheduler, "add_job", lambda **kwargs: queued.append(kwargs["args"]))
+    monkeypatch.setattr(app_module, "last_catalog_refresh", {})
+    monkeypatch.setattr(app_module, "unresolved_player_ids", app_module.defaultdict(set))
+
+    with app.app_context():
+        lines = {"nba404": {"points": 3}}
+        ingest_stat_lines("nba", DailyStatsBasketball, lines, date=date(2025, 1, 7))
+        # the same unknown id on the next poll does not scrape again
+        ingest_stat_lines("nba", DailyStatsBasketball, lines, date=date(2025, 1, 7))
+        assert queued == [["nba"]]
+
+        # a new unknown id inside the cooldown is also held back
+        ingest_stat_lines("nba", DailyStatsBasketball, {"nba405": {"points": 1}}, date=date(2025, 1, 7))
+        assert queued == [["nba"]]
+
+def test_catalog_refresh_writes_lines_skipped_for_unknown_players(client, monkeypatch):
+    import app as app_module
+    from app import DailyStatsBasketball, ingest_sport, refresh_player_catalog
+
+    monkeypatch.setattr(app_module.scheduler, "add_job", lambda **kwargs: None)
+    monkeypatch.setattr(app_module, "last_catalog_refresh", {})
+    monkeypatch.setattr(app_module, "unresolved_player_ids", app_module.defaultdict(set))
+    monkeypatch.setattr(app_module, "update_scores", lambda changed: None)
+    # the game went final on the first pass; afterwards it is served from the game cache
+    passes = []
+    def daily_stats(sport, league, game_ids=None, revalidate=False):
+        passes.append(game_ids)
+        changed = ["g1"] if len(passes) == 1 else []
+        return {"stats": {"nba7": {"points": 31}}, "changed_games": changed}
+    monkeypatch.setattr(app_module, "get_daily_stats", daily_stats)
+    monkeypatch.setattr(app_module, "return_all_player_details", lambda sport, league: [
+        {"id": "nba7", "position": "G", "team": "Boston Celtics", "last_name": "Seven", "first_name": "Player"}
+    ])
+
+    ingest_sport("nba", ["g1"])
+    with app.app_context():
+        assert DailyStatsBasketball.query.count() == 0
+
+    # an unchanged pass alone writes nothing, the refresh backfills from the cache
+    ingest_sport("nba")
+    refresh_player_catalog("nba")
+    with app.app_context():
+        assert [(row.player_id, row.points) for row in DailyStatsBasketball.query] == [("nba7", 31)]
+    assert not app_module.unresolved_player_ids["nba"]
+
+    # with nothing unresolved a later refresh does not ingest again
+    refresh_player_catalog("nba")
+    assert len(passes) == 3
+
+def test_league_chat_history_is_paginated(client, user_token):
+    from app import LeagueChat, LeagueMessage
+
+    headers = {"Authorization": f"Bearer {user_token}"}
+    client.post("/api/league/create", headers=headers, json={
+        "league_name": "Chatty League",
+        "sport": "nba",
+        "team_name": "Chatty Team"
+    })
+    with app.app_context():
+        league = League.query.filter_by(name="Chatty League").one()
+        chat = LeagueChat(league_id=league.id)
+        db.session.add(chat)
+        db.session.commit()
+        db.session.add_all([LeagueMessage(chat_id=chat.id, sender_id=1, content=f"message {i}") for i in range(5)])
+        db.session.commit()
+        league_id, chat_id = league.id, chat.id
+
+    latest = client.get(f"/api/league/{league_id}/messages?limit=2", headers=headers).get_json()
+    assert [m["content"] for m in latest["messages"]] == ["message 3", "message 4"]
+    assert latest["has_more"]
+
+    older = client.get(f"/api/league/{league_id}/messages?limit=2&before_id={latest['messages'][0]['id']}", headers=headers).get_json()
+    assert [m["content"] for m in older["messages"]] == ["message 1", "message 2"]
+
+    # the POST endpoint keeps returning a bare list
+    newer = client.post("/api/chat/league/messages", headers=headers, json={
+        "chat_id": chat_id, "after_id": older["messages"][1]["id"], "limit": 10
+    }).get_json()
+    assert [m["content"] for m in newer] == ["message 3", "message 4"]
+    assert newer[0]["read"] is False
+
+
+def test_mark_read_moves_watermark(client, user_token):
+    from app import LeagueChat, LeagueMessage, LeagueChatReadState
+
+    headers = {"Authorization": f"Bearer {user_token}"}
+    client.post("/api/league/create", headers=headers, json={
+        "league_name": "Reader League",
+        "sport": "nba",
+        "team_name": "Reader Team"
+    })
+    with app.app_context():
+        league = League.query.filter_by(name="Reader League").one()
+        chat = LeagueChat(league_id=league.id)
+        db.session.add(chat)
+        db.session.commit()
+        db.session.add_all([LeagueMessage(chat_id=chat.id, sender_id=999, content=f"message {i}") for i in range(3)])
+        db.session.commit()
+        chat_id = chat.id
+
+    def unread():
+        summary = client.get("/api/chat/league/summary", headers=headers).get_json()
+        return next(item["unreadCount"] for item in summary if item["chat_id"] == chat_id)
+
+    assert unread() == 3
+    assert client.post("/api/chat/league/mark_read", headers=headers, json={"chat_id": chat_id}).status_code == 200
+    assert client.post("/api/chat/league/mark_read", headers=headers, json={"chat_id": chat_id}).status_code == 200
+    assert unread() == 0
+
+    with app.app_context():
+        assert LeagueChatReadState.query.count() == 1
+        db.session.add(LeagueMessage(chat_id=chat_id, sender_id=999, content="new"))
+        db.session.commit()
+    assert unread() == 1
+    messages = client.post("/api/chat/league/messages", headers=headers, json={"chat_id": chat_id}).get_json()
+    assert [m["read"] for m in messages] == [True, True, True, False]
+
+    # a mark-read that computed an older max(id) but commits last keeps the newer watermark
+    from app import bulk_upsert
+    with app.app_context():
+        newest = db.session.query(db.func.max(LeagueMessage.id)).scalar()
+        assert client.post("/api/chat/league/mark_read", headers=headers, json={"chat_id": chat_id}).status_code == 200
+        bulk_upsert(
+            LeagueChatReadState,
+            [{"chat_id": chat_id, "user_id": 1, "last_read_message_id": newest - 1}],
+            index_elements=["chat_id", "user_id"],
+            update_columns=["last_read_message_id"],
+            increasing_columns=["last_read_message_id"]
+        )
+        db.session.commit()
+        assert LeagueChatReadState.query.one().last_read_message_id == newest
+
+
+def test_chat_summary_is_one_query(client, user_token):
+    from app import LeagueChat, LeagueMessage
+
+    headers = {"Authorization": f"Bearer {user_token}"}
+    for name in ("Summary One", "Summary Two", "Summary Three"):
+        client.post("/api/league/create", headers=headers, json={"league_name": name, "sport": "nba", "team_name": name})
+    with app.app_context():
+        for league in League.query.filter(League.name.like("Summary%")).all():
+            chat = LeagueChat(league_id=league.id)
+            db.session.add(chat)
+            db.session.commit()
+            db.session.add_all([LeagueMessage(chat_id=chat.id, sender_id=999, content=f"{league.name} {i}") for i in range(3)])
+        db.session.commit()
+
+    with count_statements() as statements:
+        summary = client.get("/api/chat/league/summary", headers=headers).get_json()
+
+    assert [item["latestMessage"] for item in summary] == ["Summary One 2", "Summary Two 2", "Summary Three 2"]
+    assert all(item["unreadCount"] == 3 for item in summary)
+    assert len(statements) == 1
+
+def test_read_endpoints_use_constant_queries(client, user_token):
+    from app import Matchup, Player, sqids
+
+    headers = {"Authorization": f"Bearer {user_token}"}
+
+    def league_queries(team_count):
+        with app.app_context():
+            league = League(name=f"Eager {team_count}", commissioner_id=1, sport="nba")
+            db.session.add(league)
+            db.session.commit()
+            teams = []
+            for i in range(team_count):
+                owner = User(username=f"eager{team_count}_{i}", email=f"eager{team_count}_{i}@example.com", password="x")
+                db.session.add(owner)
+                db.session.commit()
+                team = Team(name=f"Eager Team {team_count}_{i}", owner_id=owner.id, league_id=league.id, rank=team_count - i)
+                db.session.add(team)
+                db.session.commit()
+                teams.append(team)
+                for j in range(3):
+                    player = Player(id=f"eager{team_count}_{i}_{j}", sport="basketball", position="G", last_name="Last", first_name="First")
+                    db.session.add(player)
+                    db.session.add(TeamPlayer(player_id=player.id, league_id=league.id, team_id=team.id))
+            for home, away in zip(teams[::2], teams[1::2]):
+                db.session.add(Matchup(league_id=league.id, week_num=1, home_team_id=home.id, away_team_id=away.id))
+            db.session.commit()
+            league_code, team_code, league_id = sqids.encode([league.id]), sqids.encode([teams[0].id]), league.id
+
+        with count_statements() as statements:
+            league_data = client.post("/api/league/getleague", headers=headers, json={"code": league_code}).get_json()
+            team_data = client.post("/api/team/getteam", headers=headers, json={"code": team_code}).get_json()
+            matchups = client.post("/api/league/getmatchups", headers=headers, json={"leagueId": league_id}).get_json()
+            client.post("/api/league/joinable", headers=headers)
+
+        assert [team["league_rank"] for team in league_data["teams"]] == sorted(range(1, team_count + 1))
+        assert league_data["league"]["num_teams"] == team_count
+        assert len(team_data["roster"]) == 3 and team_data["sport"] == "nba"
+        assert len(matchups["matchups"]) == team_count // 2
+        return len(statements)
+
+    assert league_queries(2) == league_queries(8)
+
+def test_joinable_leagues_directory(client, user_token):
+    from app import MAX_TEAMS_PER_LEAGUE
+
+    headers = {"Authorization": f"Bearer {user_token}"}
+    with app.app_context():
+        commissioner = User(username="commish", email="commish@example.com", password="x")
+        db.session.add(commissioner)
+        db.session.commit()
+        for i in range(7):
+            db.session.add(League(name=f"Alpha {i}", commissioner_id=commissioner.id, sport="nba" if i % 2 else "nhl"))
+        full = League(name="Alpha Full", commissioner_id=commissioner.id, sport="nba")
+        mine = League(name="Alpha Mine", commissioner_id=commissioner.id, sport="nba")
+        db.session.add_all([full, mine, League(name="Beta", commissioner_id=commissioner.id, sport="nba", membership_locked=True)])
+        db.session.commit()
+        db.session.add_all([Team(name=f"Full {i}", owner_id=commissioner.id, league_id=full.id) for i in range(MAX_TEAMS_PER_LEAGUE)])
+        db.session.add(Team(name="My Team", owner_id=1, league_id=mine.id))
+        db.session.commit()
+
+    # paging by name prefix visits every match once, in order
+    names, after_id = [], None
+    while True:
+        page = client.post("/api/league/joinable", headers=headers, json={"name": "alpha", "limit": 3, "after_id": after_id}).get_json()
+        names += [league["name"] for league in page["leagues"]]
+        if not page["has_more"]:
+            break
+        after_id = page["next_after_id"]
+    assert names == [f"Alpha {i}" for i in range(7)] + ["Alpha Full"]
+
+    open_nba = client.post("/api/league/joinable", headers=headers, json={"sport": "nba", "open_slots": 1, "membership_locked": False}).get_json()["leagues"]
+    assert [league["name"] for league in open_nba] == ["Alpha 1", "Alpha 3", "Alpha 5"]
+    assert all(league["open_slots"] == MAX_TEAMS_PER_LEAGUE and league["commissioner"] == "commish" for league in open_nba)
+
+    everything = client.post("/api/league/joinable", headers=headers).get_json()["leagues"]
+    assert {league["name"]: league["num_teams"] for league in everything}["Alpha Full"] == MAX_TEAMS_PER_LEAGUE
+    assert "Alpha Mine" not in [league["name"] for league in everything]
+
+    assert client.post("/api/league/joinable", headers=headers, json={"limit": "many"}).status_code == 400
+    assert client.post("/api/league/joinable", headers=headers, json={"membership_locked": "maybe"}).status_code == 400
+    assert client.post("/api/league/joinable", headers=headers, json={"after_id": 999999}).status_code == 400
+
+    # "false" means unlocked, and leagues whose flag was never set count as unlocked
+    with app.app_context():
+        League.query.filter_by(name="Alpha 0").update({"membership_locked": None})
+        db.session.commit()
+    unlocked = client.post("/api/league/joinable", headers=headers, json={"name": "alpha", "membership_locked": "false"}).get_json()["leagues"]
+    assert "Alpha 0" in [league["name"] for league in unlocked]
+    locked = client.post("/api/league/joinable", headers=headers, json={"membership_locked": "true"}).get_json()["leagues"]
+    assert [league["name"] for league in locked] == ["Beta"]
+
+def test_player_search_follows_catalog_changes(client, user_token, monkeypatch):
+    import app as app_module
+    from app import populate_player_table
+    catalog = [
+        {"id": f"nhl{i}", "position": "C" if i % 2 else "D", "team": "Boston Bruins", "last_name": f"Skater{i}", "first_name": "Player"}
+        for i in range(30)
+    ]
+    monkeypatch.setattr(app_module, "return_all_player_details", lambda sport, league: catalog)
+    headers = {"Authorization": f"Bearer {user_token}"}
+
+    with app.app_context():
+        populate_player_table("nhl")
+    page = client.get("/api/players/nhl/search?q=skater&position=C&limit=10", headers=headers).get_json()
+    assert page["total"] == 15 and page["has_more"] and len(page["players"]) == 10
+
+    catalog[0] = dict(catalog[0], last_name="Goalie")
+    with app.app_context():
+        populate_player_table("nhl")
+    found = client.get("/api/players/nhl/search?q=goalie", headers=headers).get_json()["players"]
+    assert [player["id"] for player in found] == ["nhl0"]
+
+    assert client.get("/api/players/xfl/search?q=a", headers=headers).status_code == 400
+    assert client.get("/api/players/nhl/search?limit=x", headers=headers).status_code == 400
+
+def test_player_catalog_snapshot_is_conditional(client, user_token, monkeypatch):
+    import gzip
+    import app as app_module
+    from flask_jwt_extended import create_access_token
+    from app import populate_player_table
+
+    catalog = [{"id": f"nba{i}", "position": "G", "team": "Boston Celtics", "last_name": f"Guard{i}", "first_name": "Player"} for i in range(5)]
+    monkeypatch.setattr(app_module, "return_all_player_details", lambda sport, league: catalog)
+    with app.app_context():
+        populate_player_table("nba")
+        # close to expiry, so refresh_expiring_jwts would try to add a new token to the body
+        headers = {"Authorization": f"Bearer {create_access_token(identity=1, expires_delta=timedelta(minutes=5))}"}
+
+    plain = client.get("/api/players/nba", headers=headers)
+    assert plain.status_code == 200 and len(plain.get_json()["players"]) == 5
+
+    packed = client.get("/api/players/nba", headers={**headers, "Accept-Encoding": "gzip"})
+    assert packed.headers["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(packed.data)) == json.loads(plain.data)
+
+    etag = packed.headers["ETag"]
+    revalidated = client.get("/api/players/nba", headers={**headers, "Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert revalidated.status_code == 304 and revalidated.data == b""
+
+    catalog[0] = dict(catalog[0], team="FA")
+    with app.app_context():
+        populate_player_table("nba")
+    changed = client.get("/api/players/nba", headers={**headers, "Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["ETag"] != etag
+
+def test_draft_picks_are_validated_persisted_and_broadcast(client, user_token, monkeypatch):
+    import app as app_module
+    from app import socketio, sqids, Player
+
+    with app.app_context():
+        league = League(name="Draft League", commissioner_id=1, sport="nba")
+        db.session.add(league)
+        db.session.commit()
+        first = Team(name="First", owner_id=1, league_id=league.id, rank=1)
+        db.session.add(first)
+        db.session.add_all([Player(id=f"nba{i}", sport="basketball", position="C", last_name=f"Center{i}", first_name="Player") for i in range(4)])
+        db.session.commit()
+        league_id, first_id = league.id, first.id
+
+    commissioner = socketio.test_client(app, query_string=f"jwt={user_token}")
+    commissioner.emit("join_draft", {"league_id": league_id})
+    assert commissioner.get_received()[-1]["args"][0]["order"] == [first_id]
+
+    # a team joining after the room was built is part of the draft order
+    client.post("/api/signup", json={"username": "user2", "email": "user2@example.com", "password": "password123"})
+    other_token = client.post("/api/login", json={"username": "user2", "password": "password123"}).get_json()["access_token"]
+    invite = client.post("/api/league/getcode", headers={"Authorization": f"Bearer {user_token}"}, json={"url": sqids.encode([league_id])}).get_json()["code"]
+    client.post("/api/league/join", headers={"Authorization": f"Bearer {other_token}"}, json={"code": invite, "name": "Second"})
+    with app.app_context():
+        second_id = Team.query.filter_by(league_id=league_id, owner_id=2).one().id
+
+    manager = socketio.test_client(app, query_string=f"jwt={other_token}")
+    manager.emit("join_draft", {"league_id": league_id})
+    state = manager.get_received()[-1]
+    assert state["name"] == "draft_state" and state["args"][0]["order"] == [first_id, second_id]
+    assert state["args"][0]["on_clock"] is None
+
+    # no picks before the start, and only the commissioner can start
+    commissioner.emit("draft_pick", {"league_id": league_id, "player_id": "nba0"})
+    assert commissioner.get_received()[-1]["name"] == "draft_error"
+    manager.emit("start_draft", {"league_id": league_id})
+    assert manager.get_received()[-1]["name"] == "draft_error"
+    commissioner.emit("start_draft", {"league_id": league_id})
+    state = manager.get_received()[-1]
+    assert state["name"] == "draft_state" and state["args"][0]["started"] and state["args"][0]["on_clock"] == first_id
+
+    # out of turn
+    manager.emit("draft_pick", {"league_id": league_id, "player_id": "nba0"})
+    assert manager.get_received()[-1]["name"] == "draft_error"
+
+    commissioner.emit("draft_pick", {"league_id": league_id, "player_id": "nba0"})
+    pick = manager.get_received()[-1]
+    assert pick["name"] == "draft_pick"
+    assert pick["args"][0]["slot"] == "C" and pick["args"][0]["on_clock"] == second_id
+    assert pick["args"][0]["league_id"] == league_id
+
+    # already drafted
+    manager.emit("draft_pick", {"league_id": league_id, "player_id": "nba0"})
+    assert manager.get_received()[-1]["name"] == "draft_error"
+    manager.emit("draft_pick", {"league_id": league_id, "player_id": "nba1"})
+    assert commissioner.get_received()[-1]["args"][0]["team_id"] == second_id
+
+    with app.app_context():
+        rows = {(row.player_id, row.team_id, row.starting_position, row.draft_pick) for row in TeamPlayer.query.filter_by(league_id=league_id)}
+    assert rows == {("nba0", first_id, "C", 1), ("nba1", second_id, "C", 2)}
+
+    # joining mid-draft would reshuffle the snake order under the picks already made
+    client.post("/api/signup", json={"username": "user3", "email": "user3@example.com", "password": "password123"})
+    late_token = client.post("/api/login", json={"username": "user3", "password": "password123"}).get_json()["access_token"]
+    late = client.post("/api/league/join", headers={"Authorization": f"Bearer {late_token}"}, json={"code": invite, "name": "Late"})
+    assert late.status_code == 403
+    with app.app_context():
+        assert Team.query.filter_by(league_id=league_id).count() == 2
+
+    # the room is rebuilt from the persisted picks after a restart
+    app_module.draft_rooms.clear()
+    manager.emit("join_draft", {"league_id": league_id})
+    assert manager.get_received()[-1]["args"][0]["on_clock"] == second_id
+
+    # once the draft has ended, a dropped player does not reopen picking
+    with app.app_context():
+        from app import Matchup
+        db.session.add(Matchup(league_id=league_id, week_num=1, home_team_id=first_id, away_team_id=second_id))
+        TeamPlayer.query.filter_by(league_id=league_id, player_id="nba1").delete()
+        db.session.commit()
+    app_module.draft_rooms.clear()
+    manager.emit("join_draft", {"league_id": league_id})
+    state = manager.get_received()[-1]["args"][0]
+    assert state["complete"] and state["on_clock"] is None
+    manager.emit("draft_pick", {"league_id": league_id, "player_id": "nba2"})
+    assert manager.get_received()[-1]["name"] == "draft_error"
+    commissioner.disconnect()
+    manager.disconnect()
+
+
+def test_failed_pick_commit_leaves_session_and_room_clean(client, monkeypatch):
+    import app as app_module
+    from app import Player, make_draft_pick, draft_room
+
+    with app.app_context():
+        db.session.add(User(id=1, username="commish", email="c@example.com", password="x"))
+        league = League(name="Flaky", commissioner_id=1, sport="nba", draft_time=datetime.now() - timedelta(minutes=1))
+        db.session.add(league)
+        db.session.commit()
+        db.session.add(Team(name="Only", owner_id=1, league_id=league.id))
+        db.session.add(Player(id="nba0", sport="basketball", position="C", last_name="Center", first_name="Player"))
+        db.session.commit()
+        league_id = league.id
+
+        def failing_commit():
+            raise RuntimeError("database went away")
+        monkeypatch.setattr(db.session, "commit", failing_commit)
+        with pytest.raises(RuntimeError):
+            make_draft_pick(league_id, 1, "nba0")
+        monkeypatch.undo()
+
+        assert not db.session.new and draft_room(league_id).picks == []
+        pick, room = make_draft_pick(league_id, 1, "nba0")
+        assert pick["pick"] == 1 and TeamPlayer.query.filter_by(league_id=league_id).count() == 1
+
+def test_startup_upgrades_tables_from_an_older_release(client):
+    import sqlalchemy as sa
+    from app import upgrade_database
+
+    with app.app_context():
+        # a team_players table created before draft_pick existed, with no migration history
+        with db.engine.begin() as conn:
+            conn.execute(sa.text("DROP TABLE team_players"))
+            conn.execute(sa.text(
+                "CREATE TABLE team_players (player_id VARCHAR(20), league_id INTEGER, team_id INTEGER, "
+                "starting_position VARCHAR(5), PRIMARY KEY (player_id, league_id))"
+            ))
+        try:
+            upgrade_database()
+            columns = {column["name"] for column in sa.inspect(db.engine).get_columns("team_players")}
+            assert "draft_pick" in columns
+            # a second start is a no-op
+            upgrade_database()
+        finally:
+            with db.engine.begin() as conn:
+                conn.execute(sa.text("DROP TABLE IF EXISTS alembic_version"))
@@ -141,4 +141,373 @@ def test_create_league_unauthorized(client):
         "sport": "nfl",
         "team_name": "No Token Team"
     })
-    assert response.status_code == 401
\ No newline at end of file
+    assert response.status_code == 401
+
+def test_score_matrix_matches_row_scoring():
+    from app import WeeklyStatsFootball, DailyStatsBasketball
+    from scoring import score_matrix, FOOTBALL_WEIGHTS, BASKETBALL_WEIGHTS
+
+    standard = {"points_passtd": 4.0, "points_passyd": 0.04, "points_shutout": 10.0, "points_7_13_pa": 4.0, "points_35plus_pa": -4.0}
+    ppr = dict(standard, points_reception=1.0, points_passtd=6.0)
+
+    def stat_line(weights, **stats):
+        return {**{stat: 0 for stat in weights}, **stats}
+
+    football = [
+        WeeklyStatsFootball(**stat_line(FOOTBALL_WEIGHTS, passing_tds=2, passing_yds=250, points_allowed=0)),
+        WeeklyStatsFootball(**stat_line(FOOTBALL_WEIGHTS, receptions=7, points_allowed=13)),
+        WeeklyStatsFootball(**stat_line(FOOTBALL_WEIGHTS, points_allowed=41)),
+    ]
+    points = score_matrix(football, [standard, ppr], FOOTBALL_WEIGHTS, points_allowed_column="points_allowed")
+    assert points.shape == (3, 2)
+    for i, row in enumerate(football):
+        for j, ruleset in enumerate([standard, ppr]):
+            assert points[i, j] == pytest.approx(row.calculate_fantasy_points(ruleset))
+
+    basketball = [DailyStatsBasketball(**stat_line(BASKETBALL_WEIGHTS, points=31, rebounds=12, double_doubles=1))]
+    points = score_matrix(basketball, [{"points_point": 1.0, "points_rebound": 1.2, "points_double_double": 1.5}], BASKETBALL_WEIGHTS)
+    assert points[0, 0] == pytest.approx(31 + 12 * 1.2 + 1.5)
+    assert score_matrix([], [standard], BASKETBALL_WEIGHTS).shape == (0, 1)
+
+
+def test_resolve_team_id_reads_ref_without_network(monkeypatch):
+    import scraping
+
+    def no_network(*args, **kwargs):
+        raise AssertionError("team refs should resolve without a request")
+
+    monkeypatch.setattr(scraping.http_client, "get", no_network)
+    ref = "http://sports.core.api.espn.com/v2/sports/football/leagues/nfl/seasons/2024/teams/12?lang=en&region=us"
+    assert scraping.resolve_team_id(ref) == 12
+    assert scraping.TEAM_REF_CACHE[ref] == 12
+
+
+def test_season_window_is_fetched_once(monkeypatch, tmp_path):
+    import scraping
+
+    calls = []
+
+    def fake_fetch(year, sport, league):
+        calls.append((year, sport, league))
+        return {"start_date": "2025-09-04T07:00Z", "end_date": "2026-02-12T07:59Z"}
+
+    monkeypatch.setattr(scraping, "SEASON_CACHE_PATH", str(tmp_path / "seasons.json"))
+    monkeypatch.setattr(scraping, "season_cache", None)
+    monkeypatch.setattr(scraping, "fetch_season_start_end_date", fake_fetch)
+
+    for _ in range(3):
+        assert scraping.get_season_start_end_date(2025, "football", "nfl")["start_date"] == "2025-09-04T07:00Z"
+    assert calls == [(2025, "football", "nfl")]
+
+    # a fresh process reads the window back from disk
+    monkeypatch.setattr(scraping, "season_cache", None)
+    scraping.get_season_start_end_date(2025, "football", "nfl")
+    assert len(calls) == 1
+
+
+def test_update_player_stats_isolates_failing_sport(monkeypatch):
+    import app as app_module
+
+    finished = []
+
+    def fake_ingest(league_sport, revalidate=False):
+        if league_sport == "nfl":
+            raise RuntimeError("summary endpoint timed out")
+        finished.append(league_sport)
+
+    monkeypatch.setattr(app_module, "ingest_sport", fake_ingest)
+    app_module.update_player_stats()
+    assert sorted(finished) == ["mlb", "nba", "nhl"]
+
+
+def test_scoreboard_is_cached_and_revalidated(client, monkeypatch):
+    import app as app_module
+
+    calls = []
+
+    def fake_fetch(url):
+        calls.append(url)
+        return {"events": [{"id": "1", "status": {"type": {"state": "post"}}}]}
+
+    app_module.espn_cache.clear()
+    monkeypatch.setattr(app_module, "fetch_espn_json", fake_fetch)
+
+    first = client.get("/api/scoreboard?sport=nba&dates=20250107")
+    assert first.status_code == 200
+    assert first.get_json()["events"][0]["id"] == "1"
+    assert first.headers["ETag"]
+
+    again = client.get("/api/scoreboard?sport=nba&dates=20250107", headers={"If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304
+    assert len(calls) == 1
+
+
+def test_proxy_cache_coalesces_concurrent_misses():
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+    from proxy_cache import ProxyCache
+
+    cache = ProxyCache()
+    release = threading.Event()
+    calls = []
+
+    def slow_fetch():
+        calls.append(1)
+        release.wait(5)
+        return {"ok": True}
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        futures = [pool.submit(cache.get, "scoreboard:nba", slow_fetch, 60) for _ in range(8)]
+        release.set()
+        etags = {future.result().etag for future in futures}
+
+    assert len(calls) == 1
+    assert len(etags) == 1
+
+
+def test_proxy_cache_shares_a_failed_fetch_with_waiters():
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+    from proxy_cache import ProxyCache
+
+    parked = threading.Semaphore(0)
+
+    class ParkingEvent(threading.Event):
+        def wait(self, timeout=None):
+            parked.release()
+            return super().wait(timeout)
+
+    cache = ProxyCache(event_factory=ParkingEvent)
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def failing_fetch():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        raise ConnectionError("upstream is down")
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        leader = pool.submit(cache.get, "scoreboard:nba", failing_fetch, 60)
+        started.wait(5)
+        waiters = [pool.submit(cache.get, "scoreboard:nba", failing_fetch, 60) for _ in range(7)]
+        # every waiter is parked on the in-flight fetch before it fails
+        for _ in waiters:
+            assert parked.acquire(timeout=5)
+        release.set()
+        errors = [future.exception() for future in [leader, *waiters]]
+
+    assert len(calls) == 1
+    assert all(isinstance(error, ConnectionError) for error in errors)
+    assert not cache._inflight
+
+
+def test_http_client_retries_within_budget(monkeypatch):
+    import http_client
+
+    class FakeResponse:
+        def __init__(self, status_code):
+            self.status_code = status_code
+
+    statuses = [503, 503, 200]
+    monkeypatch.setattr(http_client.session, "get", lambda url, **kwargs: FakeResponse(statuses.pop(0)))
+    monkeypatch.setattr(http_client.time, "sleep", lambda seconds: None)
+
+    monkeypatch.setattr(http_client, "retry_budget", http_client.RetryBudget(initial=10))
+    assert http_client.get("https://example.com/a").status_code == 200
+
+    # an empty budget hands back the failure instead of retrying
+    statuses[:] = [503, 200]
+    monkeypatch.setattr(http_client, "retry_budget", http_client.RetryBudget(initial=0))
+    assert http_client.get("https://example.com/a").status_code == 503
+
+
+def test_async_retry_resends_request_headers(monkeypatch):
+    import asyncio
+    import http_client
+
+    sent = []
+
+    class FakeResponse:
+        def __init__(self, status):
+            self.status = status
+            self.headers = {"Server": "upstream", "Content-Length": "0"}
+
+        async def text(self):
+            return ""
+
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            return False
+
+    class FakeClient:
+        statuses = [503, 200]
+
+        def get(self, url, headers=None):
+            sent.append(headers)
+            return FakeResponse(self.statuses.pop(0))
+
+    async def no_sleep(seconds):
+        return None
+
+    monkeypatch.setattr(http_client.asyncio, "sleep", no_sleep)
+    monkeypatch.setattr(http_client, "retry_budget", http_client.RetryBudget(initial=10))
+    status, _, headers = asyncio.run(http_client.async_get(FakeClient(), "https://example.com/a", headers={"If-None-Match": "abc"}))
+
+    assert status == 200 and headers["Server"] == "upstream"
+    assert sent == [{"If-None-Match": "abc"}, {"If-None-Match": "abc"}]
+
+def test_score_updates_reach_matchup_room(client, access_token):
+    import threading
+    from app import socketio, sqids, publish_score_updates, flush_socket_events
+
+    socket_client = socketio.test_client(app, query_string=f"jwt={access_token}")
+    socket_client.emit("join_matchup", {"matchup_code": sqids.encode([7])})
+    socket_client.get_received()
+
+    # published from a scheduler-style OS thread, delivered by the server loop
+    worker = threading.Thread(target=publish_score_updates, args=([{
+        "matchup_id": 7, "league_id": 1, "week": 3, "home_team_id": 1, "away_team_id": 2,
+        "home_score": 11.0, "away_score": 4.0, "home_delta": 3.0, "away_delta": 0,
+    }],))
+    worker.start()
+    worker.join()
+    assert socket_client.get_received() == []
+    flush_socket_events()
+
+    received = socket_client.get_received()
+    assert [event["name"] for event in received] == ["matchup_score"]
+    assert received[0]["args"][0]["home_score"] == 11.0
+    socket_client.disconnect()
+
+
+def test_live_polling_follows_game_states(monkeypatch):
+    from datetime import datetime, timedelta, timezone
+    import app as app_module
+
+    tipoff = datetime.now(timezone.utc) + timedelta(hours=3)
+    scoreboard = [
+        {"id": "1", "state": "in", "start": None, "teams": ["a", "b"]},
+        {"id": "2", "state": "pre", "start": tipoff, "teams": ["c", "d"]},
+    ]
+    ingested = []
+    monkeypatch.setattr(app_module, "get_daily_game_states", lambda sport, league: scoreboard)
+    monkeypatch.setattr(app_module, "ingest_sport", lambda league_sport, game_ids: ingested.append(game_ids))
+    monkeypatch.setattr(app_module, "game_states", {})
+
+    # only the live game is fetched, and polled again soon
+    assert app_module.track_live_games("nba") == app_module.LIVE_POLL_SECONDS
+    assert ingested == [["1"]]
+
+    # going final triggers exactly one more pass, then the job sleeps until the next start
+    scoreboard[0]["state"] = "post"
+    assert app_module.track_live_games("nba") == app_module.IDLE_POLL_SECONDS
+    assert app_module.track_live_games("nba") == app_module.IDLE_POLL_SECONDS
+    assert ingested == [["1"], ["1"]]
+
+
+def test_doubleheader_partner_is_polled_with_live_game():
+    from app import games_to_poll
+
+    games = [
+        {"id": "1", "state": "post", "start": None, "teams": ["nyy", "bos"]},
+        {"id": "2", "state": "in", "start": None, "teams": ["bos", "nyy"]},
+        {"id": "3", "state": "post", "start": None, "teams": ["lad", "sf"]},
+    ]
+    assert games_to_poll(games, {"1": "post", "3": "post"}) == {"1", "2"}
+
+
+def test_unchanged_and_final_games_are_not_reparsed(monkeypatch):
+    import scraping
+
+    fetched = []
+
+    def fake_game_data(sport, league, game_ids, concurrency=10, etags=None):
+        fetched.append(list(game_ids))
+        return {
+            "live": {"boxscore": ({"new": True}, '"v2"', "changed")},
+            "same": {"boxscore": (None, '"v1"', None)},
+        }
+
+    monkeypatch.setattr(scraping, "get_all_game_data", fake_game_data)
+    monkeypatch.setattr(scraping, "GAME_CACHE", {
+        "final": {"day": "20250107", "final": True, "etags": {}, "digests": {"boxscore": "a"}, "stats": {"stats": {"p1": {}}}},
+        "same": {"day": "20250107", "final": False, "etags": {}, "digests": {"boxscore": "b"}, "stats": {"stats": {"p2": {}}}},
+        "live": {"day": "20250107", "final": False, "etags": {}, "digests": {"boxscore": "c"}, "stats": {"stats": {}}},
+    })
+
+    changed, reused, validators = scraping.fetch_changed_games("basketball", "nba", ["final", "same", "live"])
+
+    assert fetched == [["same", "live"]]
+    assert list(changed) == ["live"]
+    assert set(reused) == {"final", "same"}
+    assert validators["live"][1] == {"boxscore": "changed"}
+
+
+def test_player_index_prefix_fuzzy_and_filters():
+    from player_search import PlayerIndex
+
+    index = PlayerIndex([
+        {"id": "1", "first_name": "LeBron", "last_name": "James", "position": "SF", "team_name": "LAL"},
+        {"id": "2", "first_name": "James", "last_name": "Harden", "position": "PG", "team_name": "LAC"},
+        {"id": "3", "first_name": "Nikola", "last_name": "Jokić", "position": "C", "team_name": "DEN"},
+        {"id": "4", "first_name": "D'Angelo", "last_name": "Russell", "position": "PG", "team_name": "BKN"},
+    ])
+
+    assert [p["id"] for p in index.search("james")[0]] == ["2", "1"]
+    assert [p["id"] for p in index.search("jokic")[0]] == ["3"]
+    assert [p["id"] for p in index.search("dangelo")[0]] == ["4"]
+    assert [p["id"] for p in index.search("lebrun jmes")[0]] == ["1"]
+    assert [p["id"] for p in index.search("", position="pg")[0]] == ["2", "4"]
+    assert [p["id"] for p in index.search("j", team="DEN")[0]] == ["3"]
+
+    page, total = index.search("", offset=1, limit=2)
+    assert total == 4 and [p["id"] for p in page] == ["1", "3"]
+
+
+def test_draft_room_snake_order_and_slots():
+    from datetime import datetime, timedelta
+    from draft import DraftRoom, DraftError
+
+    room = DraftRoom(1, "nfl", [10, 20], {"QB": 1, "RB": 1, "FLX": 1}, {"FLX": {"RB", "WR"}}, rounds=4)
+    # nothing is open until the draft time passes or the commissioner starts it
+    assert room.on_clock() is None
+    with pytest.raises(DraftError):
+        room.validate(10, "rb1", "RB")
+    room.start_time = datetime.now() + timedelta(hours=1)
+    assert not room.started and room.state()["starts_in"] > 0
+    room.start(datetime.now())
+    with pytest.raises(DraftError):
+        room.start(datetime.now())
+
+    assert room.on_clock() == 10
+    assert room.record(10, "rb1", room.validate(10, "rb1", "RB"))["slot"] == "RB"
+    assert room.on_clock() == 20
+    room.record(20, "qb1", room.validate(20, "qb1", "QB"))
+    # snake: the second round starts with the team that picked last
+    assert room.on_clock() == 20
+    room.record(20, "qb2", room.validate(20, "qb2", "QB"))
+    assert room.filled[20]["BEN"] == 1
+
+    with pytest.raises(DraftError):
+        room.validate(10, "rb1", "RB")
+    with pytest.raises(DraftError):
+        room.validate(20, "rb2", "RB")
+    assert room.validate(10, "rb2", "RB") == "FLX"
+    room.record(10, "rb2", "FLX")
+    assert room.validate(10, "rb3", "RB") == "BEN"
+
+    restored = DraftRoom(1, "nfl", [10, 20], {"QB": 1, "RB": 1, "FLX": 1}, {"FLX": {"RB", "WR"}}, rounds=4,
+                         picks=[(pick["team_id"], pick["player_id"], pick["slot"]) for pick in room.picks])
+    assert restored.state()["on_clock"] == room.on_clock() and restored.taken == room.taken
+
+    # picks from a team that has left the league are ignored
+    orphaned = DraftRoom(1, "nfl", [10, 20], {"QB": 1}, {}, rounds=4, picks=[(99, "qb9", "QB"), (10, "qb1", "QB")])
+    assert orphaned.taken == {"qb1": 10} and orphaned.on_clock() == 20
+
+    empty = DraftRoom(2, "nfl", [], {"QB": 1}, {}, rounds=4)
+    assert not empty.complete and empty.state()["started"] is False and empty.on_clock() is None
+    with pytest.raises(DraftError):
+        empty.validate(None, "qb1", "QB")
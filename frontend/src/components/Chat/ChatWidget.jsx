@@ -40,6 +40,7 @@ const ChatWidget = () => {
     // League Chat state
     const [leagues, setLeagues] = useState([]);
     const [messagesByLeague, setMessagesByLeague] = useState({});
+    const [hasMoreByLeague, setHasMoreByLeague] = useState({});
     const [selectedLeagueId, setSelectedLeagueId] = useState(null);
     const [leagueInput, setLeagueInput] = useState("");
     const leagueMessagesEndRef = useRef(null);
@@ -166,7 +167,7 @@ const ChatWidget = () => {
 
                 // Fetch latest message for each league
                 leaguesArr.forEach((league) => {
-                    fetch(`/api/league/${league.league_id}/messages`, {
+                    fetch(`/api/league/${league.league_id}/messages?limit=1`, {
                         headers: { Authorization: "Bearer " + token },
                     })
                         .then((res) => res.json())
@@ -237,9 +238,29 @@ const ChatWidget = () => {
                     ...prev,
                     [selectedLeagueId]: Array.isArray(data.messages) ? data.messages : [],
                 }));
+                setHasMoreByLeague((prev) => ({ ...prev, [selectedLeagueId]: !!data.has_more }));
             });
     }, [token, selectedLeagueId]);
 
+    // Page back through a league's history, one page above the oldest loaded message
+    const loadOlderLeagueMessages = () => {
+        const loaded = messagesByLeague[selectedLeagueId] || [];
+        if (!token || !selectedLeagueId || loaded.length === 0) return;
+        const leagueId = selectedLeagueId;
+        fetch(`/api/league/${leagueId}/messages?before_id=${loaded[0].id}`, {
+            headers: { Authorization: "Bearer " + token },
+        })
+            .then((res) => res.json())
+            .then((data) => {
+                if (!Array.isArray(data.messages)) return;
+                setMessagesByLeague((prev) => ({
+                    ...prev,
+                    [leagueId]: [...data.messages, ...(prev[leagueId] || [])],
+                }));
+                setHasMoreByLeague((prev) => ({ ...prev, [leagueId]: !!data.has_more }));
+            });
+    };
+
     // Fetch messages for selected user
     useEffect(() => {
         if (!token || !selectedUserId) return;
@@ -452,6 +473,8 @@ const ChatWidget = () => {
                                 setLeagues={setLeagues}
                                 messagesByLeague={messagesByLeague}
                                 setMessagesByLeague={setMessagesByLeague}
+                                hasMore={!!hasMoreByLeague[selectedLeagueId]}
+                                loadOlder={loadOlderLeagueMessages}
                                 selectedLeagueId={selectedLeagueId}
                                 setSelectedLeagueId={setSelectedLeagueId}
                                 currentUserId={currentUserId}
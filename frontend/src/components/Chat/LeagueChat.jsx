@@ -1,6 +1,7 @@
 // src/components/Chat/LeagueChat.jsx
 
 import React, { useEffect } from "react";
+import { useTranslation } from 'react-i18next';
 import "./Chat.css";
 
 function formatMessageMeta(name, timestamp) {
@@ -32,8 +33,12 @@ const LeagueChat = ({
     userMap,
     handleSend,
     setSlideDirection,
-    setSelectedUserId
+    setSelectedUserId,
+    hasMore,
+    loadOlder
 }) => {
+    const { t } = useTranslation();
+
     // Sort leagues by latestTimestamp (most recent first)
     const sortedLeagues = [...leagues].sort((a, b) => {
         if (!b.latestTimestamp) return -1;
@@ -48,12 +53,14 @@ const LeagueChat = ({
         }
     }, [selectedLeagueId, messagesEndRef]);
 
-    // Smooth scroll when new messages arrive
+    // Smooth scroll when new messages arrive (not when older ones are prepended)
+    const selectedMessages = messagesByLeague[selectedLeagueId] || [];
+    const lastMessageId = selectedMessages.length ? selectedMessages[selectedMessages.length - 1].id : null;
     useEffect(() => {
         if (messagesEndRef && messagesEndRef.current) {
             messagesEndRef.current.scrollIntoView({ behavior: "smooth" });
         }
-    }, [messagesByLeague, selectedLeagueId, messagesEndRef]);
+    }, [lastMessageId, selectedLeagueId, messagesEndRef]);
 
     // League List View
     if (!selectedLeagueId) {
@@ -99,7 +106,12 @@ const LeagueChat = ({
                 </span>
             </div>
             <div className="chat-messages">
-                {(messagesByLeague[selectedLeagueId] || []).map((msg) => {
+                {hasMore && (
+                    <button onClick={loadOlder} className="chat-load-older">
+                        {t('buttons.loadOlder')}
+                    </button>
+                )}
+                {selectedMessages.map((msg) => {
                     const isMe = msg.sender_id === currentUserId;
                     return (
                         <div
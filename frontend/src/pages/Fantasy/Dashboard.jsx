@@ -1,4 +1,4 @@
-import React, { useContext, useEffect, useState } from 'react';
+import React, { useContext, useEffect, useRef, useState } from 'react';
 import { RedirectContext } from "../../App";
 import { useNavigate, useLocation } from 'react-router-dom';
 import { getAuthToken } from "../../components/utils/auth";
@@ -10,6 +10,13 @@ const FantasyDashboard = () => {
     const [leagues, setLeagues] = useState([]);
     const [joinableLeagues, setJoinableLeagues] = useState([]);
     const [showJoinable, setShowJoinable] = useState(false);
+    const [joinableFilters, setJoinableFilters] = useState({ name: "", open_slots: 0 });
+    const [nextAfterId, setNextAfterId] = useState(null);
+    // only the latest directory request may update the list; older ones are aborted
+    const joinableRequest = useRef(null);
+    const searchTimer = useRef(null);
+    // the filters the shown list was fetched with; "load more" continues those
+    const listedFilters = useRef(joinableFilters);
     const { redirectLocation, setRedirectLocation } = useContext(RedirectContext);
     const navigate = useNavigate();
     const { t } = useTranslation();
@@ -17,23 +24,59 @@ const FantasyDashboard = () => {
 
     const createLeague = () => navigate("/fantasy/create");
 
-    const fetchJoinableLeagues = async () => {
+    // afterId continues the current listing; without it the directory starts over
+    const fetchJoinableLeagues = async (filters = joinableFilters, afterId = null) => {
+        // a fresh search in flight replaces the list anyway; its cursor comes with it
+        if (afterId && joinableRequest.current) return;
+        joinableRequest.current?.abort();
+        const controller = new AbortController();
+        joinableRequest.current = controller;
         try {
             const response = await fetch("/api/league/joinable", {
                 method: "POST",
                 headers: {
                     "Content-Type": "application/json",
                     "Authorization": 'Bearer ' + authToken
-                }
+                },
+                body: JSON.stringify({ ...filters, after_id: afterId }),
+                signal: controller.signal,
             });
             const data = await response.json();
-            setJoinableLeagues(data.leagues || []);
+            // a newer search started while this one was in flight
+            if (joinableRequest.current !== controller) return;
+            const page = data.leagues || [];
+            listedFilters.current = filters;
+            setJoinableLeagues(prev => afterId ? [...prev, ...page] : page);
+            setNextAfterId(data.next_after_id || null);
             setShowJoinable(true);
         } catch (error) {
-            console.error("Error fetching joinable leagues:", error);
+            if (error.name !== "AbortError") {
+                console.error("Error fetching joinable leagues:", error);
+            }
+        } finally {
+            if (joinableRequest.current === controller) {
+                joinableRequest.current = null;
+            }
+        }
+    };
+
+    // typing waits for a pause before searching; toggles apply right away
+    const updateJoinableFilters = (changes, delay = 0) => {
+        const filters = { ...joinableFilters, ...changes };
+        setJoinableFilters(filters);
+        clearTimeout(searchTimer.current);
+        if (delay) {
+            searchTimer.current = setTimeout(() => fetchJoinableLeagues(filters), delay);
+        } else {
+            fetchJoinableLeagues(filters);
         }
     };
 
+    useEffect(() => () => {
+        clearTimeout(searchTimer.current);
+        joinableRequest.current?.abort();
+    }, []);
+
     const navToTeamHub = async (team) => {
         try {
             const response = await fetch("/api/team/geturl", {
@@ -90,7 +133,7 @@ const FantasyDashboard = () => {
                 <button className="btn btn-success" onClick={createLeague}>
                     {t('fantasy.createLeague')}
                 </button>
-                <button className="btn btn-outline-primary" onClick={fetchJoinableLeagues}>
+                <button className="btn btn-outline-primary" onClick={() => fetchJoinableLeagues()}>
                     {t('fantasy.findLeague')}
                 </button>
             </div>
@@ -98,6 +141,25 @@ const FantasyDashboard = () => {
             {showJoinable && (
                 <div className="mt-4">
                     <h3>{t('fantasy.availableLeagues')}</h3>
+                    <div className="mb-3 d-flex gap-3 align-items-center">
+                        <input
+                            type="search"
+                            className="form-control w-auto"
+                            placeholder={t('fantasy.searchLeagues')}
+                            value={joinableFilters.name}
+                            onChange={(e) => updateJoinableFilters({ name: e.target.value }, 300)}
+                        />
+                        <div className="form-check">
+                            <input
+                                id="open-only"
+                                type="checkbox"
+                                className="form-check-input"
+                                checked={joinableFilters.open_slots > 0}
+                                onChange={(e) => updateJoinableFilters({ open_slots: e.target.checked ? 1 : 0 })}
+                            />
+                            <label className="form-check-label" htmlFor="open-only">{t('fantasy.openOnly')}</label>
+                        </div>
+                    </div>
                     {joinableLeagues.length === 0 ? (
                         <p className="text-muted">{t('fantasy.noLeagues')}</p>
                     ) : (
@@ -110,15 +172,23 @@ const FantasyDashboard = () => {
                                             <p className="mb-1">
                                                 <strong>{t('fantasy.sport')}:</strong> {league.sport}
                                             </p>
-                                            <p className="mb-0">
+                                            <p className="mb-1">
                                                 <strong>{t('fantasy.commissioner')}:</strong> {league.commissioner}
                                             </p>
+                                            <p className="mb-0">
+                                                <strong>{t('fantasy.openSlots')}:</strong> {league.open_slots}
+                                            </p>
                                         </div>
                                     </div>
                                 </div>
                             ))}
                         </div>
                     )}
+                    {nextAfterId && (
+                        <button className="btn btn-outline-secondary" onClick={() => fetchJoinableLeagues(listedFilters.current, nextAfterId)}>
+                            {t('fantasy.loadMore')}
+                        </button>
+                    )}
                 </div>
             )}
 
@@ -2,38 +2,33 @@ import React, { useState, useEffect } from "react";
 import axios from "axios";
 import { useParams, useLocation } from "react-router-dom";
 import FantasyHomeButton from "../../../components/FantasyHomeButton";
+import socket from "../../../socket";
 import { useTranslation } from 'react-i18next';
 
 function Draft() {
-  // initial player limits:
-  const playerLimits = {
-    // these r kinda arbitrary but it works based on what positions we have
-    nfl: 21,
-    nba: 18,
-    mlb: 24,
-    nhl: 21,
-    ncaaf: 21
-  }
   // State for league information
   const [league, setLeague] = useState(null);
   // State for teams in the league
   const [teams, setTeams] = useState([]);
-  // State for available players
-  const [players, setPlayers] = useState([]);
-  // State for the draft status
+  // Full player catalog for the sport
+  const [catalog, setCatalog] = useState([]);
+  // Picks made so far, as reported by the server's draft room
+  const [picks, setPicks] = useState([]);
+  // State for the draft status; the server decides who is on the clock
   const [draftStatus, setDraftStatus] = useState({
     currentTeam: null,
     currentPick: 1,
+    isStarted: false,
     isActive: false,
-    isSnakeDraft: true // Toggle for snake draft format
+    isSnakeDraft: true
   });
-  // State for drafted players by team
-  const [draftedPlayers, setDraftedPlayers] = useState({});
   // State for loading
   const [loading, setLoading] = useState(true);
   // State for search and filters
   const [searchTerm, setSearchTerm] = useState("");
   const [positionFilter, setPositionFilter] = useState("All");
+  // Server-side name search results; null while the search box is empty
+  const [searchResults, setSearchResults] = useState(null);
   // State for user's team
   const [userTeam, setUserTeam] = useState(null);
   const [sport, setSport] = useState(null);
@@ -45,21 +40,12 @@ function Draft() {
   const leagueCode = code || queryParams.get("code");
   const { t } = useTranslation();
 
-  // Add this near the top of your component
-  useEffect(() => {
-    console.log("League code from URL:", code);
-    console.log("League code from query params:", queryParams.get("code"));
-    console.log("Final leagueCode used:", leagueCode);
-  }, []);
-
   // Fetch league information
   useEffect(() => {
     if (leagueCode) {
       setLoading(true);
       const fetchLeague = async () => {
         try {
-          console.log("Fetching league with code:", leagueCode);
-
           // Check if token exists
           const token = localStorage.getItem('authToken');
           if (!token) {
@@ -74,8 +60,6 @@ function Draft() {
             }
           });
 
-          console.log("League data received:", response.data);
-
           setLeague(response.data.league);
           setTeams(response.data.teams);
 
@@ -90,21 +74,6 @@ function Draft() {
           const userTeam = response.data.teams.find(team => team.owner_id === userId);
           setUserTeam(userTeam);
 
-          // Initialize drafted players object
-          const initialDraftedPlayers = {};
-          response.data.teams.forEach(team => {
-            initialDraftedPlayers[team.id] = [];
-          });
-          setDraftedPlayers(initialDraftedPlayers);
-
-          // Set initial draft status
-          setDraftStatus({
-            currentTeam: response.data.teams[0].id,
-            currentPick: 1,
-            isActive: true,
-            isSnakeDraft: true
-          });
-
           // Fetch players next
           await fetchPlayers(response.data.league.sport);
           setSport(response.data.league.sport);
@@ -121,9 +90,6 @@ function Draft() {
           } else {
             alert("Failed to load draft: " + (error.response?.data?.error || error.message));
           }
-
-          // Optionally redirect to login
-          // window.location.href = "/login";
         } finally {
           setLoading(false);
         }
@@ -133,25 +99,16 @@ function Draft() {
     }
   }, [leagueCode]);
 
-  // Function to fetch available players based on sport
-  const fetchPlayers = async (sport) => {
+  // Function to fetch the player catalog for a sport
+  const fetchPlayers = async (league) => {
     try {
-      console.log("Fetching players for sport:", sport);
-
-      const league = sport;
-
-      if (!league) {
-        console.error("Unsupported sport:", sport);
-        return;
-      }
-
       // Get the token
       const token = localStorage.getItem('authToken');
       if (!token) {
         throw new Error("Authentication token not found. Please log in again.");
       }
 
-      // Custom endpoint to get all players from a sport
+      // Served as a cached snapshot; the browser revalidates it with its ETag
       const response = await axios.get(`/api/players/${league}`, {
         headers: {
           'Authorization': `Bearer ${token}`
@@ -159,8 +116,7 @@ function Draft() {
       });
 
       if (response.data && response.data.players) {
-        console.log(`Loaded ${response.data.players.length} players for ${sport}`);
-        setPlayers(response.data.players);
+        setCatalog(response.data.players);
       } else {
         console.error("Invalid response format:", response.data);
       }
@@ -170,166 +126,76 @@ function Draft() {
     }
   };
 
+  // Live draft room: the server validates picks and pushes them to everyone
   useEffect(() => {
-    if (userTeam && draftStatus.currentTeam) {
-      console.log("Current team on clock:", draftStatus.currentTeam);
-      console.log("Your team ID:", userTeam.id);
-      console.log("Is it your turn:", draftStatus.currentTeam === userTeam.id);
-    }
-  }, [draftStatus.currentTeam, userTeam]);
-
-  // Handle drafting a player
-  const draftPlayer = async (player) => {
-    // Temporarily commented out to allow drafting
-    // if (draftStatus.currentTeam !== userTeam?.id) {
-    //   alert("It's not your turn to draft!");
-    //   return;
-    // }
-
-    try {
-      // Update local state
-      const updatedDraftedPlayers = { ...draftedPlayers };
-      if (!updatedDraftedPlayers[draftStatus.currentTeam]) {
-        updatedDraftedPlayers[draftStatus.currentTeam] = [];
-      }
-
-      updatedDraftedPlayers[draftStatus.currentTeam].push(player);
-      setDraftedPlayers(updatedDraftedPlayers);
-
-      // Save to localStorage
-      localStorage.setItem(`draft_${league.id}`, JSON.stringify(updatedDraftedPlayers));
-
-      // Remove player from available list
-      setPlayers(players.filter(p => p.id !== player.id));
-
-      // Update draft order
-      updateDraftOrder();
-
-      // Optional: Try API call if it exists
-      try {
-        await axios.post("/api/draft/pick", {
-          leagueId: league.id,
-          teamId: draftStatus.currentTeam,
-          playerId: player.id,
-          pickNumber: draftStatus.currentPick
-        }, {
-          headers: {
-            'Authorization': `Bearer ${localStorage.getItem('authToken')}`
-          }
-        });
-        console.log("Draft pick saved to server");
-      } catch (apiError) {
-        console.warn("API call failed, but draft continues in local mode:", apiError);
-      }
-    } catch (error) {
-      console.error("Error drafting player:", error);
-      alert("Failed to draft player. Please try again.");
-    }
-  };
-
-  // Restore draft state from localStorage if page refreshes
-  useEffect(() => {
-    if (league) {
-      const savedDraft = localStorage.getItem(`draft_${league.id}`);
-      if (savedDraft) {
-        try {
-          const parsedDraft = JSON.parse(savedDraft);
-          setDraftedPlayers(parsedDraft);
-
-          // Also remove drafted players from the available list
-          const allDraftedPlayerIds = new Set();
-          Object.values(parsedDraft).forEach(teamPlayers => {
-            teamPlayers.forEach(player => allDraftedPlayerIds.add(player.id));
-          });
-
-          setPlayers(prevPlayers => prevPlayers.filter(p => !allDraftedPlayerIds.has(p.id)));
-
-          // Set pick number based on total drafted players
-          const totalDrafted = Object.values(parsedDraft).reduce(
-            (sum, players) => sum + players.length, 0
-          );
-
-          if (totalDrafted > 0) {
-            // Calculate which team should be up next
-            const currentPick = totalDrafted + 1;
-            updateDraftOrderForPick(currentPick);
-          }
-        } catch (e) {
-          console.error("Error restoring draft from localStorage:", e);
-        }
+    if (!league) return;
+
+    const joinDraft = () => socket.emit("join_draft", { league_id: league.id });
+    // a draft scheduled for later opens on its own; ask for the state again then
+    let startTimer = null;
+    const handleState = (state) => {
+      if (state.league_id !== league.id) return;
+      clearTimeout(startTimer);
+      if (state.starts_in !== null) {
+        startTimer = setTimeout(joinDraft, state.starts_in * 1000);
       }
+      setPicks(state.picks);
+      setDraftStatus(prev => ({
+        ...prev,
+        currentTeam: state.on_clock,
+        currentPick: state.pick_number,
+        isStarted: state.started,
+        isActive: state.started && !state.complete
+      }));
+    };
+    const handlePick = (pick) => {
+      if (pick.league_id !== league.id) return;
+      setPicks(prev => prev.some(p => p.pick === pick.pick) ? prev : [...prev, pick]);
+      setDraftStatus(prev => ({
+        ...prev,
+        currentTeam: pick.on_clock,
+        currentPick: pick.pick_number,
+        isActive: pick.on_clock !== null
+      }));
+    };
+    const handleError = (error) => alert(error.message);
+    const handleComplete = (data) => {
+      if (data.league_id !== league.id) return;
+      setDraftStatus(prev => ({ ...prev, currentTeam: null, isActive: false }));
+    };
+
+    if (!socket.connected) {
+      socket.connect();
     }
+    joinDraft();
+    socket.on("connect", joinDraft);
+    socket.on("draft_state", handleState);
+    socket.on("draft_pick", handlePick);
+    socket.on("draft_error", handleError);
+    socket.on("draft_complete", handleComplete);
+
+    return () => {
+      clearTimeout(startTimer);
+      socket.emit("leave_draft", { league_id: league.id });
+      socket.off("connect", joinDraft);
+      socket.off("draft_state", handleState);
+      socket.off("draft_pick", handlePick);
+      socket.off("draft_error", handleError);
+      socket.off("draft_complete", handleComplete);
+    };
   }, [league]);
 
-  // Add this helper function
-  const updateDraftOrderForPick = (pickNumber) => {
-    const totalTeams = teams.length;
-
-    // Determine which team is on the clock based on pick number
-    let teamIndex;
-    if (draftStatus.isSnakeDraft) {
-      const round = Math.floor((pickNumber - 1) / totalTeams);
-      const pickInRound = (pickNumber - 1) % totalTeams;
-
-      // Even rounds go in reverse order
-      if (round % 2 === 1) {
-        teamIndex = totalTeams - 1 - pickInRound;
-      } else {
-        teamIndex = pickInRound;
-      }
-    } else {
-      // Standard draft
-      teamIndex = (pickNumber - 1) % totalTeams;
-    }
-
-    setDraftStatus({
-      ...draftStatus,
-      currentTeam: teams[teamIndex]?.id,
-      currentPick: pickNumber,
-      isActive: true
-    });
+  // Handle drafting a player; the pick shows up once the server broadcasts it
+  const draftPlayer = (player) => {
+    socket.emit("draft_pick", { league_id: league.id, player_id: player.id });
   };
 
-  // Update draft order based on current pick
-  const updateDraftOrder = () => {
-    const totalTeams = teams.length;
-    const currentPick = draftStatus.currentPick;
-    const newPick = currentPick + 1;
-
-    // Determine next team based on snake draft rules if enabled
-    let nextTeamIndex;
-    // if draft should be over (make the logic better in the future)
-    if (currentPick / totalTeams > playerLimits[sport]) {
-      endDraft();
-    }
-    if (draftStatus.isSnakeDraft) {
-      const currentRound = Math.floor(currentPick / totalTeams);
-      const isEvenRound = currentRound % 2 === 1;
-
-      // Find current team index
-      const currentTeamIndex = teams.findIndex(t => t.id === draftStatus.currentTeam);
-
-      if (isEvenRound) {
-        // Even rounds go in reverse
-        nextTeamIndex = (currentTeamIndex - 1 + totalTeams) % totalTeams;
-      } else {
-        // Odd rounds go in order
-        nextTeamIndex = (currentTeamIndex + 1) % totalTeams;
-      }
-    } else {
-      // Standard draft - just cycle through teams
-      const currentTeamIndex = teams.findIndex(t => t.id === draftStatus.currentTeam);
-      nextTeamIndex = (currentTeamIndex + 1) % totalTeams;
-    }
-
-    setDraftStatus({
-      ...draftStatus,
-      currentTeam: teams[nextTeamIndex].id,
-      currentPick: newPick,
-    });
+  // Commissioner tool: open the draft now; the team list is frozen from here on
+  const startDraft = () => {
+    socket.emit("start_draft", { league_id: league.id });
   };
 
-  // Add this function with your other functions
+  // Commissioner tool: end the draft early and build the schedule
   const endDraft = async () => {
     try {
       // Confirm with the user
@@ -342,23 +208,9 @@ function Draft() {
         throw new Error("Authentication token not found. Please log in again.");
       }
 
-      // Map drafted players to the format expected by the backend
-      const teamRosters = Object.entries(draftedPlayers).map(([teamId, players]) => ({
-        teamId: parseInt(teamId),
-        players: players.map(p => ({
-          id: p.id,
-          first_name: p.first_name,
-          last_name: p.last_name,
-          position: p.position,
-          team_name: p.team_name
-        }))
-      }));
-
-      // Save draft results to backend using the new endpoint
+      // Rosters are already saved pick by pick
       await axios.post("/api/draft/finalize", {
-        leagueId: league.id,
-        teams: teamRosters,
-        sport: sport
+        leagueId: league.id
       }, {
         headers: {
           'Authorization': `Bearer ${token}`
@@ -367,9 +219,6 @@ function Draft() {
 
       alert("Draft has been finalized successfully! Team rosters are now set.");
 
-      // Clear localStorage draft data
-      localStorage.removeItem(`draft_${league.id}`);
-
       // Redirect to league home
       window.location.href = `/league/home/${leagueCode}`;
 
@@ -379,20 +228,50 @@ function Draft() {
     }
   };
 
-  // Filter players based on search and position
-  const filteredPlayers = players.filter(player => {
-    const matchesSearch =
-      player.first_name.toLowerCase().includes(searchTerm.toLowerCase()) ||
-      player.last_name.toLowerCase().includes(searchTerm.toLowerCase());
+  // Drafted players by team, and everyone still available
+  const catalogById = new Map(catalog.map(player => [player.id, player]));
+  const takenIds = new Set(picks.map(pick => pick.player_id));
+  const draftedPlayers = {};
+  picks.forEach(pick => {
+    const player = catalogById.get(pick.player_id) || pick.player || { id: pick.player_id, first_name: pick.player_id, last_name: "", position: pick.slot };
+    (draftedPlayers[pick.team_id] = draftedPlayers[pick.team_id] || []).push(player);
+  });
+  const players = catalog.filter(player => !takenIds.has(player.id));
 
-    const matchesPosition = positionFilter === "All" || player.position === positionFilter;
+  // Name searches go to the server index (prefix + typo matching), debounced
+  useEffect(() => {
+    if (!sport || !searchTerm.trim()) {
+      setSearchResults(null);
+      return;
+    }
+    const timer = setTimeout(async () => {
+      try {
+        const params = new URLSearchParams({ q: searchTerm, limit: 100 });
+        if (positionFilter !== "All") {
+          params.set("position", positionFilter);
+        }
+        const response = await axios.get(`/api/players/${sport}/search?${params}`, {
+          headers: {
+            'Authorization': `Bearer ${localStorage.getItem('authToken')}`
+          }
+        });
+        setSearchResults(response.data.players || []);
+      } catch (error) {
+        console.error("Error searching players:", error);
+      }
+    }, 150);
+    return () => clearTimeout(timer);
+  }, [searchTerm, positionFilter, sport]);
 
-    return matchesSearch && matchesPosition;
-  });
+  // Filter players based on search and position; search results cover the
+  // whole catalog, so drop anyone already drafted
+  const filteredPlayers = searchResults !== null
+    ? searchResults.filter(player => !takenIds.has(player.id))
+    : players.filter(player => positionFilter === "All" || player.position === positionFilter);
 
   // Get unique positions for filter dropdown
-  const positions = players.length > 0
-    ? ["All", ...new Set(players.map(player => player.position))]
+  const positions = catalog.length > 0
+    ? ["All", ...new Set(catalog.map(player => player.position))]
     : ["All"];
 
   if (loading) {
@@ -470,7 +349,7 @@ function Draft() {
                         <button
                           className="btn btn-primary btn-sm"
                           onClick={() => draftPlayer(player)}
-                        // disabled={draftStatus.currentTeam !== userTeam?.id}
+                          disabled={!draftStatus.isActive}
                         >
                           {t('draft.draft')}</button>
                       </td>
@@ -532,6 +411,13 @@ function Draft() {
                 <h3 className="mb-0">Debug Tools</h3>
               </div>
               <div className="card-body">
+                <button
+                  className="btn btn-success me-2"
+                  onClick={startDraft}
+                  disabled={draftStatus.isStarted}
+                >
+                  Start Draft
+                </button>
                 <button
                   className="btn btn-danger"
                   onClick={endDraft}
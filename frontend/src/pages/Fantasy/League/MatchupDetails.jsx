@@ -3,6 +3,7 @@ import React, { useEffect, useState } from 'react';
 import { useParams } from 'react-router-dom';
 import { getAuthToken } from '../../../components/utils/auth';
 import { useTranslation } from 'react-i18next';
+import socket from '../../../socket';
 
 
 const MatchupDetails = () => {
@@ -45,6 +46,25 @@ const MatchupDetails = () => {
     fetchMatchupDetails();
   }, [matchupId]);
 
+  // Live totals are pushed by the scoring job; no polling needed
+  useEffect(() => {
+    const joinMatchup = () => socket.emit("join_matchup", { matchup_code: matchupId });
+    const handleScore = (update) => {
+      if (update.matchup_code !== matchupId) return;
+      setMatchup(prev => prev && { ...prev, home_score: update.home_score, away_score: update.away_score });
+    };
+
+    joinMatchup();
+    socket.on("connect", joinMatchup);
+    socket.on("matchup_score", handleScore);
+
+    return () => {
+      socket.emit("leave_matchup", { matchup_code: matchupId });
+      socket.off("connect", joinMatchup);
+      socket.off("matchup_score", handleScore);
+    };
+  }, [matchupId]);
+
   if (loading) return <div>Loading...</div>;
   if (error) return <div>{error}</div>;
 